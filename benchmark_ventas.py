@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de registrar_venta — FarmaTrack
+Mide la latencia de registrar un ticket de 1, 20 y 100 líneas sobre una
+base de datos temporal (no toca la base real).
+Ejecutar desde la raiz del proyecto: python benchmark_ventas.py [repeticiones]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from models.database import DatabaseManager, get_db_connection, cerrar_conexiones
+from controllers.ventas import VentasController
+
+
+class _TicketFalso:
+    """Treeview mínimo con las líneas del ticket (mismas columnas que venta_window)."""
+
+    def __init__(self, filas):
+        self._filas = {f"I{i:03d}": fila for i, fila in enumerate(filas)}
+
+    def get_children(self):
+        return list(self._filas)
+
+    def item(self, iid, option=None):
+        return self._filas[iid] if option == "values" else {"values": self._filas[iid]}
+
+
+def _preparar_bd(ruta: Path, n_productos: int):
+    with patch("models.database.DB_PATH", ruta):
+        DatabaseManager.inicializar_tablas()
+        with get_db_connection() as conn:
+            conn.executemany("""
+                INSERT INTO productos (codigo_barras, descripcion, proveedor, unidad,
+                    cantidad, precio_compra, precio_venta, impuesto, fecha_vencimiento)
+                VALUES (?, ?, 'BENCH', 'UND', 1000000, 1000, 1500, '19%  IVA', '2030-12-31')
+            """, [(f"77{i:011d}", f"PRODUCTO {i}") for i in range(n_productos)])
+
+
+def medir(n_lineas: int, repeticiones: int, ruta: Path) -> float:
+    """Retorna la latencia media (ms) de registrar un ticket de n_lineas."""
+    filas = [
+        (f"77{i:011d}", f"PRODUCTO {i}", 1, 1500.0, 1500.0, "19%  IVA")
+        for i in range(n_lineas)
+    ]
+    tiempos = []
+    with patch("models.database.DB_PATH", ruta):
+        for _ in range(repeticiones):
+            ticket = _TicketFalso(filas)
+            inicio = time.perf_counter()
+            if not VentasController.registrar_venta(ticket):
+                raise RuntimeError("La venta de prueba no se registró")
+            tiempos.append(time.perf_counter() - inicio)
+    return sum(tiempos) / len(tiempos) * 1000
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = Path(carpeta) / "benchmark.db"
+        _preparar_bd(ruta, 100)
+
+        print("=" * 46)
+        print("  registrar_venta — latencia por ticket")
+        print("=" * 46)
+        for n in (1, 20, 100):
+            ms = medir(n, repeticiones, ruta)
+            print(f"  {n:>3} líneas : {ms:8.2f} ms  ({repeticiones} repeticiones)")
+        cerrar_conexiones()
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,22 @@ LOGS_DIR = APPDATA_DIR / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
 
 
+# ==============================================================================
+# 🗄 CONEXIONES SQLITE (pool por hilo)
+# ==============================================================================
+
+DB_CACHE_SIZE_KB = 32768            # caché de páginas por conexión (32 MB)
+DB_MMAP_SIZE = 128 * 1024 * 1024    # lectura mapeada en memoria (128 MB)
+DB_BUSY_TIMEOUT = 10                # segundos de espera si la BD está bloqueada
+
+
+# ==============================================================================
+# 💾 BACKUPS
+# ==============================================================================
+
+BACKUP_COMPRESION = "zlib"          # copias completas: "zlib", "lzma" o None (.db sin comprimir)
+
+
 # ==============================================================================
 # 🛡 SISTEMA SEGURO DE COPIA DE BASE
 # ==============================================================================
@@ -1,17 +1,26 @@
 """
 Controller del Dashboard - FarmaTrack
 Provee todas las métricas para el dashboard principal
+✅ NUEVO: Ventas del día y de la semana desde resumen_ventas_diario
+   (filas pre-agregadas por día; no depende del tamaño del historial)
+✅ NUEVO: Stock bajo desde el contador ventas_por_producto, ordenado por
+   lo que más se vende
+✅ NUEVO: Instantánea del dashboard con TTL por métrica: los KPIs baratos
+   se recalculan a menudo y stock bajo / vencimientos rara vez. Se calcula
+   en un hilo trabajador y la vista pinta siempre la última instantánea
+✅ NUEVO: Las ventas, ediciones de inventario e importaciones publican en el
+   bus de eventos y solo se invalidan las métricas afectadas; los cambios
+   de otro proceso se detectan con PRAGMA data_version
 """
-import sqlite3
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
-try:
-    from config.settings import DB_PATH
-except ImportError:
-    from pathlib import Path
-    DB_PATH = Path("farma_pro_stocker.db")
+from models.database import get_db_connection
+from controllers.ventas import VentasController
+from utils import eventos
 
 
 class DashboardController:
@@ -22,15 +31,15 @@ class DashboardController:
 
     @classmethod
     def ventas_hoy(cls) -> Dict[str, Any]:
-        """Retorna total y cantidad de ventas del día"""
+        """Retorna total y cantidad de ventas del día (filas del día en el resumen)"""
         hoy = datetime.now().strftime("%Y-%m-%d")
         try:
-            with sqlite3.connect(str(DB_PATH)) as conn:
+            with get_db_connection() as conn:
                 cursor = conn.execute("""
-                    SELECT COUNT(*), COALESCE(SUM(total), 0)
-                    FROM ventas
-                    WHERE fecha LIKE ?
-                """, (f"{hoy}%",))
+                    SELECT COALESCE(SUM(num_ventas), 0), COALESCE(SUM(total), 0)
+                    FROM resumen_ventas_diario
+                    WHERE dia = ?
+                """, (hoy,))
                 count, total = cursor.fetchone()
                 return {"cantidad": count or 0, "total": total or 0.0}
         except Exception as e:
@@ -40,24 +49,12 @@ class DashboardController:
     @classmethod
     def ventas_semana(cls) -> List[Dict]:
         """Ventas de los últimos 7 días (para mini gráfico)"""
-        try:
-            resultados = []
-            with sqlite3.connect(str(DB_PATH)) as conn:
-                for i in range(6, -1, -1):
-                    dia = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-                    cursor = conn.execute(
-                        "SELECT COALESCE(SUM(total),0) FROM ventas WHERE fecha LIKE ?",
-                        (f"{dia}%",)
-                    )
-                    total = cursor.fetchone()[0]
-                    resultados.append({
-                        "dia": (datetime.now() - timedelta(days=i)).strftime("%a"),
-                        "total": total
-                    })
-            return resultados
-        except Exception as e:
-            logging.error(f"Error ventas_semana: {e}")
-            return []
+        hoy = datetime.now().date()
+        serie = VentasController.ventas_por_periodo("dia", hoy - timedelta(days=6), hoy)
+        return [{"dia": p["inicio"].strftime("%a"), "total": p["total"]} for p in serie]
+
+    # Ventas mínimas para que un producto agotado aparezca en stock bajo
+    MIN_VECES_VENDIDO = 2
 
     @classmethod
     def productos_stock_bajo(cls) -> List[Dict]:
@@ -65,27 +62,29 @@ class DashboardController:
         Productos que cumplen AMBAS condiciones estrictamente:
         1. cantidad = 0 en inventario
         2. Han sido vendidos al menos 2 veces históricamente
+
+        Lee el contador ventas_por_producto (un JOIN por clave primaria sobre
+        los agotados de idx_productos_cantidad) y ordena primero lo que más
+        se vende: agotado pero con rotación alta = reponer antes.
         """
         try:
-            with sqlite3.connect(str(DB_PATH)) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_db_connection() as conn:
                 rows = conn.execute("""
                     SELECT
                         p.codigo_barras,
                         p.descripcion,
                         p.cantidad,
-                        p.proveedor
+                        p.proveedor,
+                        c.veces_vendido,
+                        c.unidades_vendidas,
+                        c.ultima_venta
                     FROM productos p
+                    JOIN ventas_por_producto c ON c.codigo_barras = p.codigo_barras
                     WHERE p.cantidad = 0
-                      AND (
-                          SELECT COUNT(*)
-                          FROM ventas v,
-                               json_each(v.productos) AS item
-                          WHERE json_extract(item.value, '$.codigo') = p.codigo_barras
-                      ) >= 2
-                    ORDER BY p.descripcion ASC
+                      AND c.veces_vendido >= ?
+                    ORDER BY c.veces_vendido DESC, c.ultima_venta DESC, p.descripcion ASC
                     LIMIT 50
-                """).fetchall()
+                """, (cls.MIN_VECES_VENDIDO,)).fetchall()
                 return [dict(r) for r in rows]
         except Exception as e:
             logging.error(f"Error productos_stock_bajo: {e}")
@@ -98,8 +97,7 @@ class DashboardController:
         limite = (hoy + timedelta(days=cls.DIAS_VENCIMIENTO_PROXIMO)).strftime("%Y-%m-%d")
         hoy_str = hoy.strftime("%Y-%m-%d")
         try:
-            with sqlite3.connect(str(DB_PATH)) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_db_connection() as conn:
                 rows = conn.execute("""
                     SELECT codigo_barras, descripcion, cantidad,
                            fecha_vencimiento, proveedor
@@ -136,7 +134,7 @@ class DashboardController:
     def valor_total_inventario(cls) -> Dict[str, float]:
         """Valor de compra y venta del inventario completo"""
         try:
-            with sqlite3.connect(str(DB_PATH)) as conn:
+            with get_db_connection() as conn:
                 cursor = conn.execute("""
                     SELECT
                         COALESCE(SUM(cantidad * precio_compra), 0),
@@ -165,4 +163,118 @@ class DashboardController:
             "stock_bajo": cls.productos_stock_bajo(),
             "por_vencer": cls.productos_por_vencer(),
             "inventario": cls.valor_total_inventario(),
-        }
\ No newline at end of file
+        }
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # INSTANTÁNEA CON TTL POR MÉTRICA
+    # ══════════════════════════════════════════════════════════════════════════
+
+    # Segundos que una métrica se considera vigente antes de recalcularla.
+    # Los cambios hechos por la aplicación la invalidan antes (ver
+    # METRICAS_POR_EVENTO); el TTL cubre el cambio de día y lo que se escape.
+    TTL_METRICAS = {
+        "ventas_hoy": 300,
+        "ventas_semana": 300,
+        "inventario": 900,
+        "stock_bajo": 900,
+        "por_vencer": 3600,
+    }
+
+    # Tema del bus → métricas que dependen de él
+    METRICAS_POR_EVENTO = {
+        eventos.VENTAS: ("ventas_hoy", "ventas_semana", "stock_bajo", "inventario"),
+        eventos.INVENTARIO: ("stock_bajo", "por_vencer", "inventario"),
+        eventos.FACTURAS: (),       # el dashboard no muestra cuentas por pagar
+    }
+
+    # Métrica → método que la calcula
+    _CALCULOS = {
+        "ventas_hoy": "ventas_hoy",
+        "ventas_semana": "ventas_semana",
+        "stock_bajo": "productos_stock_bajo",
+        "por_vencer": "productos_por_vencer",
+        "inventario": "valor_total_inventario",
+    }
+
+    # Compartida entre paneles: al volver al dashboard se pinta al instante
+    _instantanea: Dict[str, Any] = {}
+    _calculada_en: Dict[str, float] = {}
+    _invalidaciones: Dict[str, int] = {}    # cuántas veces se invalidó cada métrica
+    _version_datos = None       # (conexión, PRAGMA data_version, eventos publicados)
+    _lock = threading.Lock()
+
+    @classmethod
+    def instantanea(cls) -> Dict[str, Any]:
+        """Última instantánea calculada (vacía si nunca se calculó)"""
+        with cls._lock:
+            return dict(cls._instantanea)
+
+    @classmethod
+    def metricas_vencidas(cls, ahora: float = None) -> List[str]:
+        """Métricas cuyo TTL venció (o que nunca se calcularon)"""
+        ahora = time.monotonic() if ahora is None else ahora
+        with cls._lock:
+            return [
+                m for m, ttl in cls.TTL_METRICAS.items()
+                if m not in cls._calculada_en or ahora - cls._calculada_en[m] >= ttl
+            ]
+
+    @classmethod
+    def actualizar_instantanea(cls, forzar: bool = False) -> Dict[str, Any]:
+        """
+        Recalcula las métricas vencidas (todas si forzar=True) y devuelve la
+        instantánea completa. Pensado para el hilo trabajador: no toca widgets.
+        """
+        metricas = list(cls.TTL_METRICAS) if forzar else cls.metricas_vencidas()
+        with cls._lock:
+            invalidaciones = dict(cls._invalidaciones)
+        nuevas = {m: getattr(cls, cls._CALCULOS[m])() for m in metricas}
+        ahora = time.monotonic()
+        with cls._lock:
+            cls._instantanea = {**cls._instantanea, **nuevas}
+            for m in nuevas:
+                # Invalidada mientras se calculaba: se muestra, pero sigue vencida
+                if cls._invalidaciones.get(m, 0) == invalidaciones.get(m, 0):
+                    cls._calculada_en[m] = ahora
+            return dict(cls._instantanea)
+
+    @classmethod
+    def invalidar(cls, metricas=None):
+        """Marca métricas como vencidas (todas si None); la próxima actualización las recalcula"""
+        with cls._lock:
+            for m in (list(cls.TTL_METRICAS) if metricas is None else metricas):
+                cls._calculada_en.pop(m, None)
+                cls._invalidaciones[m] = cls._invalidaciones.get(m, 0) + 1
+
+    @classmethod
+    def al_evento(cls, tema: str, datos: dict):
+        """Suscriptor del bus: puede correr en cualquier hilo"""
+        cls.invalidar(cls.METRICAS_POR_EVENTO.get(tema, ()))
+
+    @classmethod
+    def hubo_cambios_externos(cls) -> bool:
+        """
+        True si otra conexión confirmó cambios que no se anunciaron por el bus
+        (otro proceso, o un backup restaurado). Es un PRAGMA: no lee tablas.
+        La primera llamada solo registra la versión actual.
+        """
+        try:
+            with get_db_connection() as conn:
+                version = conn.execute("PRAGMA data_version").fetchone()[0]
+        except Exception as e:
+            logging.error(f"Error leyendo data_version: {e}")
+            return False
+
+        marca = (id(conn), version, eventos.bus.publicados)
+        with cls._lock:
+            anterior, cls._version_datos = cls._version_datos, marca
+        if anterior is None:
+            return False
+        if anterior[0] != marca[0]:
+            return True             # conexión nueva: no hay con qué comparar
+        # Si hubo eventos desde la última revisión, ellos explican el cambio
+        return anterior[1] != marca[1] and anterior[2] == marca[2]
+
+
+for _tema in DashboardController.METRICAS_POR_EVENTO:
+    eventos.bus.suscribir(_tema, DashboardController.al_evento)
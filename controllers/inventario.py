@@ -2,16 +2,25 @@
 Controlador de lógica de inventario
 ✅ CORREGIDO: Actualización desde Excel con mapeo correcto
 ✅ CORREGIDO: Soporte para archivos .xls y .xlsx
+✅ NUEVO: Importación de Excel por columnas + tabla temporal + upsert en bloque
+✅ NUEVO: importar_catalogo_excel sin diálogos, con avance y cancelación
+✅ NUEVO: Lectura .xlsx por lotes (openpyxl read_only) directo al upsert
+✅ NUEVO: Solo se escriben las filas que cambiaron (registro en cambios_catalogo)
+✅ NUEVO: Buscar y reemplazar precios con un solo UPDATE (fijo, ±% o margen)
 """
 from tkinter import messagebox
-from models.database import DatabaseManager, get_db_connection
+from models.database import DatabaseManager, get_db_connection, catalogo, publicar_al_confirmar
+from utils import eventos
 from utils.validators import (
     validate_codigo_barras,
     validate_cantidad,
     validate_precio,
     validate_fecha
 )
-from utils.formatters import parse_precio_text, clean_codigo_barras
+from utils.formatters import parse_precio_text
+from utils.importaciones import Progreso, ErrorImportacion
+from utils.lector_excel import LectorExcel
+from typing import Optional
 import pandas as pd
 import logging
 
@@ -80,6 +89,41 @@ class InventarioController:
         ✅ CORREGIDO: Actualiza productos desde archivo Excel con mapeo correcto
         ✅ CORREGIDO: Soporte para archivos .xls (antiguos) y .xlsx (modernos)
 
+        Versión síncrona con mensajes: la ventana de inventario usa
+        importar_catalogo_excel en segundo plano (ver utils/importaciones).
+
+        Returns: (actualizados, insertados, errores)
+        """
+        try:
+            actualizados, insertados, errores, sin_cambios = \
+                InventarioController.importar_catalogo_excel(archivo_path)
+
+            messagebox.showinfo(
+                "Actualización Completada",
+                InventarioController.resumen_importacion(actualizados, insertados, errores, sin_cambios)
+            )
+            return (actualizados, insertados, errores)
+
+        except ErrorImportacion as e:
+            messagebox.showerror(e.titulo, e.mensaje)
+            return (0, 0, 0)
+
+        except FileNotFoundError:
+            logging.error(f"Archivo no encontrado: {archivo_path}")
+            messagebox.showerror("Error", f"Archivo no encontrado:\n{archivo_path}")
+            return (0, 0, 0)
+
+        except Exception as e:
+            logging.error(f"Error al actualizar desde Excel: {e}", exc_info=True)
+            messagebox.showerror("Error", f"No se pudo procesar el archivo:\n\n{str(e)}")
+            return (0, 0, 0)
+
+    @staticmethod
+    def importar_catalogo_excel(archivo_path: str, progreso: Progreso = None) -> tuple:
+        """
+        ✅ NUEVO: Importa un catálogo Excel sin mostrar diálogos (apta para
+        correr en un hilo trabajador).
+
         Mapeo Excel → Base de datos:
         - EAN → codigo_barras
         - Denominación → descripcion
@@ -96,257 +140,468 @@ class InventarioController:
         - Si EAN existe: actualizar solo descripcion y precio_compra
         - Si EAN NO existe: insertar con todos los campos
 
-        Returns: (actualizados, insertados, errores)
-        """
-        try:
-            # ✅ DETECTAR FORMATO Y LEER CON ENGINE CORRECTO
-            import os
-            extension = os.path.splitext(archivo_path)[1].lower()
+        Solo se escriben las filas que cambiaron; el detalle queda en la
+        tabla cambios_catalogo (ver obtener_cambios_catalogo).
 
-            if extension == '.xls':
-                # Archivo .xls antiguo - intentar convertir o leer con xlrd si está disponible
-                try:
-                    # Intentar con xlrd si está instalado
-                    df = pd.read_excel(archivo_path, dtype=str, engine='xlrd')
-                    logging.info("Archivo .xls leído con xlrd")
-                except ImportError:
-                    # xlrd no disponible - sugerir conversión
-                    messagebox.showerror(
-                        "Formato No Soportado",
-                        "El archivo es formato .xls (Excel antiguo).\n\n"
-                        "Por favor:\n"
-                        "1. Abra el archivo en Excel\n"
-                        "2. Guárdelo como .xlsx (Excel moderno)\n"
-                        "3. Intente de nuevo\n\n"
-                        "O instale xlrd:\n"
-                        "pip install xlrd"
-                    )
-                    logging.error("Archivo .xls pero xlrd no está instalado")
-                    return (0, 0, 0)
-            elif extension == '.xlsx':
-                # Archivo .xlsx moderno - usar openpyxl (ya instalado)
-                df = pd.read_excel(archivo_path, dtype=str, engine='openpyxl')
-                logging.info("Archivo .xlsx leído con openpyxl")
-            else:
-                messagebox.showerror(
-                    "Formato Desconocido",
-                    f"Formato de archivo no soportado: {extension}\n\n"
-                    "Use archivos .xlsx o .xls"
+        Lanza ErrorImportacion (formato o columnas) e ImportacionCancelada
+        (la transacción se revierte completa).
+        Returns: (actualizados, insertados, errores, sin_cambios)
+        """
+        progreso = progreso or Progreso()
+        progreso.reportar("Leyendo archivo Excel...")
+        lote = InventarioController.LOTE_IMPORTACION
+        lector = None
+
+        # ✅ DETECTAR FORMATO Y LEER CON ENGINE CORRECTO
+        import os
+        extension = os.path.splitext(archivo_path)[1].lower()
+
+        if extension == '.xls':
+            # Archivo .xls antiguo - leer con xlrd si está disponible (sin streaming)
+            try:
+                df = pd.read_excel(archivo_path, dtype=str, engine='xlrd')
+                logging.info("Archivo .xls leído con xlrd")
+            except ImportError:
+                logging.error("Archivo .xls pero xlrd no está instalado")
+                raise ErrorImportacion(
+                    "Formato No Soportado",
+                    "El archivo es formato .xls (Excel antiguo).\n\n"
+                    "Por favor:\n"
+                    "1. Abra el archivo en Excel\n"
+                    "2. Guárdelo como .xlsx (Excel moderno)\n"
+                    "3. Intente de nuevo\n\n"
+                    "O instale xlrd:\n"
+                    "pip install xlrd"
                 )
-                return (0, 0, 0)
-
-            logging.info(f"Columnas encontradas en Excel: {list(df.columns)}")
-
-            # Normalizar nombres de columnas (quitar espacios, minúsculas)
+            # Normalizar nombres de columnas (quitar espacios)
             df.columns = df.columns.str.strip()
+            columnas, total = list(df.columns), len(df)
+            lotes = (df.iloc[i:i + lote] for i in range(0, len(df), lote))
+        elif extension == '.xlsx':
+            # ✅ Archivo .xlsx moderno - openpyxl en modo read_only, por lotes
+            lector = LectorExcel(archivo_path, lote)
+            lector.abrir()
+            columnas, total, lotes = lector.columnas, lector.total, lector.lotes()
+        else:
+            raise ErrorImportacion(
+                "Formato Desconocido",
+                f"Formato de archivo no soportado: {extension}\n\n"
+                "Use archivos .xlsx o .xls"
+            )
+
+        try:
+            logging.info(f"Columnas encontradas en Excel: {columnas}")
 
             # Verificar columnas obligatorias
             columnas_requeridas = ['EAN', 'Denominación', 'Venta Real']
-            columnas_faltantes = [col for col in columnas_requeridas if col not in df.columns]
+            columnas_faltantes = [col for col in columnas_requeridas if col not in columnas]
 
             if columnas_faltantes:
-                messagebox.showerror(
+                raise ErrorImportacion(
                     "Error",
                     f"Columnas faltantes en el Excel:\n{', '.join(columnas_faltantes)}\n\n"
                     f"Columnas requeridas: {', '.join(columnas_requeridas)}"
                 )
-                return (0, 0, 0)
 
-            # Limpiar códigos de barras
-            df['EAN'] = df['EAN'].apply(clean_codigo_barras)
+            progreso.reportar("Leyendo y escribiendo en la base de datos...", total=total)
+            invalidos = set()
+            leidas = escritas = 0
+
+            # Cada lote se limpia y se escribe en la tabla temporal mientras
+            # el resto del archivo se sigue leyendo; el upsert va al final.
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                InventarioController._preparar_tabla_temporal(cursor)
+                try:
+                    for df in lotes:
+                        progreso.verificar()
+                        limpio, codigos_invalidos = InventarioController._limpiar_catalogo_excel(df)
+                        invalidos |= codigos_invalidos
+                        escritas += InventarioController._cargar_lote_temporal(cursor, limpio)
+                        leidas += len(df)
+                        progreso.reportar(
+                            total=max(total, leidas), leidas=leidas,
+                            escritas=escritas, errores=len(invalidos)
+                        )
 
-            # Filtrar filas con EAN vacío
-            df = df[df['EAN'].notna()]
-            df = df[df['EAN'] != '']
+                    progreso.verificar()
+                    progreso.reportar("Aplicando cambios al inventario...")
+                    actualizados, insertados, sin_cambios, modificados = \
+                        InventarioController._aplicar_tabla_temporal(cursor, os.path.basename(archivo_path))
+                finally:
+                    cursor.execute("DELETE FROM temp.importacion_catalogo")
+        finally:
+            if lector is not None:
+                lector.cerrar()
+        # Solo se invalida lo que cambió (los insertados no estaban en caché)
+        if modificados:
+            catalogo.invalidar(codigos=modificados)
+        if actualizados or insertados:
+            publicar_al_confirmar(eventos.INVENTARIO, codigos=modificados)
+
+        errores = len(invalidos)
+        if errores:
+            logging.warning(
+                f"{errores} filas con EAN inválido omitidas "
+                f"(ej.: {', '.join(sorted(invalidos)[:5])})"
+            )
+        logging.info(
+            f"Resumen actualización Excel: {actualizados} actualizados, {insertados} insertados, "
+            f"{sin_cambios} sin cambios, {errores} errores"
+        )
+        return (actualizados, insertados, errores, sin_cambios)
 
-            # Convertir precios y números
-            df['Venta Real'] = df['Venta Real'].apply(parse_precio_text)
+    @staticmethod
+    def resumen_importacion(actualizados: int, insertados: int, errores: int,
+                            sin_cambios: int = 0) -> str:
+        """Texto del resumen que se muestra al terminar una importación"""
+        return (
+            f"✅ Actualización completada\n\n"
+            f"📊 Resumen:\n"
+            f"  • Productos actualizados: {actualizados}\n"
+            f"  • Productos insertados: {insertados}\n"
+            f"  • Sin cambios: {sin_cambios}\n"
+            f"  • Errores: {errores}\n"
+            f"  • Total procesado: {actualizados + insertados}"
+        )
 
-            # Convertir cantidad a entero
-            if 'Cantidad' in df.columns:
-                df['Cantidad'] = pd.to_numeric(df['Cantidad'], errors='coerce').fillna(0).astype(int)
+    @staticmethod
+    def obtener_cambios_catalogo(codigo_barras: str = None, limite: int = 500) -> list:
+        """
+        Últimos cambios registrados por las importaciones de catálogo
+        (más recientes primero), opcionalmente de un solo producto.
+        """
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                sql = """
+                    SELECT fecha, origen, codigo_barras, tipo,
+                           descripcion_anterior, descripcion_nueva,
+                           precio_anterior, precio_nuevo
+                    FROM cambios_catalogo
+                """
+                params = []
+                if codigo_barras:
+                    sql += " WHERE codigo_barras = ?"
+                    params.append(codigo_barras)
+                sql += " ORDER BY id DESC LIMIT ?"
+                params.append(limite)
+                cursor.execute(sql, params)
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"Error al obtener cambios de catálogo: {e}")
+            return []
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # IMPORTACIÓN DE CATÁLOGO (operaciones por columna, sin iterar filas)
+    # ══════════════════════════════════════════════════════════════════════════
+
+    # Columna Excel → columna de la tabla temporal (opcionales, texto)
+    _COLUMNAS_TEXTO_EXCEL = {
+        'Proveedor': 'proveedor',
+        'UND': 'unidad',
+        'Impuesto': 'impuesto',
+        'Grupo': 'grupo',
+        'SubGrupo': 'subgrupo',
+    }
 
-            # Convertir bonificación
-            if '% Boni' in df.columns:
-                df['% Boni'] = df['% Boni'].apply(parse_precio_text)
+    @staticmethod
+    def _precios_columna(serie: pd.Series) -> pd.Series:
+        """
+        parse_precio_text aplicado a una columna completa.
+        Los enteros simples (el caso común) se convierten en bloque; el resto
+        de formatos se parsea una sola vez por valor distinto.
+        """
+        texto = serie.map(str).str.strip().str.lstrip("'").str.strip()
+        simples = texto.str.fullmatch(r"\d+")
+        resultado = pd.to_numeric(texto.where(simples), errors='coerce')
+        otros = ~simples & serie.notna()
+        if otros.any():
+            unicos = {v: parse_precio_text(v) for v in serie[otros].unique()}
+            resultado[otros] = pd.to_numeric(serie[otros].map(unicos), errors='coerce')
+        return resultado.astype(float)
 
-            # Filtrar filas con precio válido
-            df = df[df['Venta Real'].notna()]
-            df = df[df['Venta Real'] >= 0]
+    @staticmethod
+    def _limpiar_catalogo_excel(df: pd.DataFrame) -> tuple:
+        """
+        Limpia y tipa un lote del catálogo (columnas con nombre normalizado).
+        Returns: (DataFrame con las columnas de la tabla temporal,
+                  set de EAN inválidos)
+        """
+        # Limpiar códigos de barras (mismo criterio que clean_codigo_barras)
+        ean = (
+            df['EAN'].map(str).str.strip().str.lstrip("'")
+            .str.replace(" ", "", regex=False)
+            .str.replace("\u200b", "", regex=False)
+        )
+        precio = InventarioController._precios_columna(df['Venta Real'])
+
+        limpio = pd.DataFrame({
+            'codigo_barras': ean,
+            'descripcion': df['Denominación'].fillna('').astype(str).str.strip(),
+            'precio_compra': precio,
+        }, index=df.index)
+
+        for col_excel, col_bd in InventarioController._COLUMNAS_TEXTO_EXCEL.items():
+            if col_excel in df.columns:
+                limpio[col_bd] = df[col_excel].fillna('').astype(str).str.strip()
+            else:
+                limpio[col_bd] = ''
 
-            # Eliminar duplicados (mantener el primero)
-            df = df.drop_duplicates(subset=['EAN'], keep='first')
+        if 'Cantidad' in df.columns:
+            limpio['cantidad'] = pd.to_numeric(df['Cantidad'], errors='coerce').fillna(0).astype(int)
+        else:
+            limpio['cantidad'] = 0
 
-            logging.info(f"Filas válidas a procesar: {len(df)}")
+        if '% Boni' in df.columns:
+            limpio['bonificacion'] = InventarioController._precios_columna(df['% Boni']).fillna(0)
+        else:
+            limpio['bonificacion'] = 0.0
 
-            actualizados = 0
-            insertados = 0
-            errores = 0
+        # Filtrar EAN vacío y precio inválido; eliminar duplicados (mantener el primero)
+        limpio = limpio[limpio['codigo_barras'] != '']
+        limpio = limpio[limpio['precio_compra'].notna() & (limpio['precio_compra'] >= 0)]
+        limpio = limpio.drop_duplicates(subset=['codigo_barras'], keep='first')
 
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
+        # EAN demasiado corto (o celda vacía leída como 'None'/'nan') → error
+        invalidos = limpio['codigo_barras'].str.len() < 8
+        return limpio[~invalidos], set(limpio.loc[invalidos, 'codigo_barras'])
 
-                for idx, fila in df.iterrows():
-                    try:
-                        # Extraer datos con mapeo correcto
-                        ean = str(fila['EAN']).strip()
-                        denominacion = str(fila.get('Denominación', '')).strip() if pd.notna(fila.get('Denominación')) else ''
-                        venta_real = float(fila['Venta Real'])
-
-                        # Campos opcionales
-                        cantidad = int(fila.get('Cantidad', 0)) if 'Cantidad' in fila and pd.notna(fila.get('Cantidad')) else 0
-                        proveedor = str(fila.get('Proveedor', '')).strip() if pd.notna(fila.get('Proveedor')) else ''
-                        unidad = str(fila.get('UND', '')).strip() if pd.notna(fila.get('UND')) else ''
-                        impuesto = str(fila.get('Impuesto', '')).strip() if pd.notna(fila.get('Impuesto')) else ''
-                        bonificacion = float(fila.get('% Boni', 0)) if '% Boni' in fila and pd.notna(fila.get('% Boni')) else 0
-                        grupo = str(fila.get('Grupo', '')).strip() if pd.notna(fila.get('Grupo')) else ''
-                        subgrupo = str(fila.get('SubGrupo', '')).strip() if pd.notna(fila.get('SubGrupo')) else ''
-
-                        # Validar EAN
-                        if not ean or len(ean) < 8:
-                            logging.warning(f"Fila {idx}: EAN inválido '{ean}', omitiendo")
-                            errores += 1
-                            continue
-
-                        # Verificar si existe
-                        cursor.execute(
-                            "SELECT id_producto FROM productos WHERE codigo_barras = ?",
-                            (ean,)
-                        )
-                        existe = cursor.fetchone()
-
-                        if existe:
-                            # ✅ SI EXISTE: Actualizar SOLO descripcion y precio_compra
-                            cursor.execute("""
-                                UPDATE productos 
-                                SET descripcion = ?,
-                                    precio_compra = ?
-                                WHERE codigo_barras = ?
-                            """, (denominacion, venta_real, ean))
-
-                            actualizados += 1
-                            logging.debug(f"Actualizado: {ean} - {denominacion}")
-
-                        else:
-                            # ✅ NO EXISTE: Insertar con todos los campos
-                            cursor.execute("""
-                                INSERT INTO productos 
-                                (codigo_barras, descripcion, proveedor, unidad, cantidad,
-                                 precio_compra, precio_venta, impuesto, bonificacion, 
-                                 grupo, subgrupo)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            """, (
-                                ean,
-                                denominacion,
-                                proveedor,
-                                unidad,
-                                cantidad,
-                                venta_real,
-                                venta_real,  # precio_venta = precio_compra inicialmente
-                                impuesto,
-                                bonificacion,
-                                grupo,
-                                subgrupo
-                            ))
-
-                            insertados += 1
-                            logging.debug(f"Insertado: {ean} - {denominacion}")
-
-                    except Exception as e:
-                        logging.error(f"Error en fila {idx} (EAN: {ean if 'ean' in locals() else 'N/A'}): {e}")
-                        errores += 1
-                        continue
-
-                # Confirmar transacción
-                conn.commit()
-
-            # Mostrar resumen
-            mensaje_resumen = (
-                f"✅ Actualización completada\n\n"
-                f"📊 Resumen:\n"
-                f"  • Productos actualizados: {actualizados}\n"
-                f"  • Productos insertados: {insertados}\n"
-                f"  • Errores: {errores}\n"
-                f"  • Total procesado: {actualizados + insertados}"
-            )
+    LOTE_IMPORTACION = 5000     # filas por lote leído/escrito (punto de control para cancelar)
 
-            logging.info(f"Resumen actualización Excel: {actualizados} actualizados, {insertados} insertados, {errores} errores")
+    _COLUMNAS_TEMPORAL = ['codigo_barras', 'descripcion', 'proveedor', 'unidad', 'cantidad',
+                          'precio_compra', 'impuesto', 'bonificacion', 'grupo', 'subgrupo']
 
-            messagebox.showinfo("Actualización Completada", mensaje_resumen)
+    @staticmethod
+    def _preparar_tabla_temporal(cursor):
+        """Crea (o vacía) la tabla temporal de la importación en esta conexión"""
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS importacion_catalogo (
+                codigo_barras TEXT PRIMARY KEY,
+                descripcion   TEXT,
+                proveedor     TEXT,
+                unidad        TEXT,
+                cantidad      INTEGER,
+                precio_compra REAL,
+                impuesto      TEXT,
+                bonificacion  REAL,
+                grupo         TEXT,
+                subgrupo      TEXT
+            )
+        """)
+        cursor.execute("DELETE FROM temp.importacion_catalogo")
 
-            return (actualizados, insertados, errores)
+    @staticmethod
+    def _cargar_lote_temporal(cursor, df: pd.DataFrame) -> int:
+        """
+        Agrega un lote limpio a la tabla temporal con un solo executemany.
+        Un EAN repetido en un lote posterior se ignora (gana el primero).
+        Returns: filas agregadas
+        """
+        if df.empty:
+            return 0
+        columnas = InventarioController._COLUMNAS_TEMPORAL
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO temp.importacion_catalogo ({', '.join(columnas)}) "
+            f"VALUES ({', '.join('?' * len(columnas))})",
+            df[columnas].itertuples(index=False, name=None)
+        )
+        return max(cursor.rowcount, 0)
+
+    # Una fila existente cambió si difiere en algún campo que la importación escribe
+    _SQL_FILA_DISTINTA = (
+        "({p}.descripcion IS NOT {i}.descripcion "
+        "OR {p}.precio_compra IS NOT {i}.precio_compra)"
+    )
+
+    DIAS_REGISTRO_CAMBIOS = 180    # antigüedad máxima del registro cambios_catalogo
 
-        except FileNotFoundError:
-            logging.error(f"Archivo no encontrado: {archivo_path}")
-            messagebox.showerror("Error", f"Archivo no encontrado:\n{archivo_path}")
-            return (0, 0, 0)
+    @staticmethod
+    def _aplicar_tabla_temporal(cursor, origen: str = "") -> tuple:
+        """
+        Aplica la tabla temporal tocando solo las filas que cambiaron:
+        - Si EAN existe y difiere: actualizar solo descripcion y precio_compra
+        - Si EAN existe y es igual: no se escribe (ni WAL, ni caché, ni triggers)
+        - Si EAN NO existe: insertar con todos los campos
+          (precio_venta = precio_compra inicialmente)
+        Lo que cambió queda en cambios_catalogo (valor anterior y nuevo).
+        Returns: (actualizados, insertados, sin_cambios, códigos modificados)
+        """
+        from datetime import datetime, timedelta
+
+        ahora = datetime.now()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM cambios_catalogo")
+        ultimo_id = cursor.fetchone()[0]
+
+        # Registro de cambios (se calcula antes del upsert para tener el valor anterior)
+        distinta = InventarioController._SQL_FILA_DISTINTA.format(p="p", i="i")
+        cursor.execute(f"""
+            INSERT INTO cambios_catalogo
+                (fecha, origen, codigo_barras, tipo,
+                 descripcion_anterior, descripcion_nueva,
+                 precio_anterior, precio_nuevo)
+            SELECT ?, ?, i.codigo_barras,
+                   CASE WHEN p.id_producto IS NULL THEN 'insertado' ELSE 'actualizado' END,
+                   p.descripcion, i.descripcion, p.precio_compra, i.precio_compra
+            FROM temp.importacion_catalogo i
+            LEFT JOIN productos p ON p.codigo_barras = i.codigo_barras
+            WHERE p.id_producto IS NULL OR {distinta}
+        """, (ahora.strftime("%Y-%m-%d %H:%M:%S"), origen))
+
+        cursor.execute("""
+            SELECT tipo, COUNT(*) FROM cambios_catalogo WHERE id > ? GROUP BY tipo
+        """, (ultimo_id,))
+        por_tipo = dict(cursor.fetchall())
+        actualizados = por_tipo.get('actualizado', 0)
+        insertados = por_tipo.get('insertado', 0)
+
+        cursor.execute("SELECT COUNT(*) FROM temp.importacion_catalogo")
+        sin_cambios = cursor.fetchone()[0] - actualizados - insertados
+
+        cursor.execute("""
+            SELECT codigo_barras FROM cambios_catalogo
+            WHERE id > ? AND tipo = 'actualizado'
+        """, (ultimo_id,))
+        modificados = [row[0] for row in cursor.fetchall()]
+
+        if not (actualizados or insertados):
+            return (0, 0, sin_cambios, modificados)
+
+        cursor.execute(f"""
+            INSERT INTO productos
+                (codigo_barras, descripcion, proveedor, unidad, cantidad,
+                 precio_compra, precio_venta, impuesto, bonificacion,
+                 grupo, subgrupo)
+            SELECT codigo_barras, descripcion, proveedor, unidad, cantidad,
+                   precio_compra, precio_compra, impuesto, bonificacion,
+                   grupo, subgrupo
+            FROM temp.importacion_catalogo
+            WHERE true
+            ON CONFLICT(codigo_barras) DO UPDATE SET
+                descripcion   = excluded.descripcion,
+                precio_compra = excluded.precio_compra
+            WHERE {InventarioController._SQL_FILA_DISTINTA.format(p="productos", i="excluded")}
+        """)
+
+        # Mantener el registro acotado
+        limite = ahora - timedelta(days=InventarioController.DIAS_REGISTRO_CAMBIOS)
+        cursor.execute(
+            "DELETE FROM cambios_catalogo WHERE fecha < ?",
+            (limite.strftime("%Y-%m-%d"),)
+        )
+        return (actualizados, insertados, sin_cambios, modificados)
 
-        except Exception as e:
-            logging.error(f"Error al actualizar desde Excel: {e}", exc_info=True)
-            messagebox.showerror("Error", f"No se pudo procesar el archivo:\n\n{str(e)}")
-            return (0, 0, 0)
+    @staticmethod
+    def _regla_precio(texto: str, columna: str, base_margen: tuple = None) -> Optional[tuple]:
+        """
+        Traduce lo que escribió el usuario a una expresión SQL para SET.
+        - ''       → None (no se cambia la columna)
+        - '12500'  → precio fijo
+        - '+10%' / '-5%' / '10%' → ajuste porcentual sobre el valor actual
+        - base_margen=(sql, params) y texto '30' o '30%' → margen sobre esa
+          base: base × (1 + 30/100)
+        Lanza ValueError si el texto no es válido.
+        Returns: (expresión SQL, parámetros) o None
+        """
+        texto = texto.strip().replace(" ", "")
+        if not texto:
+            return None
+
+        if base_margen is not None or texto.endswith("%"):
+            try:
+                porcentaje = float(texto.rstrip("%").replace(",", "."))
+            except ValueError:
+                raise ValueError(f"Porcentaje inválido: '{texto}'")
+            if porcentaje <= -100:
+                raise ValueError(f"El porcentaje debe ser mayor que -100: '{texto}'")
+            base_sql, base_params = base_margen if base_margen is not None else (columna, [])
+            return (f"ROUND(({base_sql}) * (1 + ? / 100.0), 2)", [*base_params, porcentaje])
+
+        precio = validate_precio(texto)
+        if precio is None:
+            raise ValueError(f"Precio inválido: '{texto}'")
+        return ("?", [precio])
 
     @staticmethod
-    def buscar_y_reemplazar_precios(texto_busqueda: str, nuevo_precio_compra: str, nuevo_precio_venta: str) -> int:
+    def buscar_y_reemplazar_precios(texto_busqueda: str, nuevo_precio_compra: str,
+                                    nuevo_precio_venta: str, margen_venta: str = "") -> int:
         """
-        Busca productos y actualiza sus precios
+        Busca productos y actualiza sus precios con un solo UPDATE.
+        Cada precio acepta un valor fijo o un ajuste porcentual ('+10%', '-5%');
+        margen_venta ('30') fija precio_venta = precio_compra nuevo × (1 + 30 %).
         Returns: número de productos actualizados
         """
         if not texto_busqueda.strip():
             messagebox.showerror("Error", "Debe ingresar un texto de búsqueda")
             return 0
 
+        if nuevo_precio_venta.strip() and margen_venta.strip():
+            messagebox.showerror("Error", "Indique precio de venta o margen, no ambos")
+            return 0
+
+        # Validar una sola vez y armar las expresiones SET
+        try:
+            regla_compra = InventarioController._regla_precio(nuevo_precio_compra, "precio_compra")
+            if margen_venta.strip():
+                base = regla_compra or ("precio_compra", [])
+                regla_venta = InventarioController._regla_precio(
+                    margen_venta, "precio_venta", base_margen=base
+                )
+            else:
+                regla_venta = InventarioController._regla_precio(nuevo_precio_venta, "precio_venta")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return 0
+
+        asignaciones, params = [], []
+        for columna, regla in (("precio_compra", regla_compra), ("precio_venta", regla_venta)):
+            if regla:
+                asignaciones.append(f"{columna} = {regla[0]}")
+                params.extend(regla[1])
+
+        if not asignaciones:
+            messagebox.showerror("Error", "Debe ingresar al menos un precio (compra o venta)")
+            return 0
+
+        filtro = f"%{texto_busqueda.lower()}%"
+
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
 
                 # Buscar coincidencias
-                cursor.execute("""
-                    SELECT id_producto, descripcion, precio_compra, precio_venta
-                    FROM productos
-                    WHERE LOWER(descripcion) LIKE ?
-                """, (f"%{texto_busqueda.lower()}%",))
-
-                resultados = cursor.fetchall()
+                cursor.execute(
+                    "SELECT id_producto FROM productos WHERE LOWER(descripcion) LIKE ?",
+                    (filtro,)
+                )
+                ids = [row[0] for row in cursor.fetchall()]
 
-                if not resultados:
+                if not ids:
                     messagebox.showinfo("Sin resultados", "No se encontraron productos")
                     return 0
 
                 # Confirmar
                 confirmar = messagebox.askyesno(
                     "Confirmar",
-                    f"Se encontraron {len(resultados)} productos.\n¿Actualizar precios?"
+                    f"Se encontraron {len(ids)} productos.\n¿Actualizar precios?"
                 )
 
                 if not confirmar:
                     return 0
 
-                actualizados = 0
-
-                for row in resultados:
-                    id_prod = row[0]
-                    precio_c = row[2]
-                    precio_v = row[3]
-
-                    # Actualizar solo si se proporcionó nuevo valor
-                    if nuevo_precio_compra.strip():
-                        precio_c = validate_precio(nuevo_precio_compra) or precio_c
-
-                    if nuevo_precio_venta.strip():
-                        precio_v = validate_precio(nuevo_precio_venta) or precio_v
-
-                    cursor.execute("""
-                        UPDATE productos
-                        SET precio_compra = ?, precio_venta = ?
-                        WHERE id_producto = ?
-                    """, (precio_c, precio_v, id_prod))
-
-                    actualizados += 1
+                # Un solo UPDATE; las reglas se evalúan en SQLite
+                cursor.execute(
+                    f"UPDATE productos SET {', '.join(asignaciones)} "
+                    f"WHERE LOWER(descripcion) LIKE ?",
+                    (*params, filtro)
+                )
+                actualizados = cursor.rowcount
 
+                catalogo.invalidar(ids=ids)
+                publicar_al_confirmar(eventos.INVENTARIO, ids=ids)
                 return actualizados
 
         except Exception as e:
             logging.error(f"Error en búsqueda y reemplazo: {e}")
             messagebox.showerror("Error", f"Error al actualizar precios: {e}")
-            return 0
\ No newline at end of file
+            return 0
@@ -1,52 +1,82 @@
 """
 Controlador de lógica de pedidos
 ✅ MEJORADO: Integración con extractor SIP
+✅ NUEVO: Lectores de pedidos sin diálogos, con avance y cancelación
 """
 from tkinter import messagebox, filedialog
 from models.database import DatabaseManager, get_db_connection
 from datetime import datetime
 from fpdf import FPDF
+from utils.importaciones import Progreso, ErrorImportacion
+from utils.lector_excel import LectorExcel
 import pandas as pd
 import logging
 
 
+MENSAJE_SIN_PDFPLUMBER = (
+    "El extractor SIP requiere el módulo 'pdfplumber'.\n\n"
+    "Instale con:\n"
+    "pip install pdfplumber"
+)
+
+
+class PDFNoReconocido(ErrorImportacion):
+    """El PDF no parece una factura de SIP Asociados."""
+
+
 class PedidosController:
     """Maneja la lógica de negocio de pedidos"""
 
+    # Cada cuántas líneas se publica el avance y se revisa si se canceló
+    LOTE_PROGRESO = 200
+
     @staticmethod
     def cargar_pedido_desde_txt(archivo_path: str) -> list:
         """
         Carga productos desde archivo TXT
         Returns: lista de productos
         """
+        try:
+            return PedidosController.leer_pedido_txt(archivo_path)
+        except Exception as e:
+            logging.error(f"Error al cargar TXT: {e}")
+            messagebox.showerror("Error", f"No se pudo cargar el archivo:\n{e}")
+            return []
+
+    @staticmethod
+    def leer_pedido_txt(archivo_path: str, progreso: Progreso = None) -> list:
+        """
+        ✅ NUEVO: Lee un pedido TXT sin mostrar diálogos (apta para hilo trabajador)
+        Returns: lista de productos
+        """
+        progreso = progreso or Progreso()
         productos = []
 
-        try:
-            with open(archivo_path, "r", encoding="utf-8") as f:
-                for linea in f:
-                    partes = linea.strip().split("\t")
-                    if len(partes) < 5:
-                        continue
+        with open(archivo_path, "r", encoding="utf-8") as f:
+            for n, linea in enumerate(f, 1):
+                if n % PedidosController.LOTE_PROGRESO == 0:
+                    progreso.verificar()
+                    progreso.reportar(leidas=n)
 
-                    _, _, descripcion, cantidad, codigo_barras = partes
+                partes = linea.strip().split("\t")
+                if len(partes) < 5:
+                    continue
 
-                    # Buscar precio
-                    producto = DatabaseManager.buscar_producto_por_codigo(codigo_barras)
-                    precio_compra = producto['precio_compra'] if producto else 0.0
+                _, _, descripcion, cantidad, codigo_barras = partes
 
-                    productos.append({
-                        'codigo': codigo_barras,
-                        'descripcion': descripcion,
-                        'cantidad': cantidad,
-                        'precio_compra': precio_compra
-                    })
+                # Buscar precio
+                producto = DatabaseManager.buscar_producto_por_codigo(codigo_barras)
+                precio_compra = producto['precio_compra'] if producto else 0.0
 
-            return productos
+                productos.append({
+                    'codigo': codigo_barras,
+                    'descripcion': descripcion,
+                    'cantidad': cantidad,
+                    'precio_compra': precio_compra
+                })
 
-        except Exception as e:
-            logging.error(f"Error al cargar TXT: {e}")
-            messagebox.showerror("Error", f"No se pudo cargar el archivo:\n{e}")
-            return []
+        progreso.reportar(leidas=len(productos))
+        return productos
 
     @staticmethod
     def cargar_pedido_desde_excel(archivo_path: str) -> list:
@@ -54,45 +84,63 @@ class PedidosController:
         Carga productos desde archivo Excel
         Returns: lista de productos
         """
-        productos = []
-
         try:
-            df = pd.read_excel(archivo_path)
-
-            if "Cantidad" not in df.columns or "Código de Barras" not in df.columns:
-                messagebox.showerror("Error", "El archivo debe contener 'Cantidad' y 'Código de Barras'")
-                return []
-
-            for _, fila in df.iterrows():
-                codigo = str(fila["Código de Barras"]).strip()
-                cantidad = int(fila["Cantidad"])
-
-                # Buscar en BD
-                producto = DatabaseManager.buscar_producto_por_codigo(codigo)
-
-                if producto:
-                    productos.append({
-                        'codigo': codigo,
-                        'descripcion': producto['descripcion'],
-                        'cantidad': cantidad,
-                        'precio_compra': producto['precio_compra']
-                    })
-                else:
-                    # Producto no encontrado - agregarlo sin descripción
-                    productos.append({
-                        'codigo': codigo,
-                        'descripcion': f"Producto {codigo}",
-                        'cantidad': cantidad,
-                        'precio_compra': 0.0
-                    })
-
-            return productos
-
+            return PedidosController.leer_pedido_excel(archivo_path)
+        except ErrorImportacion as e:
+            messagebox.showerror(e.titulo, e.mensaje)
+            return []
         except Exception as e:
             logging.error(f"Error al cargar Excel: {e}")
             messagebox.showerror("Error", f"No se pudo procesar el archivo:\n{e}")
             return []
 
+    @staticmethod
+    def leer_pedido_excel(archivo_path: str, progreso: Progreso = None) -> list:
+        """
+        ✅ NUEVO: Lee un pedido Excel sin mostrar diálogos (apta para hilo trabajador)
+        Returns: lista de productos
+        """
+        progreso = progreso or Progreso()
+        progreso.reportar("Leyendo archivo Excel...")
+        productos = []
+
+        # .xlsx se lee por lotes en modo read_only (memoria acotada)
+        with LectorExcel(archivo_path) as lector:
+            if "Cantidad" not in lector.columnas or "Código de Barras" not in lector.columnas:
+                raise ErrorImportacion("Error", "El archivo debe contener 'Cantidad' y 'Código de Barras'")
+
+            progreso.reportar("Buscando productos...", total=lector.total)
+
+            for df in lector.lotes():
+                progreso.verificar()
+
+                for codigo, cantidad in zip(df["Código de Barras"], df["Cantidad"]):
+                    codigo = str(codigo).strip()
+                    cantidad = int(float(cantidad))
+
+                    # Buscar en BD
+                    producto = DatabaseManager.buscar_producto_por_codigo(codigo)
+
+                    if producto:
+                        productos.append({
+                            'codigo': codigo,
+                            'descripcion': producto['descripcion'],
+                            'cantidad': cantidad,
+                            'precio_compra': producto['precio_compra']
+                        })
+                    else:
+                        # Producto no encontrado - agregarlo sin descripción
+                        productos.append({
+                            'codigo': codigo,
+                            'descripcion': f"Producto {codigo}",
+                            'cantidad': cantidad,
+                            'precio_compra': 0.0
+                        })
+
+                progreso.reportar(leidas=len(productos))
+
+        return productos
+
     @staticmethod
     def cargar_pedido_desde_sip_pdf(archivo_path: str) -> list:
         """
@@ -104,14 +152,10 @@ class PedidosController:
         Returns:
             Lista de productos extraídos con descripción desde BD
         """
-        productos = []
-
         try:
-            # Importar extractor
-            from utils.sip_extractor import SIPExtractor
-
-            # Validar que sea un PDF SIP
-            if not SIPExtractor.validar_pdf_sip(archivo_path):
+            try:
+                productos, encontrados, no_encontrados = PedidosController.leer_pedido_sip_pdf(archivo_path)
+            except PDFNoReconocido:
                 respuesta = messagebox.askyesno(
                     "Validación de PDF",
                     "El archivo no parece ser una factura de SIP Asociados.\n\n"
@@ -119,81 +163,119 @@ class PedidosController:
                 )
                 if not respuesta:
                     return []
-
-            # Extraer datos
-            datos_extraidos = SIPExtractor.extraer_desde_pdf(archivo_path)
-
-            if not datos_extraidos:
-                messagebox.showwarning(
-                    "Sin Datos",
-                    "No se encontraron productos en el PDF.\n\n"
-                    "Asegúrese de que:\n"
-                    "• El PDF sea una factura de SIP Asociados\n"
-                    "• Contenga una tabla con productos\n"
-                    "• No sea un PDF escaneado"
+                productos, encontrados, no_encontrados = PedidosController.leer_pedido_sip_pdf(
+                    archivo_path, validar=False
                 )
-                return []
-
-            # Mostrar reporte de extracción
-            from utils.sip_extractor import SIPExtractor
-            reporte = SIPExtractor.generar_reporte_extraccion(datos_extraidos)
-            logging.info(f"Extracción SIP:\n{reporte}")
-
-            # Buscar productos en BD
-            encontrados = 0
-            no_encontrados = 0
-
-            for item in datos_extraidos:
-                codigo = item['Código de Barras']
-                cantidad = int(item['Cantidad'])
-
-                # Buscar en inventario
-                producto = DatabaseManager.buscar_producto_por_codigo(codigo)
-
-                if producto:
-                    productos.append({
-                        'codigo': codigo,
-                        'descripcion': producto['descripcion'],
-                        'cantidad': cantidad,
-                        'precio_compra': producto['precio_compra']
-                    })
-                    encontrados += 1
-                else:
-                    # Producto no en inventario
-                    productos.append({
-                        'codigo': codigo,
-                        'descripcion': f"⚠️ Nuevo: {codigo}",
-                        'cantidad': cantidad,
-                        'precio_compra': 0.0
-                    })
-                    no_encontrados += 1
-
-            # Mensaje informativo
-            mensaje = f"✅ Extracción completada\n\n"
-            mensaje += f"Total productos: {len(productos)}\n"
-            mensaje += f"En inventario: {encontrados}\n"
-            mensaje += f"Nuevos/No encontrados: {no_encontrados}\n\n"
-
-            if no_encontrados > 0:
-                mensaje += "⚠️ Los productos nuevos tienen precio $0 y se marcan con ⚠️"
-
-            messagebox.showinfo("Extracción SIP Completada", mensaje)
 
+            messagebox.showinfo(
+                "Extracción SIP Completada",
+                PedidosController.resumen_extraccion_sip(productos, encontrados, no_encontrados)
+            )
             return productos
 
+        except ErrorImportacion as e:
+            messagebox.showwarning(e.titulo, e.mensaje)
+            return []
         except ImportError:
-            messagebox.showerror(
-                "Módulo No Disponible",
-                "El extractor SIP requiere el módulo 'pdfplumber'.\n\n"
-                "Instale con:\n"
-                "pip install pdfplumber"
-            )
+            messagebox.showerror("Módulo No Disponible", MENSAJE_SIN_PDFPLUMBER)
             return []
         except Exception as e:
             logging.error(f"Error al procesar PDF SIP: {e}", exc_info=True)
             messagebox.showerror("Error", f"No se pudo procesar el PDF:\n{e}")
             return []
 
+    @staticmethod
+    def leer_pedido_sip_pdf(archivo_path: str, progreso: Progreso = None, validar: bool = True) -> tuple:
+        """
+        ✅ NUEVO: Extrae un pedido de una factura SIP sin mostrar diálogos
+        (apta para hilo trabajador).
+
+        Lanza PDFNoReconocido si validar=True y el PDF no parece de SIP
+        (el llamador pregunta al usuario y reintenta con validar=False).
+        Returns: (productos, encontrados, no_encontrados)
+        """
+        progreso = progreso or Progreso()
+        productos = []
+
+        # Importar extractor
+        from utils.sip_extractor import SIPExtractor
+
+        # Validar que sea un PDF SIP
+        if validar:
+            progreso.reportar("Validando PDF...")
+            if not SIPExtractor.validar_pdf_sip(archivo_path):
+                raise PDFNoReconocido(
+                    "Validación de PDF",
+                    "El archivo no parece ser una factura de SIP Asociados."
+                )
+
+        # Extraer datos
+        datos_extraidos = SIPExtractor.extraer_desde_pdf(archivo_path, progreso)
+
+        if not datos_extraidos:
+            raise ErrorImportacion(
+                "Sin Datos",
+                "No se encontraron productos en el PDF.\n\n"
+                "Asegúrese de que:\n"
+                "• El PDF sea una factura de SIP Asociados\n"
+                "• Contenga una tabla con productos\n"
+                "• No sea un PDF escaneado"
+            )
+
+        # Mostrar reporte de extracción
+        reporte = SIPExtractor.generar_reporte_extraccion(datos_extraidos)
+        logging.info(f"Extracción SIP:\n{reporte}")
+
+        progreso.reportar("Buscando productos...", total=len(datos_extraidos))
+
+        # Buscar productos en BD
+        encontrados = 0
+        no_encontrados = 0
+
+        for n, item in enumerate(datos_extraidos, 1):
+            codigo = item['Código de Barras']
+            cantidad = int(item['Cantidad'])
+
+            # Buscar en inventario
+            producto = DatabaseManager.buscar_producto_por_codigo(codigo)
+
+            if producto:
+                productos.append({
+                    'codigo': codigo,
+                    'descripcion': producto['descripcion'],
+                    'cantidad': cantidad,
+                    'precio_compra': producto['precio_compra']
+                })
+                encontrados += 1
+            else:
+                # Producto no en inventario
+                productos.append({
+                    'codigo': codigo,
+                    'descripcion': f"⚠️ Nuevo: {codigo}",
+                    'cantidad': cantidad,
+                    'precio_compra': 0.0
+                })
+                no_encontrados += 1
+
+            if n % PedidosController.LOTE_PROGRESO == 0:
+                progreso.verificar()
+                progreso.reportar(leidas=n)
+
+        progreso.reportar(leidas=len(datos_extraidos))
+        return (productos, encontrados, no_encontrados)
+
+    @staticmethod
+    def resumen_extraccion_sip(productos: list, encontrados: int, no_encontrados: int) -> str:
+        """Mensaje informativo al terminar una extracción SIP"""
+        mensaje = f"✅ Extracción completada\n\n"
+        mensaje += f"Total productos: {len(productos)}\n"
+        mensaje += f"En inventario: {encontrados}\n"
+        mensaje += f"Nuevos/No encontrados: {no_encontrados}\n\n"
+
+        if no_encontrados > 0:
+            mensaje += "⚠️ Los productos nuevos tienen precio $0 y se marcan con ⚠️"
+        return mensaje
+
     @staticmethod
     def exportar_pedido_pdf(productos: list, ruta_salida: str = None) -> bool:
         """Exporta pedido a PDF"""
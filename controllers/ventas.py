@@ -2,11 +2,19 @@
 Controlador de lógica de ventas
 ✅ MEJORADO: Validación de stock bloqueante + Registro completo de ventas
 ✅ NUEVO: Soporte para cantidades decimales (fraccionamiento de productos CJ)
+✅ NUEVO: Cada venta escribe sus líneas en venta_items (consultas por producto en SQL)
+✅ NUEVO: Costo y utilidad de un período calculados en una sola consulta
+✅ NUEVO: Cada venta se suma a resumen_ventas_diario y ventas_por_producto
+   (misma transacción)
+✅ NUEVO: Series de ventas por día / semana / mes (ventas_por_periodo)
 """
 from tkinter import messagebox
-from models.database import DatabaseManager, get_db_connection
+from models.database import (DatabaseManager, get_db_connection, costo_real,
+                             SQL_COSTO_LINEA, catalogo, publicar_al_confirmar)
+from utils import eventos
 from utils.validators import validate_codigo_barras
-from datetime import datetime
+from utils.formatters import rango_fechas_sql
+from datetime import date, datetime, timedelta
 import json
 import logging
 
@@ -26,6 +34,26 @@ def _parse_cantidad(valor_str) -> float | None:
         return None
 
 
+def _leer_stock(cursor, codigos: list, lote: int = 500) -> dict:
+    """
+    Lee stock y datos de costo de varios productos con `IN (...)`.
+    Retorna {codigo: (cantidad, precio_compra, impuesto)}.
+    Se consulta por lotes para no superar el límite de parámetros de SQLite.
+    """
+    stock = {}
+    for i in range(0, len(codigos), lote):
+        parte = codigos[i:i + lote]
+        marcas = ",".join("?" * len(parte))
+        cursor.execute(
+            f"SELECT codigo_barras, cantidad, precio_compra, impuesto "
+            f"FROM productos WHERE codigo_barras IN ({marcas})",
+            parte
+        )
+        for cod, cantidad, precio_compra, impuesto in cursor.fetchall():
+            stock[cod] = (float(cantidad or 0), precio_compra, impuesto)
+    return stock
+
+
 class VentasController:
     """Maneja la lógica de negocio de ventas"""
 
@@ -103,6 +131,9 @@ class VentasController:
         ✅ NUEVO: Soporta cantidades decimales para fracciones de CJ.
         ✅ SERVICIOS: Códigos SVC-* no afectan inventario (sin stock check).
         ✅ KITS: Los componentes se validan y descuentan aquí (no en kit_window).
+        ✅ RENDIMIENTO: Las cantidades se agrupan por código (líneas repetidas
+           y componentes de kit) y se validan con una consulta y se descuentan
+           con un executemany, dentro de una transacción BEGIN IMMEDIATE.
         """
         items = tree.get_children()
 
@@ -110,204 +141,173 @@ class VentasController:
             messagebox.showwarning("Advertencia", "No hay productos en la venta")
             return False
 
+        # ── Fase 1: Leer y validar todos los items del treeview ──────────
+        # (sin tocar la BD: solo se arma la venta y lo requerido por código)
+        total = 0.0
+        productos_venta = []
+        requeridos   = {}       # codigo → cantidad total a descontar
+        descripciones = {}      # codigo → descripción para mensajes
+        de_kit       = set()    # códigos que vienen de componentes de kit
+
+        for item in items:
+            valores = tree.item(item, "values")
+            codigo  = valores[0]
+            es_kit  = str(codigo) == "KIT"
+            es_svc  = str(codigo).startswith("SVC-")
+
+            if es_kit:
+                kit_data_str = valores[6] if len(valores) > 6 else ""
+                if not kit_data_str:
+                    messagebox.showerror(
+                        "Error de Kit",
+                        "El kit no tiene datos de componentes.\n"
+                        "Elimine el kit y vuelva a armarlo."
+                    )
+                    return False
+
+                try:
+                    componentes = json.loads(kit_data_str)
+                except Exception:
+                    messagebox.showerror(
+                        "Error de Kit",
+                        "Los datos del kit están corruptos.\n"
+                        "Elimine el kit y vuelva a armarlo."
+                    )
+                    return False
+
+                for comp in componentes:
+                    cod_comp = str(comp["codigo"])
+                    requeridos[cod_comp] = requeridos.get(cod_comp, 0.0) + float(comp["descuento_cajas"])
+                    descripciones.setdefault(cod_comp, comp.get("descripcion", cod_comp))
+                    de_kit.add(cod_comp)
+
+                subtotal   = float(valores[4])
+                total     += subtotal
+                # Costo base = suma de costo_prop de cada componente
+                # Esto permite al reporte calcular la utilidad real del kit
+                costo_base = sum(float(c.get('costo_prop', 0)) for c in componentes)
+                utilidad   = subtotal - costo_base
+                pct_util   = (utilidad / subtotal * 100) if subtotal > 0 else 0.0
+                productos_venta.append({
+                    'codigo':          'KIT',
+                    'descripcion':     valores[1],
+                    'cantidad':        1,
+                    'precio_unitario': float(valores[3]),
+                    'precio_compra':   round(costo_base, 2),
+                    'costo_base':      round(costo_base, 2),
+                    'subtotal':        subtotal,
+                    'utilidad':        round(utilidad, 2),
+                    'utilidad_pct':    round(pct_util, 2),
+                    'impuesto':        'KIT',
+                    'es_kit':          True,
+                    'componentes':     componentes,
+                })
+
+            elif es_svc:
+                subtotal = float(valores[4])
+                total   += subtotal
+                productos_venta.append({
+                    'codigo':          codigo,
+                    'descripcion':     valores[1],
+                    'cantidad':        _parse_cantidad(valores[2]) or 1,
+                    'precio_unitario': float(valores[3]),
+                    'subtotal':        subtotal,
+                    'impuesto':        valores[5] if len(valores) > 5 else '',
+                    'es_kit':          False,
+                    'costo_unitario':  0.0,
+                })
+
+            else:
+                # ── Producto normal ───────────────────────────────────────
+                cantidad_vendida = _parse_cantidad(valores[2])
+                if cantidad_vendida is None:
+                    messagebox.showerror(
+                        "Error de datos",
+                        f"Cantidad inválida para el producto {codigo}"
+                    )
+                    return False
+
+                cod = str(codigo)
+                requeridos[cod] = requeridos.get(cod, 0.0) + cantidad_vendida
+                descripciones.setdefault(cod, valores[1])
+
+                subtotal = float(valores[4])
+                total   += subtotal
+                productos_venta.append({
+                    'codigo':          codigo,
+                    'descripcion':     valores[1],
+                    'cantidad':        cantidad_vendida,
+                    'precio_unitario': float(valores[3]),
+                    'subtotal':        subtotal,
+                    'impuesto':        valores[5] if len(valores) > 5 else '',
+                    'es_kit':          False,
+                })
+
+        faltante = None
         try:
             with get_db_connection() as conn:
+                # Reservar la escritura desde el inicio: el stock leído no
+                # puede cambiar entre la validación y el descuento.
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
                 cursor = conn.cursor()
 
-                # ── Fase 1: Leer y validar todos los items del treeview ──────
-                total = 0.0
-                productos_venta = []
-
-                for item in items:
-                    valores = tree.item(item, "values")
-                    codigo  = valores[0]
-                    es_kit  = str(codigo) == "KIT"
-                    es_svc  = str(codigo).startswith("SVC-")
-
-                    if es_kit:
-                        # ── Validar stock de cada componente del kit ─────────
-                        kit_data_str = valores[6] if len(valores) > 6 else ""
-                        if not kit_data_str:
-                            messagebox.showerror(
-                                "Error de Kit",
-                                "El kit no tiene datos de componentes.\n"
-                                "Elimine el kit y vuelva a armarlo."
-                            )
-                            return False
-
-                        try:
-                            componentes = json.loads(kit_data_str)
-                        except Exception:
-                            messagebox.showerror(
-                                "Error de Kit",
-                                "Los datos del kit están corruptos.\n"
-                                "Elimine el kit y vuelva a armarlo."
-                            )
-                            return False
-
-                        for comp in componentes:
-                            cod_comp  = comp["codigo"]
-                            desc_comp = comp.get("descripcion", cod_comp)
-                            req       = float(comp["descuento_cajas"])
-                            cursor.execute(
-                                "SELECT cantidad FROM productos WHERE codigo_barras = ?",
-                                (cod_comp,)
-                            )
-                            row = cursor.fetchone()
-                            stock_actual = float(row[0]) if row else 0.0
-                            if not row or stock_actual < req:
-                                messagebox.showerror(
-                                    "Stock Insuficiente — Componente de Kit",
-                                    f"❌ No hay stock suficiente para armar el kit.\n\n"
-                                    f"Componente: {desc_comp}\n"
-                                    f"Stock disponible: {stock_actual:.4f}\n"
-                                    f"Cantidad requerida: {req:.6f}\n\n"
-                                    "La venta ha sido CANCELADA."
-                                )
-                                return False
-
-                        subtotal   = float(valores[4])
-                        total     += subtotal
-                        # Costo base = suma de costo_prop de cada componente
-                        # Esto permite al reporte calcular la utilidad real del kit
-                        costo_base = sum(float(c.get('costo_prop', 0)) for c in componentes)
-                        utilidad   = subtotal - costo_base
-                        pct_util   = (utilidad / subtotal * 100) if subtotal > 0 else 0.0
-                        productos_venta.append({
-                            'codigo':          'KIT',
-                            'descripcion':     valores[1],
-                            'cantidad':        1,
-                            'precio_unitario': float(valores[3]),
-                            'precio_compra':   round(costo_base, 2),
-                            'costo_base':      round(costo_base, 2),
-                            'subtotal':        subtotal,
-                            'utilidad':        round(utilidad, 2),
-                            'utilidad_pct':    round(pct_util, 2),
-                            'impuesto':        'KIT',
-                            'es_kit':          True,
-                            'componentes':     componentes,
-                        })
-
-                    elif es_svc:
-                        subtotal = float(valores[4])
-                        total   += subtotal
-                        productos_venta.append({
-                            'codigo':          codigo,
-                            'descripcion':     valores[1],
-                            'cantidad':        _parse_cantidad(valores[2]) or 1,
-                            'precio_unitario': float(valores[3]),
-                            'subtotal':        subtotal,
-                            'impuesto':        valores[5] if len(valores) > 5 else '',
-                            'es_kit':          False,
-                        })
-
-                    else:
-                        # ── Producto normal ───────────────────────────────────
-                        cantidad_vendida = _parse_cantidad(valores[2])
-                        if cantidad_vendida is None:
-                            messagebox.showerror(
-                                "Error de datos",
-                                f"Cantidad inválida para el producto {codigo}"
-                            )
-                            return False
-
-                        cursor.execute(
-                            "SELECT cantidad FROM productos WHERE codigo_barras = ?",
-                            (codigo,)
-                        )
-                        row = cursor.fetchone()
-                        if not row or float(row[0]) < cantidad_vendida:
-                            stock_actual = float(row[0]) if row else 0
-                            messagebox.showerror(
-                                "Error de Stock",
-                                f"❌ Stock insuficiente para {codigo}\n\n"
-                                f"Stock actual: {stock_actual:.3f}\n"
-                                f"Cantidad requerida: {cantidad_vendida:.3f}\n\n"
-                                "La venta ha sido CANCELADA."
-                            )
-                            return False
-
-                        subtotal = float(valores[4])
-                        total   += subtotal
-                        productos_venta.append({
-                            'codigo':          codigo,
-                            'descripcion':     valores[1],
-                            'cantidad':        cantidad_vendida,
-                            'precio_unitario': float(valores[3]),
-                            'subtotal':        subtotal,
-                            'impuesto':        valores[5] if len(valores) > 5 else '',
-                            'es_kit':          False,
-                        })
-
-                # ── Fase 2: Registrar venta en tabla ventas ──────────────────
-                productos_json = json.dumps(productos_venta, ensure_ascii=False)
-                fecha_actual   = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                # Guardar método de pago
-                logging.info(f"Registrando venta con método de pago: '{metodo_pago}'")
-                cursor.execute("""
-                    INSERT INTO ventas (fecha, total, productos, cajero, metodo_pago)
-                    VALUES (?, ?, ?, 'Principal', ?)
-                """, (fecha_actual, total, productos_json, metodo_pago))
-
-                venta_id = cursor.lastrowid
-                logging.info(f"Venta registrada - ID: {venta_id}, Total: ${total:,.2f}, Pago: {metodo_pago}")
-
-                # ── Fase 3: Descontar inventario ─────────────────────────────
-                productos_actualizados = 0
-
-                for producto in productos_venta:
-                    if producto.get('es_kit'):
-                        # Descontar cada componente del kit
-                        for comp in producto.get('componentes', []):
-                            cod_comp = comp["codigo"]
-                            req      = float(comp["descuento_cajas"])
-                            cursor.execute("""
-                                UPDATE productos
-                                SET cantidad = ROUND(cantidad - ?, 8)
-                                WHERE codigo_barras = ? AND cantidad >= ?
-                            """, (req, cod_comp, req))
-                            if cursor.rowcount == 0:
-                                raise Exception(
-                                    f"Error al descontar componente de kit: "
-                                    f"{comp.get('descripcion', cod_comp)} — "
-                                    f"posible venta concurrente"
-                                )
-                            productos_actualizados += 1
-                            logging.info(
-                                f"Componente de kit descontado: "
-                                f"{cod_comp} -{req:.6f}"
-                            )
-
-                    elif not str(producto['codigo']).startswith("SVC-"):
-                        # Producto normal
-                        cursor.execute("""
-                            UPDATE productos 
-                            SET cantidad = cantidad - ? 
+                # ── Fase 2: Validar stock con una sola consulta ──────────────
+                stock = _leer_stock(cursor, list(requeridos))
+                for cod, req in requeridos.items():
+                    disponible = stock[cod][0] if cod in stock else None
+                    if disponible is None or disponible < req:
+                        faltante = (cod, req, disponible or 0.0)
+                        break
+
+                if faltante is None:
+                    # Costo congelado: el reporte no depende del precio actual
+                    for producto in productos_venta:
+                        if 'costo_unitario' not in producto and not producto['es_kit']:
+                            _, precio_compra, impuesto = stock[str(producto['codigo'])]
+                            producto['costo_unitario'] = round(costo_real(precio_compra, impuesto), 4)
+
+                    # ── Fase 3: Registrar venta en tabla ventas ──────────────
+                    productos_json = json.dumps(productos_venta, ensure_ascii=False)
+                    fecha_actual   = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+                    # Guardar método de pago
+                    logging.info(f"Registrando venta con método de pago: '{metodo_pago}'")
+                    cursor.execute("""
+                        INSERT INTO ventas (fecha, total, productos, cajero, metodo_pago)
+                        VALUES (?, ?, ?, 'Principal', ?)
+                    """, (fecha_actual, total, productos_json, metodo_pago))
+
+                    venta_id = cursor.lastrowid
+                    logging.info(f"Venta registrada - ID: {venta_id}, Total: ${total:,.2f}, Pago: {metodo_pago}")
+
+                    # Líneas normalizadas en venta_items (misma transacción)
+                    DatabaseManager.insertar_items_venta(cursor, venta_id, productos_venta)
+                    DatabaseManager.acumular_venta_en_resumen(cursor, venta_id)
+                    DatabaseManager.acumular_ventas_por_producto(cursor, venta_id)
+
+                    # ── Fase 4: Descontar inventario (un solo executemany) ───
+                    if requeridos:
+                        cursor.executemany("""
+                            UPDATE productos
+                            SET cantidad = ROUND(cantidad - ?, 8)
                             WHERE codigo_barras = ? AND cantidad >= ?
-                        """, (
-                            producto['cantidad'],
-                            producto['codigo'],
-                            producto['cantidad']
-                        ))
-                        if cursor.rowcount == 0:
+                        """, [(req, cod, req) for cod, req in requeridos.items()])
+                        if cursor.rowcount != len(requeridos):
                             raise Exception(
-                                f"Error al actualizar stock de {producto['codigo']} — "
-                                f"posible venta concurrente"
+                                "Error al descontar inventario — posible venta concurrente"
                             )
-                        productos_actualizados += 1
-                    else:
-                        logging.info(
-                            f"Servicio registrado (sin stock): {producto['codigo']}"
-                        )
-
-                logging.info(
-                    f"Venta completada - ID: {venta_id}, "
-                    f"Movimientos de inventario: {productos_actualizados}, "
-                    f"Total: ${total:,.2f}"
-                )
+                        catalogo.invalidar(codigos=list(requeridos))
 
-                return True
+                    # El dashboard se entera al confirmar la transacción
+                    publicar_al_confirmar(eventos.VENTAS, id_venta=venta_id,
+                                          codigos=list(requeridos))
+
+                    logging.info(
+                        f"Venta completada - ID: {venta_id}, "
+                        f"Movimientos de inventario: {len(requeridos)}, "
+                        f"Total: ${total:,.2f}"
+                    )
 
         except Exception as e:
             logging.error(f"Error al registrar venta: {e}", exc_info=True)
@@ -319,6 +319,29 @@ class VentasController:
             )
             return False
 
+        if faltante is not None:
+            cod, req, disponible = faltante
+            if cod in de_kit:
+                messagebox.showerror(
+                    "Stock Insuficiente — Componente de Kit",
+                    f"❌ No hay stock suficiente para armar el kit.\n\n"
+                    f"Componente: {descripciones.get(cod, cod)}\n"
+                    f"Stock disponible: {disponible:.4f}\n"
+                    f"Cantidad requerida: {req:.6f}\n\n"
+                    "La venta ha sido CANCELADA."
+                )
+            else:
+                messagebox.showerror(
+                    "Error de Stock",
+                    f"❌ Stock insuficiente para {cod}\n\n"
+                    f"Stock actual: {disponible:.3f}\n"
+                    f"Cantidad requerida: {req:.3f}\n\n"
+                    "La venta ha sido CANCELADA."
+                )
+            return False
+
+        return True
+
     @staticmethod
     def obtener_historial_ventas(limite: int = 50):
         """Obtiene el historial de ventas"""
@@ -357,6 +380,296 @@ class VentasController:
             logging.error(f"Error al obtener historial: {e}")
             return []
 
+    @staticmethod
+    def obtener_ventas_rango(desde, hasta, metodo: str | None = None,
+                             cajero: str | None = None, lote: int = 500):
+        """
+        Genera las ventas entre dos días (inclusive), más recientes primero.
+
+        El rango se filtra en SQL sobre idx_ventas_fecha y se lee por lotes
+        con paginación por clave (fecha, id_venta), sin límite artificial de
+        registros. Cada lote se consulta y se cierra el bloque de conexión
+        antes de entregar sus filas: si quien itera se detiene a mitad, no
+        queda una transacción abierta en el hilo. El JSON de
+        productos NO se decodifica aquí: cada venta trae 'n_productos' y las
+        líneas se cargan bajo demanda con productos_de_venta().
+        """
+        inicio, fin = rango_fechas_sql(desde, hasta)
+        sql = """
+            SELECT v.id_venta, v.fecha, v.total, v.cajero,
+                   COALESCE(v.metodo_pago, 'Efectivo') AS metodo_pago,
+                   (SELECT COUNT(*) FROM venta_items vi
+                     WHERE vi.id_venta = v.id_venta AND vi.id_padre IS NULL) AS n_productos
+            FROM ventas v
+            WHERE v.fecha >= ? AND v.fecha < ?
+        """
+        params = [inicio, fin]
+        if metodo:
+            sql += " AND COALESCE(v.metodo_pago, 'Efectivo') = ?"
+            params.append(metodo)
+        if cajero:
+            sql += " AND v.cajero = ?"
+            params.append(cajero)
+        siguiente = sql + """
+            AND v.fecha <= ? AND (v.fecha < ? OR v.id_venta < ?)
+        """
+        orden = " ORDER BY v.fecha DESC, v.id_venta DESC LIMIT ?"
+
+        try:
+            clave = None
+            while True:
+                with get_db_connection() as conn:
+                    if clave is None:
+                        filas = conn.execute(sql + orden, (*params, lote)).fetchall()
+                    else:
+                        filas = conn.execute(
+                            siguiente + orden, (*params, clave[0], clave[0], clave[1], lote)
+                        ).fetchall()
+                if not filas:
+                    break
+                for row in filas:
+                    yield {
+                        'id':          row['id_venta'],
+                        'fecha':       row['fecha'],
+                        'total':       float(row['total']),
+                        'cajero':      row['cajero'],
+                        'n_productos': row['n_productos'],
+                        'metodo_pago': row['metodo_pago'],
+                    }
+                if len(filas) < lote:
+                    break
+                clave = (filas[-1]['fecha'], filas[-1]['id_venta'])
+
+        except Exception as e:
+            logging.error(f"Error al obtener ventas del rango {desde} – {hasta}: {e}")
+
+    @staticmethod
+    def productos_de_venta(venta: dict) -> list:
+        """
+        Decodifica (una sola vez) el JSON de productos de una venta obtenida
+        con obtener_ventas_rango y lo deja en venta['productos'].
+        """
+        if 'productos' in venta:
+            return venta['productos']
+
+        productos = []
+        try:
+            with get_db_connection() as conn:
+                row = conn.execute(
+                    "SELECT productos FROM ventas WHERE id_venta = ?", (venta['id'],)
+                ).fetchone()
+            if row and row['productos']:
+                productos = json.loads(row['productos'])
+        except Exception as e:
+            logging.error(f"Error al leer productos de la venta {venta.get('id')}: {e}")
+
+        venta['productos'] = productos
+        return productos
+
+    @staticmethod
+    def resumen_costos_periodo(desde, hasta, metodo: str | None = None,
+                               cajero: str | None = None) -> dict:
+        """
+        Ventas, costo, ganancia y % de utilidad del período en una consulta.
+
+        Suma el costo congelado de cada línea (venta_items.costo_unitario);
+        solo las líneas antiguas sin costo se completan con productos, en el
+        mismo JOIN. Ver models.database.SQL_COSTO_LINEA.
+        """
+        inicio, fin = rango_fechas_sql(desde, hasta)
+        filtro = ""
+        params = [inicio, fin]
+        if metodo:
+            filtro += " AND COALESCE(metodo_pago, 'Efectivo') = ?"
+            params.append(metodo)
+        if cajero:
+            filtro += " AND cajero = ?"
+            params.append(cajero)
+
+        num, total, costo = 0, 0.0, 0.0
+        try:
+            with get_db_connection() as conn:
+                num, total, costo = conn.execute(f"""
+                    WITH periodo AS (
+                        SELECT id_venta, total FROM ventas
+                        WHERE fecha >= ? AND fecha < ?{filtro}
+                    ),
+                    costos AS (
+                        SELECT vi.id_venta, SUM({SQL_COSTO_LINEA}) AS costo
+                        FROM periodo
+                        JOIN venta_items vi
+                          ON vi.id_venta = periodo.id_venta AND vi.id_padre IS NULL
+                        LEFT JOIN productos p ON p.codigo_barras = vi.codigo_barras
+                        GROUP BY vi.id_venta
+                    )
+                    SELECT COUNT(*), COALESCE(SUM(periodo.total), 0),
+                           COALESCE(SUM(costos.costo), 0)
+                    FROM periodo LEFT JOIN costos USING (id_venta)
+                """, params).fetchone()
+
+        except Exception as e:
+            logging.error(f"Error al calcular costos del período: {e}")
+
+        total = float(total or 0)
+        costo = float(costo or 0)
+        ganancia = total - costo
+        return {
+            'num_ventas':   num or 0,
+            'total':        total,
+            'costo':        costo,
+            'ganancia':     ganancia,
+            'utilidad_pct': (ganancia / total * 100) if total > 0 else 0.0,
+        }
+
+    @staticmethod
+    def calcular_total_ventas_periodo(desde, hasta) -> dict:
+        """
+        Cantidad, total y promedio de las ventas entre dos días (inclusive).
+        Filtra por rango sobre ventas.fecha para aprovechar idx_ventas_fecha.
+        """
+        inicio, fin = rango_fechas_sql(desde, hasta)
+        try:
+            with get_db_connection() as conn:
+                num, total = conn.execute("""
+                    SELECT COUNT(*), COALESCE(SUM(total), 0)
+                    FROM ventas
+                    WHERE fecha >= ? AND fecha < ?
+                """, (inicio, fin)).fetchone()
+
+        except Exception as e:
+            logging.error(f"Error al calcular ventas del período: {e}")
+            num, total = 0, 0.0
+
+        return {
+            'num_ventas':     num or 0,
+            'total_ventas':   float(total or 0),
+            'promedio_venta': float(total) / num if num else 0.0,
+        }
+
+    # Inicio del período de cada día del resumen, por granularidad
+    _SQL_PERIODO = {
+        "dia":    "dia",
+        "semana": "date(dia, '-6 days', 'weekday 1')",     # lunes de esa semana
+        "mes":    "substr(dia, 1, 7) || '-01'",
+    }
+
+    @staticmethod
+    def _inicio_periodo(dia: date, granularidad: str) -> date:
+        if granularidad == "semana":
+            return dia - timedelta(days=dia.weekday())
+        if granularidad == "mes":
+            return dia.replace(day=1)
+        return dia
+
+    @staticmethod
+    def ventas_por_periodo(granularidad: str, desde, hasta) -> list:
+        """
+        Serie de ventas entre dos días (inclusive) agrupada por 'dia',
+        'semana' (lunes a domingo) o 'mes'.
+
+        Una sola consulta agrupada sobre resumen_ventas_diario (una fila por
+        día × método de pago); los períodos sin ventas se completan con cero.
+        Retorna [{'inicio': date, 'num_ventas', 'total', 'costo'}, ...]
+        en orden cronológico.
+        """
+        expr = VentasController._SQL_PERIODO.get(granularidad)
+        if expr is None:
+            raise ValueError(f"Granularidad no válida: {granularidad}")
+        inicio, fin = rango_fechas_sql(desde, hasta)
+        ultimo = datetime.strptime(fin, "%Y-%m-%d").date() - timedelta(days=1)
+
+        filas = {}
+        try:
+            with get_db_connection() as conn:
+                for row in conn.execute(f"""
+                    SELECT {expr} AS periodo, SUM(num_ventas), SUM(total), SUM(costo)
+                    FROM resumen_ventas_diario
+                    WHERE dia >= ? AND dia < ?
+                    GROUP BY periodo
+                """, (inicio, fin)):
+                    filas[row[0]] = (int(row[1] or 0), float(row[2] or 0), float(row[3] or 0))
+
+        except Exception as e:
+            logging.error(f"Error al calcular ventas por {granularidad}: {e}")
+
+        serie = []
+        actual = VentasController._inicio_periodo(
+            datetime.strptime(inicio, "%Y-%m-%d").date(), granularidad
+        )
+        while actual <= ultimo:
+            num, total, costo = filas.get(actual.isoformat(), (0, 0.0, 0.0))
+            serie.append({'inicio': actual, 'num_ventas': num, 'total': total, 'costo': costo})
+            if granularidad == "dia":
+                actual += timedelta(days=1)
+            elif granularidad == "semana":
+                actual += timedelta(days=7)
+            else:
+                actual = (actual.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return serie
+
+    @staticmethod
+    def balance_por_metodo(hoy: date | None = None) -> dict:
+        """
+        Totales por método de pago para Hoy / Mes / Año en una sola consulta.
+        Retorna {metodo: [total_hoy, total_mes, total_anio]}.
+
+        Solo recorre el año en curso mediante rangos sobre ventas.fecha
+        (usa idx_ventas_fecha en lugar de escanear toda la tabla).
+        """
+        hoy = hoy or date.today()
+        dia_ini, dia_fin   = rango_fechas_sql(hoy)
+        mes_ini, _         = rango_fechas_sql(hoy.replace(day=1))
+        anio_ini, _        = rango_fechas_sql(hoy.replace(month=1, day=1))
+        _, anio_fin        = rango_fechas_sql(hoy.replace(month=12, day=31))
+
+        balance = {}
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.execute("""
+                    SELECT
+                        COALESCE(metodo_pago, 'Efectivo') AS metodo,
+                        SUM(CASE WHEN fecha >= ? AND fecha < ? THEN total ELSE 0 END) AS hoy,
+                        SUM(CASE WHEN fecha >= ? THEN total ELSE 0 END)               AS mes,
+                        SUM(total)                                                     AS anio
+                    FROM ventas
+                    WHERE fecha >= ? AND fecha < ?
+                    GROUP BY COALESCE(metodo_pago, 'Efectivo')
+                """, (dia_ini, dia_fin, mes_ini, anio_ini, anio_fin))
+
+                for row in cursor.fetchall():
+                    balance[str(row['metodo'])] = [
+                        float(row['hoy'] or 0),
+                        float(row['mes'] or 0),
+                        float(row['anio'] or 0),
+                    ]
+
+        except Exception as e:
+            logging.error(f"Error al calcular balance por método: {e}")
+
+        return balance
+
+    @staticmethod
+    def obtener_items_venta(id_venta: int) -> list:
+        """
+        Obtiene las líneas de una venta desde venta_items.
+        Los componentes de kit traen id_padre = id de la línea KIT.
+        """
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id, id_padre, codigo_barras, descripcion, cantidad,
+                           precio_unitario, subtotal, costo_unitario, impuesto, es_kit
+                    FROM venta_items
+                    WHERE id_venta = ?
+                    ORDER BY id
+                """, (id_venta,))
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logging.error(f"Error al obtener líneas de venta {id_venta}: {e}")
+            return []
+
     @staticmethod
     def obtener_venta_por_id(id_venta: int):
         """Obtiene una venta específica por ID"""
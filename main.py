@@ -140,6 +140,13 @@ def main():
     from models.database import DatabaseManager
     DatabaseManager.inicializar_tablas()
 
+    # ✅ PASO 2.0 — Catálogo de productos en memoria (escaneos sin consulta)
+    try:
+        from models.database import catalogo
+        catalogo.cargar()
+    except Exception as e:
+        logging.warning(f"No se pudo precargar el catálogo de productos: {e}")
+
     # ✅ PASO 2.1 — Inicializar tabla de facturas por pagar
     try:
         from controllers.facturas import FacturasController
@@ -147,6 +154,13 @@ def main():
     except Exception as e:
         logging.warning(f"No se pudo inicializar tabla facturas_pago: {e}")
 
+    # ✅ PASO 2.2 — Verificación completa de backups (programada, en segundo plano)
+    try:
+        from utils.backup import verificar_backups_si_corresponde
+        verificar_backups_si_corresponde()
+    except Exception as e:
+        logging.warning(f"No se pudo programar la verificación de backups: {e}")
+
     verificar_estructura()
 
     # Inicializar sistema de diseño si existe
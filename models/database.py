@@ -1,13 +1,28 @@
 """
 Capa de acceso a datos con gestión segura de conexiones
 MEJORADO: Incluye sistema de backups automáticos antes de operaciones críticas
+✅ NUEVO: Pool de conexiones por hilo, configuradas una sola vez (WAL, caché, mmap)
+✅ NUEVO: Tabla venta_items con las líneas de cada venta (antes solo JSON)
+✅ NUEVO: Costo unitario congelado en cada línea de venta (venta_items.costo_unitario)
+✅ NUEVO: Índice de texto completo (FTS5) para las búsquedas de productos
+✅ NUEVO: Catálogo de productos en memoria (ProductCatalog) para búsquedas por código
+✅ NUEVO: Índices secundarios (fecha de ventas, proveedor, vencimiento, descripción, stock)
 ✅ NUEVO: Tabla facturas_pago para programación de pago de facturas
+✅ NUEVO: Tabla cambios_catalogo con lo que movió cada importación de Excel
+✅ NUEVO: Paginación por clave de productos (iter_productos / productos_por_paginas)
+✅ NUEVO: Tabla resumen_ventas_diario (día × método de pago) para el dashboard
+✅ NUEVO: Tabla ventas_por_producto (veces vendido, unidades, última venta)
+✅ NUEVO: publicar_al_confirmar(): eventos del bus (utils.eventos) que salen
+   solo cuando el bloque más externo confirma la transacción
 """
+import re
 import sqlite3
 import logging
+import threading
 from contextlib import contextmanager
 from typing import List, Optional, Tuple, Dict, Any
-from config.settings import DB_PATH
+from config.settings import DB_PATH, DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_BUSY_TIMEOUT
+from utils import eventos
 
 # Configurar logging
 import os
@@ -31,23 +46,492 @@ logging.basicConfig(
 )
 
 
+# ══════════════════════════════════════════════════════════════════════════════
+# COSTO REAL DE COMPRA (regla del 19 % IVA)
+# ══════════════════════════════════════════════════════════════════════════════
+
+# Misma regla en SQL, sobre las columnas impuesto de la fila actual (p.*)
+SQL_FACTOR_IVA = (
+    "(CASE WHEN LOWER(p.impuesto) LIKE '%19%' AND LOWER(p.impuesto) LIKE '%iva%' "
+    "THEN 1.19 ELSE 1 END)"
+)
+
+# Costo de una línea de venta (alias vi = venta_items, p = productos):
+#   - costo_unitario congelado al vender (KIT: suma de costo_prop)
+#   - SVC-*: sin mercancía, costo 0
+#   - líneas antiguas sin costo guardado: precio_compra actual con la
+#     regla del 19 % IVA (ver costo_real)
+SQL_COSTO_LINEA = f"""
+    CASE
+        WHEN vi.codigo_barras LIKE 'SVC-%' THEN 0
+        ELSE COALESCE(vi.costo_unitario, p.precio_compra * {SQL_FACTOR_IVA}, 0) * vi.cantidad
+    END
+"""
+
+
+def costo_real(precio_compra, impuesto) -> float:
+    """
+    Precio de compra con IVA incluido cuando el impuesto es 19 % IVA
+    ('19% IVA', '19%  IVA', ...): compra $10.000 → costo real $11.900.
+    """
+    precio = float(precio_compra or 0)
+    imp = str(impuesto or "").lower()
+    if "19" in imp and "iva" in imp:
+        precio *= 1.19
+    return precio
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# BÚSQUEDA DE TEXTO COMPLETO (productos_fts)
+# ══════════════════════════════════════════════════════════════════════════════
+
+_COLUMNAS_FTS = "descripcion, codigo_barras, proveedor, grupo, subgrupo"
+_NUEVOS_FTS = "new.descripcion, new.codigo_barras, new.proveedor, new.grupo, new.subgrupo"
+_VIEJOS_FTS = "old.descripcion, old.codigo_barras, old.proveedor, old.grupo, old.subgrupo"
+
+# Triggers que mantienen productos_fts igual a productos (contenido externo)
+_TRIGGERS_FTS = (
+    f"""CREATE TRIGGER IF NOT EXISTS trg_productos_fts_ins AFTER INSERT ON productos BEGIN
+            INSERT INTO productos_fts(rowid, {_COLUMNAS_FTS})
+            VALUES (new.id_producto, {_NUEVOS_FTS});
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_productos_fts_del AFTER DELETE ON productos BEGIN
+            INSERT INTO productos_fts(productos_fts, rowid, {_COLUMNAS_FTS})
+            VALUES ('delete', old.id_producto, {_VIEJOS_FTS});
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_productos_fts_upd
+        AFTER UPDATE OF {_COLUMNAS_FTS} ON productos BEGIN
+            INSERT INTO productos_fts(productos_fts, rowid, {_COLUMNAS_FTS})
+            VALUES ('delete', old.id_producto, {_VIEJOS_FTS});
+            INSERT INTO productos_fts(rowid, {_COLUMNAS_FTS})
+            VALUES (new.id_producto, {_NUEVOS_FTS});
+        END""",
+)
+
+
+def consulta_fts(texto: str) -> Optional[str]:
+    """
+    Convierte el texto del buscador en una consulta MATCH de FTS5: cada
+    palabra se busca como prefijo y todas deben aparecer ('acet 500' →
+    '"acet"* "500"*'). Retorna None si no hay palabras que buscar.
+    """
+    palabras = re.findall(r"\w+", str(texto or ""))
+    if not palabras:
+        return None
+    return " ".join(f'"{p}"*' for p in palabras)
+
+
+class _ConexionPool(sqlite3.Connection):
+    """
+    Conexión administrada por el pool.
+    close() no la cierra: la conexión pertenece al hilo y se reutiliza.
+    Solo ConnectionPool.cerrar_todas() la cierra realmente.
+    """
+
+    def close(self):
+        pass
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones SQLite: una conexión persistente por hilo y por archivo.
+
+    Cada conexión se configura UNA sola vez al abrirse (WAL, synchronous=NORMAL,
+    cache_size, mmap_size, temp_store=MEMORY), de modo que cada escaneo,
+    sugerencia o refresco del dashboard reutiliza caché de páginas caliente
+    en vez de pagar un connect() nuevo.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conexiones: Dict[Tuple[int, str], sqlite3.Connection] = {}
+        self._generacion = 0
+        self._abiertas = 0
+        self._reutilizadas = 0
+
+    def obtener(self, ruta) -> sqlite3.Connection:
+        """Retorna la conexión del hilo actual para `ruta` (la abre si no existe)."""
+        ruta = str(ruta)
+        cache = getattr(self._local, "conexiones", None)
+        if cache is None:
+            cache = self._local.conexiones = {}
+
+        entrada = cache.get(ruta)
+        if entrada is not None and entrada[1] == self._generacion:
+            with self._lock:
+                self._reutilizadas += 1
+            return entrada[0]
+
+        conn = self._abrir(ruta)
+        cache[ruta] = (conn, self._generacion)
+        with self._lock:
+            self._abiertas += 1
+            self._purgar_hilos_terminados()
+            self._conexiones[(threading.get_ident(), ruta)] = conn
+        return conn
+
+    @staticmethod
+    def _abrir(ruta: str) -> sqlite3.Connection:
+        """Abre y configura una conexión nueva."""
+        conn = sqlite3.connect(
+            ruta,
+            timeout=DB_BUSY_TIMEOUT,
+            check_same_thread=False,
+            factory=_ConexionPool,
+        )
+        conn.row_factory = sqlite3.Row
+        pragmas = (
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            f"PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}",
+            f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}",
+            "PRAGMA temp_store=MEMORY",
+        )
+        for pragma in pragmas:
+            try:
+                conn.execute(pragma)
+            except sqlite3.Error as e:
+                logging.warning(f"No se pudo aplicar '{pragma}': {e}")
+        return conn
+
+    def _purgar_hilos_terminados(self):
+        """Cierra las conexiones de hilos que ya terminaron (requiere self._lock)."""
+        vivos = {t.ident for t in threading.enumerate()}
+        for clave in [k for k in self._conexiones if k[0] not in vivos]:
+            sqlite3.Connection.close(self._conexiones.pop(clave))
+
+    def entrar(self, ruta) -> bool:
+        """Marca el inicio de un bloque; True si es el bloque más externo del hilo."""
+        profundidad = getattr(self._local, "profundidad", None)
+        if profundidad is None:
+            profundidad = self._local.profundidad = {}
+        ruta = str(ruta)
+        profundidad[ruta] = profundidad.get(ruta, 0) + 1
+        return profundidad[ruta] == 1
+
+    def salir(self, ruta):
+        """Marca el fin de un bloque abierto con entrar()."""
+        profundidad = self._local.profundidad
+        ruta = str(ruta)
+        profundidad[ruta] = max(profundidad.get(ruta, 1) - 1, 0)
+
+    def al_confirmar(self, ruta, funcion) -> bool:
+        """
+        Encola `funcion` para después del commit del bloque más externo del
+        hilo. Retorna False si no hay bloque abierto (quien llama la ejecuta ya).
+        """
+        ruta = str(ruta)
+        if not getattr(self._local, "profundidad", {}).get(ruta):
+            return False
+        pendientes = getattr(self._local, "al_confirmar", None)
+        if pendientes is None:
+            pendientes = self._local.al_confirmar = {}
+        pendientes.setdefault(ruta, []).append(funcion)
+        return True
+
+    def tomar_pendientes(self, ruta) -> list:
+        """Saca las funciones encoladas con al_confirmar() para `ruta`."""
+        pendientes = getattr(self._local, "al_confirmar", None)
+        return pendientes.pop(str(ruta), []) if pendientes else []
+
+    def cerrar_todas(self):
+        """
+        Cierra todas las conexiones del pool (por ejemplo antes de restaurar
+        un backup). Los hilos abren una conexión nueva en su siguiente uso.
+        """
+        with self._lock:
+            self._generacion += 1
+            for conn in self._conexiones.values():
+                try:
+                    sqlite3.Connection.close(conn)
+                except sqlite3.Error as e:
+                    logging.warning(f"Error cerrando conexión del pool: {e}")
+            self._conexiones.clear()
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Contadores de conexiones abiertas, reutilizadas y activas."""
+        with self._lock:
+            return {
+                "abiertas": self._abiertas,
+                "reutilizadas": self._reutilizadas,
+                "activas": len(self._conexiones),
+            }
+
+
+_pool = ConnectionPool()
+
+
 @contextmanager
 def get_db_connection():
-    """Context manager para manejar conexiones a la base de datos"""
-    conn = None
+    """
+    Context manager para manejar conexiones a la base de datos.
+    Usa la conexión persistente del hilo actual (ver ConnectionPool).
+    Hace commit al salir y rollback si hay error; en bloques anidados solo
+    el bloque más externo confirma o revierte la transacción.
+    """
+    ruta = str(DB_PATH)
     try:
-        conn = sqlite3.connect(str(DB_PATH))
+        conn = _pool.obtener(ruta)
+    except sqlite3.Error as e:
+        logging.error(f"Error de base de datos: {e}")
+        raise
+
+    externo = _pool.entrar(ruta)
+    if externo:
         conn.row_factory = sqlite3.Row  # Acceso por nombre de columna
+    confirmadas = []
+    try:
         yield conn
-        conn.commit()
-    except sqlite3.Error as e:
-        if conn:
+        if externo:
+            conn.commit()
+            confirmadas = _pool.tomar_pendientes(ruta)
+    except Exception as e:
+        if externo:
             conn.rollback()
-        logging.error(f"Error de base de datos: {e}")
+            _pool.tomar_pendientes(ruta)   # la transacción no ocurrió
+        if isinstance(e, sqlite3.Error):
+            logging.error(f"Error de base de datos: {e}")
         raise
     finally:
-        if conn:
-            conn.close()
+        _pool.salir(ruta)
+
+    for funcion in confirmadas:
+        try:
+            funcion()
+        except Exception as e:
+            logging.error(f"Error tras confirmar transacción: {e}")
+
+
+def publicar_al_confirmar(tema: str, **datos):
+    """
+    Publica un evento del bus cuando se confirme la transacción en curso
+    del hilo (o de inmediato si no hay ninguna abierta). Así ningún
+    suscriptor relee la BD antes de que el cambio sea visible.
+    """
+    def publicar():
+        eventos.bus.publicar(tema, **datos)
+
+    if not _pool.al_confirmar(DB_PATH, publicar):
+        publicar()
+
+
+def estadisticas_conexiones() -> Dict[str, int]:
+    """Contadores del pool: conexiones abiertas y reutilizadas."""
+    return _pool.estadisticas()
+
+
+def cerrar_conexiones():
+    """Cierra todas las conexiones del pool."""
+    _pool.cerrar_todas()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CATÁLOGO DE PRODUCTOS EN MEMORIA
+# ══════════════════════════════════════════════════════════════════════════════
+
+class ProductCatalog:
+    """
+    Caché de la tabla productos para todo el proceso, indexada por
+    codigo_barras y por id_producto: cada escaneo es una consulta a un dict.
+
+    Se mantiene al día de dos formas:
+      - invalidar(codigos=..., ids=...): la llaman las escrituras de la
+        aplicación (DatabaseManager, ventas, importación de Excel); solo se
+        releen las filas afectadas, en la siguiente consulta.
+      - PRAGMA data_version: cambia cuando OTRA conexión (otro hilo u otro
+        proceso) confirma cambios; en ese caso se recarga todo el catálogo.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._ruta: Optional[str] = None
+        self._por_codigo: Dict[str, Dict[str, Any]] = {}
+        self._por_id: Dict[int, Dict[str, Any]] = {}
+        self._codigos_sucios: set = set()
+        self._ids_sucios: set = set()
+        self._cargado = False
+        self._generacion = 0
+        self.recargas = 0
+
+    # ── Consultas ─────────────────────────────────────────────────────────────
+
+    def por_codigo(self, codigo: str) -> Optional[Dict[str, Any]]:
+        """Producto por código de barras (copia) o None si no existe."""
+        codigo = str(codigo or "")
+        if not codigo:
+            return None
+        with get_db_connection() as conn, self._lock:
+            self._sincronizar(conn)
+            if codigo in self._codigos_sucios:
+                self._releer(conn, "codigo_barras", codigo)
+                self._codigos_sucios.discard(codigo)
+            fila = self._por_codigo.get(codigo)
+        return dict(fila) if fila else None
+
+    def por_id(self, id_producto: int) -> Optional[Dict[str, Any]]:
+        """Producto por id_producto (copia) o None si no existe."""
+        try:
+            id_producto = int(id_producto)
+        except (TypeError, ValueError):
+            return None
+        with get_db_connection() as conn, self._lock:
+            self._sincronizar(conn)
+            if id_producto in self._ids_sucios:
+                self._releer(conn, "id_producto", id_producto)
+                self._ids_sucios.discard(id_producto)
+            fila = self._por_id.get(id_producto)
+        return dict(fila) if fila else None
+
+    def todos(self) -> List[Dict[str, Any]]:
+        """Todos los productos (copias), ordenados por id_producto."""
+        with get_db_connection() as conn, self._lock:
+            self._sincronizar(conn)
+            self._releer_sucios(conn)
+            return [dict(f) for _, f in sorted(self._por_id.items())]
+
+    # ── Mantenimiento ─────────────────────────────────────────────────────────
+
+    def cargar(self):
+        """Carga (o recarga) el catálogo completo. Se llama al iniciar la app."""
+        with get_db_connection() as conn, self._lock:
+            self._cargar(conn)
+
+    def invalidar(self, codigos=None, ids=None):
+        """
+        Marca productos como modificados. Sin argumentos invalida todo el
+        catálogo (por ejemplo después de un reseteo o una importación masiva).
+        """
+        with self._lock:
+            if codigos is None and ids is None:
+                self._cargado = False
+                return
+            for codigo in codigos or ():
+                codigo = str(codigo)
+                fila = self._por_codigo.get(codigo)
+                self._codigos_sucios.add(codigo)
+                if fila:
+                    self._ids_sucios.add(fila["id_producto"])
+            for id_producto in ids or ():
+                fila = self._por_id.get(int(id_producto))
+                self._ids_sucios.add(int(id_producto))
+                if fila:
+                    self._codigos_sucios.add(fila["codigo_barras"])
+
+    # ── Internos (requieren self._lock) ───────────────────────────────────────
+
+    def _sincronizar(self, conn):
+        """Recarga todo si cambió la BD, o si otra conexión escribió productos."""
+        actual = (id(conn), conn.execute("PRAGMA data_version").fetchone()[0])
+        marca = getattr(self._local, "marca", None)
+        if not self._cargado or self._ruta != str(DB_PATH):
+            self._cargar(conn)
+        elif marca is not None and marca[0] == self._generacion and marca[1] != actual:
+            self._cargar(conn)
+        # Sin marca (primera consulta del hilo en esta carga) solo se registra
+        self._local.marca = (self._generacion, actual)
+
+    def _cargar(self, conn):
+        filas = conn.execute("SELECT * FROM productos").fetchall()
+        self._por_codigo = {}
+        self._por_id = {}
+        for row in filas:
+            self._guardar(dict(row))
+        self._codigos_sucios.clear()
+        self._ids_sucios.clear()
+        self._ruta = str(DB_PATH)
+        self._cargado = True
+        self._generacion += 1
+        self.recargas += 1
+
+    def _guardar(self, fila: Dict[str, Any]):
+        self._por_codigo[str(fila["codigo_barras"])] = fila
+        self._por_id[fila["id_producto"]] = fila
+
+    def _releer(self, conn, columna: str, valor):
+        """Vuelve a leer una fila (por codigo_barras o id_producto) y reemplaza su entrada."""
+        indice = self._por_codigo if columna == "codigo_barras" else self._por_id
+        vieja = indice.get(valor)
+        if vieja:
+            self._por_codigo.pop(str(vieja["codigo_barras"]), None)
+            self._por_id.pop(vieja["id_producto"], None)
+
+        row = conn.execute(f"SELECT * FROM productos WHERE {columna} = ?", (valor,)).fetchone()
+        if row:
+            fila = dict(row)
+            # Si el código cambió, quitar también la entrada del código anterior
+            anterior = self._por_id.pop(fila["id_producto"], None)
+            if anterior:
+                self._por_codigo.pop(str(anterior["codigo_barras"]), None)
+            self._guardar(fila)
+
+    def _releer_sucios(self, conn):
+        for codigo in list(self._codigos_sucios):
+            self._releer(conn, "codigo_barras", codigo)
+        for id_producto in list(self._ids_sucios):
+            self._releer(conn, "id_producto", id_producto)
+        self._codigos_sucios.clear()
+        self._ids_sucios.clear()
+
+
+catalogo = ProductCatalog()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGINACIÓN DE PRODUCTOS (keyset)
+# ══════════════════════════════════════════════════════════════════════════════
+
+# Columnas del listado de inventario, en el orden de la tabla y del export
+COLUMNAS_LISTADO = (
+    "id_producto", "codigo_barras", "descripcion", "cantidad", "proveedor",
+    "precio_compra", "precio_venta", "unidad", "impuesto", "bonificacion",
+    "grupo", "subgrupo", "fecha_vencimiento",
+)
+
+# Columnas por las que se puede paginar (todas tienen índice) → expresión de orden
+ORDEN_PAGINABLE = {
+    "id_producto":       "id_producto",
+    "codigo_barras":     "codigo_barras",
+    "descripcion":       "descripcion COLLATE NOCASE",
+    "proveedor":         "proveedor",
+    "cantidad":          "cantidad",
+    "fecha_vencimiento": "fecha_vencimiento",
+}
+
+
+def _tramos_despues_de(expr: str, clave: Optional[Tuple], descendente: bool) -> List[Tuple[str, list]]:
+    """
+    Condiciones WHERE, en orden, de las filas que siguen a `clave` en
+    ORDER BY expr, id_producto.
+
+    SQLite ordena los NULL primero en ASC y al final en DESC, y una
+    comparación con NULL nunca es verdadera: los NULL se recorren como un
+    tramo aparte (columna IS NULL, ordenado por id). Cada condición es un
+    rango simple sobre el índice de la columna, de modo que la consulta
+    salta directo a la clave en lugar de recorrer las filas anteriores.
+    """
+    op = "<" if descendente else ">"
+    if expr == "id_producto":
+        return [(f"id_producto {op} ?", [clave[1]])] if clave else [("1", [])]
+
+    columna = expr.split()[0]
+    nulos, valores = f"{columna} IS NULL", f"{columna} IS NOT NULL"
+
+    if clave is None:
+        tramos = [(nulos, []), (valores, [])]
+        return tramos[::-1] if descendente else tramos
+
+    valor, id_producto = clave
+    if valor is None:
+        tramo = (f"{nulos} AND id_producto {op} ?", [id_producto])
+        return [tramo] if descendente else [tramo, (valores, [])]
+
+    tramo = (
+        f"{expr} {op}= ? AND ({expr} {op} ? OR id_producto {op} ?)",
+        [valor, valor, id_producto]
+    )
+    return [tramo, (nulos, [])] if descendente else [tramo]
 
 
 class DatabaseManager:
@@ -59,127 +543,538 @@ class DatabaseManager:
         Crea todas las tablas necesarias si no existen.
         Seguro de llamar en cada arranque: no borra datos existentes.
         """
-        import sqlite3 as _sq3
         try:
-            conn = _sq3.connect(str(DB_PATH))
-            cur  = conn.cursor()
-
-            # ── Tabla productos ───────────────────────────────────────────
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS productos (
-                    id_producto      INTEGER PRIMARY KEY AUTOINCREMENT,
-                    codigo_barras    TEXT UNIQUE NOT NULL,
-                    descripcion      TEXT,
-                    proveedor        TEXT,
-                    unidad           TEXT,
-                    cantidad         REAL    DEFAULT 0,
-                    precio_compra    REAL    DEFAULT 0,
-                    precio_venta     REAL    DEFAULT 0,
-                    impuesto         TEXT,
-                    bonificacion     REAL    DEFAULT 0,
-                    grupo            TEXT,
-                    subgrupo         TEXT,
-                    fecha_vencimiento TEXT
+            with get_db_connection() as conn:
+                cur  = conn.cursor()
+
+                # ── Tabla productos ───────────────────────────────────────────
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS productos (
+                        id_producto      INTEGER PRIMARY KEY AUTOINCREMENT,
+                        codigo_barras    TEXT UNIQUE NOT NULL,
+                        descripcion      TEXT,
+                        proveedor        TEXT,
+                        unidad           TEXT,
+                        cantidad         REAL    DEFAULT 0,
+                        precio_compra    REAL    DEFAULT 0,
+                        precio_venta     REAL    DEFAULT 0,
+                        impuesto         TEXT,
+                        bonificacion     REAL    DEFAULT 0,
+                        grupo            TEXT,
+                        subgrupo         TEXT,
+                        fecha_vencimiento TEXT
+                    )
+                """)
+
+                # ── Tabla ventas ──────────────────────────────────────────────
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS ventas (
+                        id_venta  INTEGER PRIMARY KEY AUTOINCREMENT,
+                        fecha     TEXT    NOT NULL DEFAULT '',
+                        total     REAL    NOT NULL DEFAULT 0,
+                        productos TEXT,
+                        cajero    TEXT    DEFAULT 'Principal'
+                    )
+                """)
+
+                # ── Tabla facturas_pago ───────────────────────────────────────
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS facturas_pago (
+                        id                INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id_factura        TEXT    NOT NULL,
+                        proveedor         TEXT    NOT NULL,
+                        valor             REAL    NOT NULL DEFAULT 0,
+                        fecha_vencimiento TEXT    NOT NULL,
+                        estado            TEXT    NOT NULL DEFAULT 'pendiente',
+                        metodo_pago       TEXT    DEFAULT '',
+                        observaciones     TEXT    DEFAULT '',
+                        fecha_creacion    TEXT    DEFAULT '',
+                        fecha_pago        TEXT    DEFAULT ''
+                    )
+                """)
+
+                # ── Tabla venta_items (líneas normalizadas de cada venta) ─────
+                cur.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='venta_items'"
                 )
-            """)
+                venta_items_nueva = cur.fetchone() is None
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS venta_items (
+                        id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id_venta        INTEGER NOT NULL,
+                        id_padre        INTEGER,
+                        codigo_barras   TEXT    NOT NULL,
+                        descripcion     TEXT,
+                        cantidad        REAL    NOT NULL DEFAULT 0,
+                        precio_unitario REAL    NOT NULL DEFAULT 0,
+                        subtotal        REAL    NOT NULL DEFAULT 0,
+                        costo_unitario  REAL,
+                        impuesto        TEXT    DEFAULT '',
+                        es_kit          INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_venta_items_venta "
+                    "ON venta_items(id_venta)"
+                )
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_venta_items_codigo "
+                    "ON venta_items(codigo_barras, id_venta)"
+                )
+                # Borrar una venta borra sus líneas (foreign_keys no está activo)
+                cur.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_ventas_borrar_items
+                    AFTER DELETE ON ventas
+                    BEGIN
+                        DELETE FROM venta_items WHERE id_venta = OLD.id_venta;
+                    END
+                """)
 
-            # ── Tabla ventas ──────────────────────────────────────────────
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS ventas (
-                    id_venta  INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fecha     TEXT    NOT NULL DEFAULT '',
-                    total     REAL    NOT NULL DEFAULT 0,
-                    productos TEXT,
-                    cajero    TEXT    DEFAULT 'Principal'
+                # ── Tabla resumen_ventas_diario (agregados del dashboard) ─────
+                # Una fila por día × método de pago; la mantienen
+                # registrar_venta y los reinicios de ventas (ver
+                # acumular_venta_en_resumen / recalcular_resumen_diario)
+                cur.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='resumen_ventas_diario'"
                 )
-            """)
+                resumen_nuevo = cur.fetchone() is None
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS resumen_ventas_diario (
+                        dia         TEXT    NOT NULL,
+                        metodo_pago TEXT    NOT NULL,
+                        num_ventas  INTEGER NOT NULL DEFAULT 0,
+                        total       REAL    NOT NULL DEFAULT 0,
+                        costo       REAL    NOT NULL DEFAULT 0,
+                        PRIMARY KEY (dia, metodo_pago)
+                    ) WITHOUT ROWID
+                """)
 
-            # ── Tabla facturas_pago ───────────────────────────────────────
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS facturas_pago (
-                    id                INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_factura        TEXT    NOT NULL,
-                    proveedor         TEXT    NOT NULL,
-                    valor             REAL    NOT NULL DEFAULT 0,
-                    fecha_vencimiento TEXT    NOT NULL,
-                    estado            TEXT    NOT NULL DEFAULT 'pendiente',
-                    metodo_pago       TEXT    DEFAULT '',
-                    observaciones     TEXT    DEFAULT '',
-                    fecha_creacion    TEXT    DEFAULT '',
-                    fecha_pago        TEXT    DEFAULT ''
+                # ── Tabla ventas_por_producto (contador por código) ───────────
+                # Veces vendido (ventas distintas), unidades y última venta de
+                # cada código; la mantienen registrar_venta y los reinicios
+                cur.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='ventas_por_producto'"
                 )
-            """)
+                contador_nuevo = cur.fetchone() is None
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS ventas_por_producto (
+                        codigo_barras     TEXT    PRIMARY KEY,
+                        veces_vendido     INTEGER NOT NULL DEFAULT 0,
+                        unidades_vendidas REAL    NOT NULL DEFAULT 0,
+                        ultima_venta      TEXT
+                    ) WITHOUT ROWID
+                """)
 
-            # ── Migraciones de seguridad (columnas faltantes) ─────────────
-            cur.execute("PRAGMA table_info(ventas)")
-            cols_ventas = {r[1] for r in cur.fetchall()}
-            if "fecha"  not in cols_ventas:
-                cur.execute("ALTER TABLE ventas ADD COLUMN fecha TEXT NOT NULL DEFAULT ''")
-                logging.info("Migración: columna 'fecha' agregada a ventas")
-            if "cajero" not in cols_ventas:
-                cur.execute("ALTER TABLE ventas ADD COLUMN cajero TEXT DEFAULT 'Principal'")
-                logging.info("Migración: columna 'cajero' agregada a ventas")
-            if "metodo_pago" not in cols_ventas:
-                cur.execute("ALTER TABLE ventas ADD COLUMN metodo_pago TEXT DEFAULT 'Efectivo'")
-                logging.info("Migración: columna 'metodo_pago' agregada a ventas")
-
-            cur.execute("PRAGMA table_info(productos)")
-            cols_prod = {r[1] for r in cur.fetchall()}
-            if "unidad" not in cols_prod:
-                cur.execute("ALTER TABLE productos ADD COLUMN unidad TEXT")
-                logging.info("Migración: columna 'unidad' agregada a productos")
-            if "bonificacion" not in cols_prod:
-                cur.execute("ALTER TABLE productos ADD COLUMN bonificacion REAL DEFAULT 0")
-                logging.info("Migración: columna 'bonificacion' agregada a productos")
-            if "grupo" not in cols_prod:
-                cur.execute("ALTER TABLE productos ADD COLUMN grupo TEXT")
-                logging.info("Migración: columna 'grupo' agregada a productos")
-            if "subgrupo" not in cols_prod:
-                cur.execute("ALTER TABLE productos ADD COLUMN subgrupo TEXT")
-                logging.info("Migración: columna 'subgrupo' agregada a productos")
-
-            # ── Migraciones facturas_pago ─────────────────────────────────
-            cur.execute("PRAGMA table_info(facturas_pago)")
-            cols_fact = {r[1] for r in cur.fetchall()}
-            if cols_fact:  # tabla existe
-                if "metodo_pago" not in cols_fact:
-                    cur.execute("ALTER TABLE facturas_pago ADD COLUMN metodo_pago TEXT DEFAULT ''")
-                    logging.info("Migración: columna 'metodo_pago' agregada a facturas_pago")
-                if "observaciones" not in cols_fact:
-                    cur.execute("ALTER TABLE facturas_pago ADD COLUMN observaciones TEXT DEFAULT ''")
-                    logging.info("Migración: columna 'observaciones' agregada a facturas_pago")
-                if "fecha_creacion" not in cols_fact:
-                    cur.execute("ALTER TABLE facturas_pago ADD COLUMN fecha_creacion TEXT DEFAULT ''")
-                    logging.info("Migración: columna 'fecha_creacion' agregada a facturas_pago")
-                if "fecha_pago" not in cols_fact:
-                    cur.execute("ALTER TABLE facturas_pago ADD COLUMN fecha_pago TEXT DEFAULT ''")
-                    logging.info("Migración: columna 'fecha_pago' agregada a facturas_pago")
+                # ── Tabla cambios_catalogo (registro de importaciones) ────────
+                # Solo las filas que realmente cambiaron en cada importación
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS cambios_catalogo (
+                        id                   INTEGER PRIMARY KEY AUTOINCREMENT,
+                        fecha                TEXT    NOT NULL,
+                        origen               TEXT    DEFAULT '',
+                        codigo_barras        TEXT    NOT NULL,
+                        tipo                 TEXT    NOT NULL,
+                        descripcion_anterior TEXT,
+                        descripcion_nueva    TEXT,
+                        precio_anterior      REAL,
+                        precio_nuevo         REAL
+                    )
+                """)
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_cambios_catalogo_codigo "
+                    "ON cambios_catalogo(codigo_barras, fecha)"
+                )
+
+                # ── Migraciones de seguridad (columnas faltantes) ─────────────
+                cur.execute("PRAGMA table_info(ventas)")
+                cols_ventas = {r[1] for r in cur.fetchall()}
+                if "fecha"  not in cols_ventas:
+                    cur.execute("ALTER TABLE ventas ADD COLUMN fecha TEXT NOT NULL DEFAULT ''")
+                    logging.info("Migración: columna 'fecha' agregada a ventas")
+                if "cajero" not in cols_ventas:
+                    cur.execute("ALTER TABLE ventas ADD COLUMN cajero TEXT DEFAULT 'Principal'")
+                    logging.info("Migración: columna 'cajero' agregada a ventas")
+                if "metodo_pago" not in cols_ventas:
+                    cur.execute("ALTER TABLE ventas ADD COLUMN metodo_pago TEXT DEFAULT 'Efectivo'")
+                    logging.info("Migración: columna 'metodo_pago' agregada a ventas")
+
+                cur.execute("PRAGMA table_info(productos)")
+                cols_prod = {r[1] for r in cur.fetchall()}
+                if "unidad" not in cols_prod:
+                    cur.execute("ALTER TABLE productos ADD COLUMN unidad TEXT")
+                    logging.info("Migración: columna 'unidad' agregada a productos")
+                if "bonificacion" not in cols_prod:
+                    cur.execute("ALTER TABLE productos ADD COLUMN bonificacion REAL DEFAULT 0")
+                    logging.info("Migración: columna 'bonificacion' agregada a productos")
+                if "grupo" not in cols_prod:
+                    cur.execute("ALTER TABLE productos ADD COLUMN grupo TEXT")
+                    logging.info("Migración: columna 'grupo' agregada a productos")
+                if "subgrupo" not in cols_prod:
+                    cur.execute("ALTER TABLE productos ADD COLUMN subgrupo TEXT")
+                    logging.info("Migración: columna 'subgrupo' agregada a productos")
+
+                # ── Migraciones facturas_pago ─────────────────────────────────
+                cur.execute("PRAGMA table_info(facturas_pago)")
+                cols_fact = {r[1] for r in cur.fetchall()}
+                if cols_fact:  # tabla existe
+                    if "metodo_pago" not in cols_fact:
+                        cur.execute("ALTER TABLE facturas_pago ADD COLUMN metodo_pago TEXT DEFAULT ''")
+                        logging.info("Migración: columna 'metodo_pago' agregada a facturas_pago")
+                    if "observaciones" not in cols_fact:
+                        cur.execute("ALTER TABLE facturas_pago ADD COLUMN observaciones TEXT DEFAULT ''")
+                        logging.info("Migración: columna 'observaciones' agregada a facturas_pago")
+                    if "fecha_creacion" not in cols_fact:
+                        cur.execute("ALTER TABLE facturas_pago ADD COLUMN fecha_creacion TEXT DEFAULT ''")
+                        logging.info("Migración: columna 'fecha_creacion' agregada a facturas_pago")
+                    if "fecha_pago" not in cols_fact:
+                        cur.execute("ALTER TABLE facturas_pago ADD COLUMN fecha_pago TEXT DEFAULT ''")
+                        logging.info("Migración: columna 'fecha_pago' agregada a facturas_pago")
+
+                # ── Índices secundarios ───────────────────────────────────────
+                # ventas.fecha es 'YYYY-MM-DD HH:MM:SS' (ordenable como texto):
+                # las consultas por período usan `fecha >= ? AND fecha < ?`
+                # (ver utils.formatters.rango_fechas_sql). El índice incluye
+                # metodo_pago y total para resolver los totales sin leer la tabla.
+                for nombre, definicion in (
+                    ("idx_ventas_fecha",          "ventas(fecha, metodo_pago, total)"),
+                    ("idx_productos_proveedor",   "productos(proveedor)"),
+                    ("idx_productos_vencimiento", "productos(fecha_vencimiento)"),
+                    ("idx_productos_descripcion", "productos(descripcion COLLATE NOCASE)"),
+                    ("idx_productos_cantidad",    "productos(cantidad)"),
+                ):
+                    cur.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
+
+                # ── Índice de búsqueda de productos (FTS5) ────────────────────
+                DatabaseManager._crear_indice_busqueda(cur)
+
+                # ── Migración única: JSON de ventas.productos → venta_items ───
+                if venta_items_nueva:
+                    DatabaseManager._migrar_venta_items(cur)
+                    DatabaseManager.rellenar_costos_venta_items(cur)
+
+                # ── Primera vez: resumen diario a partir del historial ────────
+                if resumen_nuevo:
+                    DatabaseManager.recalcular_resumen_diario(cur)
+                if contador_nuevo:
+                    DatabaseManager.recalcular_ventas_por_producto(cur)
+
+                # Mantener estadísticas del planificador al día
+                cur.execute("PRAGMA optimize")
 
-            conn.commit()
-            conn.close()
             logging.info("Base de datos inicializada correctamente.")
 
         except Exception as e:
             logging.error(f"Error al inicializar tablas: {e}", exc_info=True)
 
+    @staticmethod
+    def _crear_indice_busqueda(cursor) -> bool:
+        """
+        Crea productos_fts (FTS5 con contenido externo sobre productos) y los
+        triggers que lo mantienen sincronizado. El tokenizador unicode61 con
+        remove_diacritics ignora mayúsculas y tildes ('acetaminofén' = 'ACETAMINOFEN')
+        y el índice de prefijos acelera la búsqueda mientras se escribe.
+        Returns: False si esta compilación de SQLite no trae FTS5.
+        """
+        existe = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'productos_fts'"
+        ).fetchone()
+        try:
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+                    {_COLUMNAS_FTS},
+                    content='productos', content_rowid='id_producto',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='1 2 3'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logging.warning(f"FTS5 no disponible, la búsqueda usará LIKE: {e}")
+            return False
+
+        for trigger in _TRIGGERS_FTS:
+            cursor.execute(trigger)
+
+        if not existe:
+            # Primera vez: indexar los productos que ya existían
+            cursor.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+            logging.info("Índice de búsqueda productos_fts construido")
+        return True
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # VENTAS — LÍNEAS NORMALIZADAS (venta_items)
+    # ══════════════════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def insertar_items_venta(cursor, id_venta: int, productos: List[Dict[str, Any]]) -> int:
+        """
+        Escribe las líneas de una venta en venta_items usando el cursor recibido
+        (misma transacción que el INSERT en ventas).
+
+        `productos` tiene el formato que se guarda en ventas.productos. Los kits
+        generan una línea 'KIT' y una línea hija por componente (id_padre).
+        Returns: número de líneas insertadas
+        """
+        sql = """
+            INSERT INTO venta_items
+            (id_venta, id_padre, codigo_barras, descripcion, cantidad,
+             precio_unitario, subtotal, costo_unitario, impuesto, es_kit)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        insertadas = 0
+        pendientes = []     # líneas simples consecutivas → un executemany
+
+        for prod in productos:
+            es_kit = bool(prod.get('es_kit')) or str(prod.get('codigo')) == 'KIT'
+            cantidad = float(prod.get('cantidad') or 0)
+            costo = prod.get('costo_unitario')
+            if costo is None and es_kit:
+                costo = prod.get('costo_base', prod.get('precio_compra'))
+            fila = (
+                id_venta,
+                None,
+                str(prod.get('codigo', '')),
+                prod.get('descripcion', ''),
+                cantidad,
+                float(prod.get('precio_unitario') or 0),
+                float(prod.get('subtotal') or 0),
+                float(costo) if costo is not None else None,
+                prod.get('impuesto', '') or '',
+                1 if es_kit else 0,
+            )
+            insertadas += 1
+
+            if not es_kit:
+                pendientes.append(fila)
+                continue
+
+            # El kit necesita su id para enlazar los componentes: se vacían
+            # antes las líneas pendientes para conservar el orden del ticket.
+            if pendientes:
+                cursor.executemany(sql, pendientes)
+                pendientes = []
+            cursor.execute(sql, fila)
+
+            id_padre = cursor.lastrowid
+            filas_comp = []
+            for comp in prod.get('componentes', []) or []:
+                cant_comp = float(comp.get('descuento_cajas') or 0)
+                costo_prop = float(comp.get('costo_prop') or 0)
+                precio_int = float(comp.get('precio_interno') or 0)
+                filas_comp.append((
+                    id_venta,
+                    id_padre,
+                    str(comp.get('codigo', '')),
+                    comp.get('descripcion', ''),
+                    cant_comp,
+                    precio_int / cant_comp if cant_comp else 0.0,
+                    precio_int,
+                    costo_prop / cant_comp if cant_comp else 0.0,
+                    '',
+                    0,
+                ))
+            cursor.executemany(sql, filas_comp)
+            insertadas += len(filas_comp)
+
+        if pendientes:
+            cursor.executemany(sql, pendientes)
+
+        return insertadas
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # VENTAS — RESUMEN DIARIO (resumen_ventas_diario)
+    # ══════════════════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def acumular_venta_en_resumen(cursor, id_venta: int):
+        """
+        Suma una venta recién registrada (y sus líneas ya escritas en
+        venta_items) a su fila día × método de pago. Usa el cursor recibido:
+        misma transacción que el INSERT de la venta.
+        """
+        cursor.execute(f"""
+            INSERT INTO resumen_ventas_diario (dia, metodo_pago, num_ventas, total, costo)
+            SELECT substr(v.fecha, 1, 10), COALESCE(v.metodo_pago, 'Efectivo'), 1, v.total,
+                   COALESCE((
+                       SELECT SUM({SQL_COSTO_LINEA})
+                       FROM venta_items vi
+                       LEFT JOIN productos p ON p.codigo_barras = vi.codigo_barras
+                       WHERE vi.id_venta = v.id_venta AND vi.id_padre IS NULL
+                   ), 0)
+            FROM ventas v
+            WHERE v.id_venta = ?
+            ON CONFLICT(dia, metodo_pago) DO UPDATE SET
+                num_ventas = num_ventas + excluded.num_ventas,
+                total      = total + excluded.total,
+                costo      = costo + excluded.costo
+        """, (id_venta,))
+
+    @staticmethod
+    def recalcular_resumen_diario(cursor, desde: Optional[str] = None,
+                                  hasta: Optional[str] = None) -> int:
+        """
+        Reconstruye resumen_ventas_diario desde ventas + venta_items para los
+        días [desde, hasta] ('YYYY-MM-DD', inclusive; None = sin límite).
+        Se usa tras borrar ventas (reinicios) y al crear la tabla.
+        Returns: filas día × método escritas
+        """
+        filtro_resumen, filtro_ventas, params = [], [], []
+        if desde:
+            filtro_resumen.append("dia >= ?")
+            filtro_ventas.append("fecha >= ?")
+            params.append(desde)
+        if hasta:
+            filtro_resumen.append("dia <= ?")
+            filtro_ventas.append("fecha < date(?, '+1 day')")
+            params.append(hasta)
+        where_resumen = " WHERE " + " AND ".join(filtro_resumen) if filtro_resumen else ""
+        where_ventas = " WHERE " + " AND ".join(filtro_ventas) if filtro_ventas else ""
+
+        cursor.execute(f"DELETE FROM resumen_ventas_diario{where_resumen}", params)
+        cursor.execute(f"""
+            INSERT INTO resumen_ventas_diario (dia, metodo_pago, num_ventas, total, costo)
+            WITH periodo AS (
+                SELECT id_venta, substr(fecha, 1, 10) AS dia,
+                       COALESCE(metodo_pago, 'Efectivo') AS metodo_pago, total
+                FROM ventas{where_ventas}
+            ),
+            costos AS (
+                SELECT vi.id_venta, SUM({SQL_COSTO_LINEA}) AS costo
+                FROM periodo
+                JOIN venta_items vi
+                  ON vi.id_venta = periodo.id_venta AND vi.id_padre IS NULL
+                LEFT JOIN productos p ON p.codigo_barras = vi.codigo_barras
+                GROUP BY vi.id_venta
+            )
+            SELECT dia, metodo_pago, COUNT(*), COALESCE(SUM(total), 0),
+                   COALESCE(SUM(costos.costo), 0)
+            FROM periodo LEFT JOIN costos USING (id_venta)
+            GROUP BY dia, metodo_pago
+        """, params)
+        return cursor.rowcount
+
+    # Líneas que cuentan como venta de un producto: las del ticket (no los
+    # componentes de un kit, que tienen id_padre) y que no son el KIT mismo
+    _SQL_LINEAS_PRODUCTO = "vi.id_padre IS NULL AND vi.es_kit = 0"
+
+    @staticmethod
+    def acumular_ventas_por_producto(cursor, id_venta: int):
+        """
+        Suma una venta recién registrada al contador de cada producto que
+        incluye (una vez por venta aunque el código aparezca en varias
+        líneas). Misma transacción que el INSERT de la venta.
+        """
+        cursor.execute(f"""
+            INSERT INTO ventas_por_producto
+                (codigo_barras, veces_vendido, unidades_vendidas, ultima_venta)
+            SELECT vi.codigo_barras, 1, SUM(vi.cantidad), MAX(v.fecha)
+            FROM venta_items vi
+            JOIN ventas v ON v.id_venta = vi.id_venta
+            WHERE vi.id_venta = ? AND {DatabaseManager._SQL_LINEAS_PRODUCTO}
+            GROUP BY vi.codigo_barras
+            ON CONFLICT(codigo_barras) DO UPDATE SET
+                veces_vendido     = veces_vendido + 1,
+                unidades_vendidas = unidades_vendidas + excluded.unidades_vendidas,
+                ultima_venta      = MAX(COALESCE(ultima_venta, ''), excluded.ultima_venta)
+        """, (id_venta,))
+
+    @staticmethod
+    def recalcular_ventas_por_producto(cursor) -> int:
+        """
+        Reconstruye ventas_por_producto desde venta_items (tras borrar ventas
+        y al crear la tabla). Returns: códigos escritos
+        """
+        cursor.execute("DELETE FROM ventas_por_producto")
+        cursor.execute(f"""
+            INSERT INTO ventas_por_producto
+                (codigo_barras, veces_vendido, unidades_vendidas, ultima_venta)
+            SELECT vi.codigo_barras, COUNT(DISTINCT vi.id_venta),
+                   SUM(vi.cantidad), MAX(v.fecha)
+            FROM venta_items vi
+            JOIN ventas v ON v.id_venta = vi.id_venta
+            WHERE {DatabaseManager._SQL_LINEAS_PRODUCTO}
+            GROUP BY vi.codigo_barras
+        """)
+        return cursor.rowcount
+
+    @staticmethod
+    def _migrar_venta_items(cursor) -> int:
+        """
+        Migración única: llena venta_items a partir del JSON histórico de
+        ventas.productos. Se ejecuta cuando la tabla se crea por primera vez.
+        Returns: número de ventas migradas
+        """
+        import json
+
+        cursor.execute("SELECT id_venta, productos FROM ventas WHERE productos IS NOT NULL")
+        migradas = 0
+        for id_venta, productos_json in cursor.fetchall():
+            try:
+                productos = json.loads(productos_json) if productos_json else []
+            except (ValueError, TypeError):
+                logging.warning(f"Migración venta_items: JSON inválido en venta {id_venta}")
+                continue
+            if not isinstance(productos, list):
+                continue
+            DatabaseManager.insertar_items_venta(cursor, id_venta, productos)
+            migradas += 1
+
+        if migradas:
+            logging.info(f"Migración: {migradas} ventas copiadas a venta_items")
+        return migradas
+
+    @staticmethod
+    def rellenar_costos_venta_items(cursor=None) -> int:
+        """
+        Completa costo_unitario en las líneas históricas que no lo tienen
+        (ventas anteriores a guardar el costo al vender) con el costo actual
+        del producto. Los servicios SVC-* quedan en 0. Las líneas cuyo
+        producto ya no existe se dejan en NULL.
+        Returns: número de líneas actualizadas
+        """
+        sql = f"""
+            UPDATE venta_items
+            SET costo_unitario = CASE
+                WHEN codigo_barras LIKE 'SVC-%' THEN 0
+                ELSE (SELECT p.precio_compra * {SQL_FACTOR_IVA}
+                      FROM productos p
+                      WHERE p.codigo_barras = venta_items.codigo_barras)
+            END
+            WHERE costo_unitario IS NULL AND es_kit = 0
+              AND (codigo_barras LIKE 'SVC-%'
+                   OR codigo_barras IN (SELECT codigo_barras FROM productos))
+        """
+        try:
+            if cursor is not None:
+                cursor.execute(sql)
+                n = cursor.rowcount
+            else:
+                with get_db_connection() as conn:
+                    n = conn.execute(sql).rowcount
+            if n:
+                logging.info(f"Costos históricos completados en {n} líneas de venta")
+            return n
+        except sqlite3.Error as e:
+            logging.error(f"Error al completar costos de ventas: {e}")
+            return 0
+
     # ══════════════════════════════════════════════════════════════════════════
     # PRODUCTOS — CONSULTAS
     # ══════════════════════════════════════════════════════════════════════════
 
     @staticmethod
     def buscar_producto_por_codigo(codigo: str) -> Optional[Dict[str, Any]]:
-        """Busca un producto por código de barras"""
+        """Busca un producto por código de barras (desde el catálogo en memoria)"""
         try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """SELECT id_producto, codigo_barras, descripcion, cantidad, 
-                       precio_compra, precio_venta, impuesto, fecha_vencimiento
-                       FROM productos WHERE codigo_barras = ?""",
-                    (codigo,)
-                )
-                row = cursor.fetchone()
-                return dict(row) if row else None
+            return catalogo.por_codigo(codigo)
+        except sqlite3.Error as e:
+            logging.error(f"Error al buscar producto: {e}")
+            return None
+
+    @staticmethod
+    def buscar_producto_por_id(id_producto: int) -> Optional[Dict[str, Any]]:
+        """Busca un producto por id_producto (desde el catálogo en memoria)"""
+        try:
+            return catalogo.por_id(id_producto)
         except sqlite3.Error as e:
             logging.error(f"Error al buscar producto: {e}")
             return None
@@ -188,19 +1083,44 @@ class DatabaseManager:
     def buscar_productos_like(texto: str, limit: int = 80) -> List[Tuple]:
         """Busca productos por coincidencia parcial.
         Retorna tuplas (codigo_barras, descripcion, cantidad).
+
+        Usa el índice productos_fts (prefijos de palabra, sin tildes ni
+        mayúsculas, ordenado por relevancia). Si FTS5 no está disponible, o si
+        un fragmento numérico no coincide con el inicio de ningún código,
+        recurre a LIKE '%texto%'.
         """
+        consulta = consulta_fts(texto)
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute(
-                    """SELECT codigo_barras, descripcion, cantidad
-                       FROM productos
-                       WHERE descripcion LIKE ? OR codigo_barras LIKE ?
-                       LIMIT ?""",
-                    (f"%{texto}%", f"%{texto}%", limit)
-                )
+                rows = None
+                if consulta:
+                    try:
+                        # bm25: la descripción pesa más que código y proveedor
+                        cursor.execute(
+                            """SELECT p.codigo_barras, p.descripcion, p.cantidad
+                               FROM productos_fts f
+                               JOIN productos p ON p.id_producto = f.rowid
+                               WHERE productos_fts MATCH ?
+                               ORDER BY bm25(productos_fts, 10.0, 5.0, 2.0, 1.0, 1.0)
+                               LIMIT ?""",
+                            (consulta, limit)
+                        )
+                        rows = cursor.fetchall()
+                    except sqlite3.OperationalError as e:
+                        logging.warning(f"Búsqueda FTS no disponible, usando LIKE: {e}")
+
+                if rows is None or (not rows and str(texto).strip().isdigit()):
+                    cursor.execute(
+                        """SELECT codigo_barras, descripcion, cantidad
+                           FROM productos
+                           WHERE descripcion LIKE ? OR codigo_barras LIKE ?
+                           LIMIT ?""",
+                        (f"%{texto}%", f"%{texto}%", limit)
+                    )
+                    rows = cursor.fetchall()
+
                 # Convertir Row objects a tuplas simples
-                rows = cursor.fetchall()
                 return [tuple(row) for row in rows]
         except sqlite3.Error as e:
             logging.error(f"Error en búsqueda: {e}")
@@ -208,7 +1128,10 @@ class DatabaseManager:
 
     @staticmethod
     def obtener_todos_productos() -> List[Tuple]:
-        """Obtiene todos los productos (usar con paginación en producción)"""
+        """
+        Obtiene todos los productos de una vez.
+        Para listados y exportaciones usar iter_productos / productos_por_paginas.
+        """
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
@@ -220,6 +1143,82 @@ class DatabaseManager:
             logging.error(f"Error al obtener productos: {e}")
             return []
 
+    @staticmethod
+    def iter_productos(filtro: Optional[Dict[str, Any]] = None,
+                       order_by: str = "id_producto",
+                       after_key: Optional[Tuple] = None,
+                       page_size: int = 500,
+                       descendente: bool = False,
+                       columnas: Tuple[str, ...] = COLUMNAS_LISTADO) -> Tuple[List[Tuple], Optional[Tuple]]:
+        """
+        Una página de productos con paginación por clave (keyset).
+
+        filtro:    {'proveedor': '...'} (opcional)
+        order_by:  columna de ORDER_PAGINABLE; el desempate es id_producto
+        after_key: clave devuelta por la página anterior (None = primera)
+
+        Retorna (filas, siguiente_clave); siguiente_clave es None en la última
+        página. Cada página es un salto directo sobre el índice (WHERE clave > ?
+        LIMIT n), sin OFFSET: pedir la página 100 cuesta lo mismo que la 1.
+        """
+        expr = ORDEN_PAGINABLE.get(order_by)
+        if expr is None:
+            raise ValueError(f"No se puede paginar por '{order_by}'")
+        invalidas = [c for c in columnas if c not in COLUMNAS_LISTADO]
+        if invalidas:
+            raise ValueError(f"Columnas no permitidas: {invalidas}")
+
+        filtro_sql, filtro_params = "", []
+        proveedor = (filtro or {}).get("proveedor")
+        if proveedor:
+            filtro_sql, filtro_params = " AND TRIM(proveedor) = TRIM(?)", [proveedor]
+
+        # Se leen también la columna de orden y el id para armar la clave siguiente
+        direccion = "DESC" if descendente else "ASC"
+        orden = f"{expr} {direccion}, " if order_by != "id_producto" else ""
+        sql = (
+            f"SELECT {', '.join(columnas)}, {order_by}, id_producto FROM productos "
+            f"WHERE {{}}{filtro_sql} ORDER BY {orden}id_producto {direccion} LIMIT ?"
+        )
+
+        rows = []
+        try:
+            with get_db_connection() as conn:
+                for condicion, params in _tramos_despues_de(expr, after_key, descendente):
+                    rows += conn.execute(
+                        sql.format(condicion),
+                        params + filtro_params + [page_size - len(rows)]
+                    ).fetchall()
+                    if len(rows) >= page_size:
+                        break
+        except sqlite3.Error as e:
+            logging.error(f"Error al paginar productos: {e}")
+            return [], None
+
+        filas = [tuple(row)[:-2] for row in rows]
+        siguiente = tuple(rows[-1])[-2:] if len(rows) == page_size else None
+        return filas, siguiente
+
+    @staticmethod
+    def productos_por_paginas(filtro: Optional[Dict[str, Any]] = None,
+                              order_by: str = "id_producto",
+                              page_size: int = 1000,
+                              descendente: bool = False,
+                              columnas: Tuple[str, ...] = COLUMNAS_LISTADO):
+        """
+        Generador de páginas (listas de tuplas) sobre iter_productos, para
+        exportaciones: solo una página en memoria a la vez.
+        """
+        clave = None
+        while True:
+            filas, clave = DatabaseManager.iter_productos(
+                filtro, order_by, clave, page_size, descendente, columnas
+            )
+            if filas:
+                yield filas
+            if clave is None:
+                break
+
     # ══════════════════════════════════════════════════════════════════════════
     # PRODUCTOS — ESCRITURA
     # ══════════════════════════════════════════════════════════════════════════
@@ -250,6 +1249,8 @@ class DatabaseManager:
                     datos.get('subgrupo', ''),
                     datos.get('fecha_vencimiento', '')
                 ))
+                catalogo.invalidar(codigos=[datos['codigo_barras']])
+                publicar_al_confirmar(eventos.INVENTARIO, codigos=[datos['codigo_barras']])
                 return True
         except sqlite3.Error as e:
             logging.error(f"Error al insertar producto: {e}")
@@ -265,6 +1266,8 @@ class DatabaseManager:
                     "UPDATE productos SET cantidad = ? WHERE id_producto = ?",
                     (nueva_cantidad, id_producto)
                 )
+                catalogo.invalidar(ids=[id_producto])
+                publicar_al_confirmar(eventos.INVENTARIO, ids=[id_producto])
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logging.error(f"Error al actualizar cantidad: {e}")
@@ -285,6 +1288,8 @@ class DatabaseManager:
                 cursor = conn.cursor()
                 query = f"UPDATE productos SET {campo_seguro} = ? WHERE id_producto = ?"
                 cursor.execute(query, (valor, id_producto))
+                catalogo.invalidar(ids=[id_producto])
+                publicar_al_confirmar(eventos.INVENTARIO, ids=[id_producto])
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logging.error(f"Error al actualizar campo: {e}")
@@ -297,6 +1302,8 @@ class DatabaseManager:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM productos WHERE id_producto = ?", (id_producto,))
+                catalogo.invalidar(ids=[id_producto])
+                publicar_al_confirmar(eventos.INVENTARIO, ids=[id_producto])
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logging.error(f"Error al eliminar producto: {e}")
@@ -320,14 +1327,7 @@ class DatabaseManager:
                 total = 0.0
                 for row in cursor.fetchall():
                     cantidad = row[0] or 0
-                    precio = row[1] or 0
-                    impuesto = row[2] or ""
-
-                    # Aplicar IVA si corresponde
-                    if "19" in str(impuesto).lower() and "iva" in str(impuesto).lower():
-                        precio *= 1.19
-
-                    total += cantidad * precio
+                    total += cantidad * costo_real(row[1], row[2])
 
                 return total
         except sqlite3.Error as e:
@@ -356,6 +1356,8 @@ class DatabaseManager:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE productos SET cantidad = 0")
+            catalogo.invalidar()
+            publicar_al_confirmar(eventos.INVENTARIO)
 
             logging.info("Stock reseteado exitosamente")
             return True
@@ -369,6 +1371,7 @@ class DatabaseManager:
         """
         Actualiza precios de múltiples productos desde una lista
         ✅ MEJORADO: Crea backup automático antes de actualización masiva
+        ✅ NUEVO: Un solo INSERT ... ON CONFLICT desde una tabla temporal
         Returns: (actualizados, insertados)
         """
         actualizados = 0
@@ -385,30 +1388,44 @@ class DatabaseManager:
             else:
                 logging.info(f"Backup creado antes de actualización masiva: {backup_path}")
 
-            # Ejecutar actualización
+            # Ejecutar actualización: lista a tabla temporal + un solo upsert
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-
-                for codigo, precio_compra, bonificacion in actualizaciones:
-                    cursor.execute(
-                        "SELECT id_producto FROM productos WHERE codigo_barras = ?",
-                        (codigo,)
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS lista_precios (
+                        codigo_barras TEXT PRIMARY KEY,
+                        precio_compra REAL,
+                        bonificacion  REAL
                     )
+                """)
+                cursor.execute("DELETE FROM temp.lista_precios")
+                # Si un código se repite en la lista, gana el último (como antes)
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO temp.lista_precios VALUES (?, ?, ?)",
+                    actualizaciones
+                )
 
-                    if cursor.fetchone():
-                        cursor.execute(
-                            "UPDATE productos SET precio_compra = ?, bonificacion = ? WHERE codigo_barras = ?",
-                            (precio_compra, bonificacion, codigo)
-                        )
-                        actualizados += 1
-                    else:
-                        cursor.execute("""
-                            INSERT INTO productos 
-                            (codigo_barras, cantidad, precio_compra, bonificacion)
-                            VALUES (?, 0, ?, ?)
-                        """, (codigo, precio_compra, bonificacion))
-                        insertados += 1
+                cursor.execute("""
+                    SELECT COUNT(*), COUNT(p.id_producto)
+                    FROM temp.lista_precios l
+                    LEFT JOIN productos p ON p.codigo_barras = l.codigo_barras
+                """)
+                total, actualizados = cursor.fetchone()
+                insertados = total - actualizados
+
+                cursor.execute("""
+                    INSERT INTO productos (codigo_barras, cantidad, precio_compra, bonificacion)
+                    SELECT codigo_barras, 0, precio_compra, bonificacion
+                    FROM temp.lista_precios
+                    WHERE true
+                    ON CONFLICT(codigo_barras) DO UPDATE SET
+                        precio_compra = excluded.precio_compra,
+                        bonificacion  = excluded.bonificacion
+                """)
+                cursor.execute("DELETE FROM temp.lista_precios")
 
+                catalogo.invalidar(codigos=[a[0] for a in actualizaciones])
+                publicar_al_confirmar(eventos.INVENTARIO)
                 logging.info(f"Actualización masiva completada: {actualizados} actualizados, {insertados} insertados")
                 return (actualizados, insertados)
 
@@ -0,0 +1,26 @@
+"""
+rellenar_costos_ventas.py — FarmaTrack
+Completa el costo unitario de las líneas de ventas antiguas (venta_items)
+que se registraron antes de guardar el costo al momento de vender.
+Usa el precio de compra actual de cada producto (con la regla del 19 % IVA).
+Ejecutar desde la raiz del proyecto: python rellenar_costos_ventas.py
+"""
+import shutil
+from datetime import datetime
+
+# Importar DB_PATH igual que el resto del proyecto
+from config.settings import DB_PATH
+from models.database import DatabaseManager, cerrar_conexiones
+
+# ── Backup automático ─────────────────────────────────────────────────────────
+ts  = datetime.now().strftime("%Y%m%d_%H%M%S")
+bak = DB_PATH.with_name(DB_PATH.stem + f".bak_{ts}.db")
+shutil.copy2(DB_PATH, bak)
+print(f"💾  Backup: {bak.name}")
+
+# ── Completar costos ──────────────────────────────────────────────────────────
+DatabaseManager.inicializar_tablas()
+n = DatabaseManager.rellenar_costos_venta_items()
+cerrar_conexiones()
+
+print(f"✅  {n} líneas de venta con costo completado")
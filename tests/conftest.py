@@ -68,6 +68,13 @@ def clean_db(test_db_path):
     conn.commit()
     conn.close()
     
+    # Completar el esquema con las migraciones de la aplicación
+    # (metodo_pago, venta_items, índices...)
+    from unittest.mock import patch
+    from models.database import DatabaseManager
+    with patch('models.database.DB_PATH', test_db_path):
+        DatabaseManager.inicializar_tablas()
+    
     yield test_db_path
     
     # Limpiar después del test
@@ -75,6 +82,10 @@ def clean_db(test_db_path):
     cursor = conn.cursor()
     cursor.execute("DELETE FROM productos")
     cursor.execute("DELETE FROM ventas")
+    cursor.execute("DELETE FROM venta_items")
+    cursor.execute("DELETE FROM cambios_catalogo")
+    cursor.execute("DELETE FROM resumen_ventas_diario")
+    cursor.execute("DELETE FROM ventas_por_producto")
     cursor.execute("DELETE FROM sqlite_sequence")  # Resetear autoincrement
     conn.commit()
     conn.close()
@@ -194,11 +205,14 @@ class MockTreeview:
         })
         return item_id
     
-    def item(self, item_id, **kwargs):
+    def item(self, item_id, option=None, **kwargs):
         for item in self._items:
             if item['id'] == item_id:
                 if 'values' in kwargs:
                     item['values'] = kwargs['values']
+                if option is not None:
+                    # Igual que ttk: tree.item(iid, "values") retorna esa opción
+                    return item.get(option)
                 return item
         return None
     
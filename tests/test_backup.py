@@ -0,0 +1,177 @@
+"""
+Tests unitarios para utils/backup.py
+"""
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from utils.backup import BackupManager
+
+
+@pytest.fixture
+def entorno_backup(tmp_path):
+    """BD en WAL con ~1 MB de datos y un directorio de backups propio"""
+    db = tmp_path / "farma.db"
+    conn = sqlite3.connect(str(db))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE productos (id INTEGER PRIMARY KEY, descripcion TEXT)")
+    conn.executemany(
+        "INSERT INTO productos (descripcion) VALUES (?)",
+        [(f"PRODUCTO {i:05d} " + "x" * 200,) for i in range(4000)]
+    )
+    conn.commit()
+    conn.close()
+
+    with patch('utils.backup.DB_PATH', db), \
+         patch('models.database.DB_PATH', db), \
+         patch.object(BackupManager, 'BACKUP_DIR', tmp_path / "backups"):
+        yield db, BackupManager()
+
+
+def _bloques(manager):
+    return sorted(p.name for p in manager.dir_paginas.glob("*/*"))
+
+
+class TestBackupIncremental:
+    """Tests para los backups incrementales por páginas"""
+
+    def test_solo_escribe_bloques_cambiados(self, entorno_backup):
+        db, manager = entorno_backup
+        primero = manager.crear_backup(BackupManager.PRE_OPERATION, "uno")
+        assert primero.suffix == ".inc"
+        total = len(_bloques(manager))
+        assert total > 10
+
+        conn = sqlite3.connect(str(db))
+        conn.execute("UPDATE productos SET descripcion = 'CAMBIADO' WHERE id = 3000")
+        conn.commit()
+        conn.close()
+
+        manager.crear_backup(BackupManager.PRE_OPERATION, "dos")
+        # Cambia el bloque de la página modificada y el del encabezado, no el resto
+        assert len(_bloques(manager)) - total <= 3
+
+    def test_manual_sigue_siendo_copia_completa(self, entorno_backup):
+        _, manager = entorno_backup
+        ruta = manager.crear_backup(BackupManager.MANUAL, comprimir=False)
+        assert ruta.suffix == ".db"
+        assert [b['formato'] for b in manager.listar_backups()] == ["completo"]
+
+    def test_restaurar(self, entorno_backup):
+        db, manager = entorno_backup
+        backup = manager.crear_backup(BackupManager.AUTO)
+
+        conn = sqlite3.connect(str(db))
+        conn.execute("DELETE FROM productos")
+        conn.commit()
+        conn.close()
+
+        assert manager.restaurar_backup(backup)
+        conn = sqlite3.connect(str(db))
+        assert conn.execute("SELECT COUNT(*) FROM productos").fetchone()[0] == 4000
+        conn.close()
+        assert not db.with_name("farma.db.restaurando").exists()
+
+    def test_lector_retiene_wal(self, entorno_backup):
+        """Con un lector que impide vaciar el WAL se usa la copia completa"""
+        db, manager = entorno_backup
+        escritor = sqlite3.connect(str(db))
+        lector = sqlite3.connect(str(db))
+        lector.execute("BEGIN")
+        lector.execute("SELECT COUNT(*) FROM productos").fetchone()
+        escritor.execute("UPDATE productos SET descripcion = 'EN WAL' WHERE id = 1")
+        escritor.commit()
+
+        backup = manager.crear_backup(BackupManager.AUTO)
+        lector.rollback()
+        lector.close()
+        escritor.close()
+
+        copia = db.with_name("copia.db")
+        manager._materializar(backup, copia)
+        conn = sqlite3.connect(str(copia))
+        assert conn.execute("SELECT descripcion FROM productos WHERE id = 1").fetchone()[0] == 'EN WAL'
+        conn.close()
+
+    def test_eliminar_recolecta_bloques(self, entorno_backup):
+        db, manager = entorno_backup
+        viejo = manager.crear_backup(BackupManager.AUTO, "viejo")
+        conn = sqlite3.connect(str(db))
+        conn.execute("DELETE FROM productos WHERE id > 2000")
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.close()
+        nuevo = manager.crear_backup(BackupManager.AUTO, "nuevo")
+
+        assert manager.eliminar_backup(viejo)
+        assert set(_bloques(manager)) == set(manager._leer_manifiesto(nuevo)["bloques"])
+
+
+class TestBackupComprimido:
+    """Tests para las copias completas comprimidas (.dbz)"""
+
+    @pytest.mark.parametrize("compresion", ["zlib", "lzma"])
+    def test_restaurar(self, entorno_backup, compresion):
+        db, manager = entorno_backup
+        with patch.object(BackupManager, 'COMPRESION', compresion):
+            backup = manager.crear_backup(BackupManager.MANUAL, "antes de limpiar")
+        assert backup.suffix == ".dbz"
+        assert backup.stat().st_size < db.stat().st_size / 5
+
+        conn = sqlite3.connect(str(db))
+        conn.execute("DELETE FROM productos")
+        conn.commit()
+        conn.close()
+
+        assert manager.restaurar_backup(backup)
+        conn = sqlite3.connect(str(db))
+        assert conn.execute("SELECT COUNT(*) FROM productos").fetchone()[0] == 4000
+        conn.close()
+
+    def test_listar_sin_descomprimir(self, entorno_backup):
+        """La lista sale del encabezado"""
+        _, manager = entorno_backup
+        manager.crear_backup(BackupManager.MANUAL, "cierre de mes")
+
+        with patch.object(BackupManager, '_descomprimir', side_effect=AssertionError):
+            backups = manager.listar_backups()
+
+        assert len(backups) == 1
+        assert backups[0]['descripcion'] == "cierre de mes"
+        assert backups[0]['formato'] == "zlib"
+        assert backups[0]['filas'] == {"productos": 4000}
+
+    def test_checksum_incorrecto(self, entorno_backup):
+        db, manager = entorno_backup
+        backup = manager.crear_backup(BackupManager.MANUAL)
+
+        # Un byte cambiado al final del contenido comprimido
+        datos = bytearray(backup.read_bytes())
+        datos[-20] ^= 0xFF
+        backup.write_bytes(bytes(datos))
+
+        assert not manager.restaurar_backup(backup)
+        assert not manager.verificar_backups()["ok"]
+        conn = sqlite3.connect(str(db))
+        assert conn.execute("SELECT COUNT(*) FROM productos").fetchone()[0] == 4000
+        conn.close()
+
+
+class TestVerificacionBackups:
+    """Tests para la verificación completa programada"""
+
+    def test_detecta_bloque_danado(self, entorno_backup):
+        _, manager = entorno_backup
+        assert manager.verificacion_pendiente()
+        backup = manager.crear_backup(BackupManager.AUTO)
+
+        assert manager.verificar_backups()["ok"]
+        assert not manager.verificacion_pendiente()
+
+        bloque = manager._ruta_bloque(manager._leer_manifiesto(backup)["bloques"][5])
+        bloque.write_bytes(b"\0" * 10)
+        resultado = manager.verificar_backups()
+        assert not resultado["ok"]
+        assert len(resultado["errores"]) == 1
+        assert not manager.restaurar_backup(backup)
@@ -0,0 +1,157 @@
+"""
+Tests unitarios para controllers/dashboard.py
+"""
+import sqlite3
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from controllers.dashboard import DashboardController
+from utils import eventos
+
+
+def _resumen(db, filas):
+    """Inserta filas (dia, metodo_pago, num_ventas, total, costo) en el resumen"""
+    conn = sqlite3.connect(str(db))
+    conn.executemany(
+        "INSERT INTO resumen_ventas_diario (dia, metodo_pago, num_ventas, total, costo) "
+        "VALUES (?, ?, ?, ?, ?)", filas
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestVentasDesdeResumen:
+    """ventas_hoy / ventas_semana leen resumen_ventas_diario"""
+
+    def test_ventas_hoy_suma_metodos(self, clean_db):
+        hoy = datetime.now().strftime('%Y-%m-%d')
+        _resumen(clean_db, [
+            (hoy, 'Efectivo', 3, 30000.0, 20000.0),
+            (hoy, 'Nequi', 1, 5000.0, 3000.0),
+            ('2020-01-01', 'Efectivo', 9, 99999.0, 0.0),
+        ])
+        with patch('models.database.DB_PATH', clean_db):
+            assert DashboardController.ventas_hoy() == {"cantidad": 4, "total": 35000.0}
+
+    def test_ventas_semana_rellena_dias_sin_ventas(self, clean_db):
+        hoy = datetime.now().date()
+        _resumen(clean_db, [
+            (hoy.isoformat(), 'Efectivo', 1, 100.0, 0.0),
+            (hoy.isoformat(), 'Nequi', 1, 50.0, 0.0),
+            ((hoy - timedelta(days=6)).isoformat(), 'Efectivo', 1, 70.0, 0.0),
+            ((hoy - timedelta(days=7)).isoformat(), 'Efectivo', 1, 999.0, 0.0),
+        ])
+        with patch('models.database.DB_PATH', clean_db):
+            semana = DashboardController.ventas_semana()
+
+        assert [d["total"] for d in semana] == [70.0, 0, 0, 0, 0, 0, 150.0]
+        assert semana[-1]["dia"] == hoy.strftime("%a")
+
+
+class TestProductosStockBajo:
+    """productos_stock_bajo lee el contador ventas_por_producto"""
+
+    def test_agotados_que_se_venden_primero(self, db_con_productos):
+        conn = sqlite3.connect(str(db_con_productos))
+        conn.execute("UPDATE productos SET cantidad = 0 WHERE codigo_barras != '7501234567892'")
+        conn.executemany(
+            "INSERT INTO ventas_por_producto VALUES (?, ?, ?, ?)",
+            [('7501234567890', 2, 2.0, '2026-01-01 10:00:00'),
+             ('7501234567891', 9, 12.0, '2026-02-01 10:00:00'),
+             ('7501234567892', 50, 80.0, '2026-02-01 10:00:00')]     # con stock
+        )
+        conn.commit()
+        conn.close()
+
+        with patch('models.database.DB_PATH', db_con_productos):
+            stock_bajo = DashboardController.productos_stock_bajo()
+
+        assert [p["codigo_barras"] for p in stock_bajo] == ['7501234567891', '7501234567890']
+        assert stock_bajo[0]["veces_vendido"] == 9
+
+
+class TestInstantaneaDashboard:
+    """actualizar_instantanea solo recalcula las métricas con TTL vencido"""
+
+    def setup_method(self):
+        DashboardController._instantanea = {}
+        DashboardController._calculada_en = {}
+        DashboardController._invalidaciones = {}
+        DashboardController._version_datos = None
+
+    teardown_method = setup_method
+
+    def test_primera_vez_calcula_todo(self, clean_db):
+        with patch('models.database.DB_PATH', clean_db):
+            datos = DashboardController.actualizar_instantanea()
+
+        assert set(datos) == set(DashboardController.TTL_METRICAS)
+        assert DashboardController.instantanea() == datos
+        assert DashboardController.metricas_vencidas() == []
+
+    def test_solo_metricas_vencidas(self, clean_db):
+        with patch('models.database.DB_PATH', clean_db):
+            DashboardController.actualizar_instantanea()
+
+        # 400 s después: vencen las de ventas, no inventario, stock bajo ni vencimientos
+        ahora = max(DashboardController._calculada_en.values()) + 400
+        vencidas = DashboardController.metricas_vencidas(ahora)
+        assert set(vencidas) == {"ventas_hoy", "ventas_semana"}
+
+        with patch('models.database.DB_PATH', clean_db), \
+             patch.object(DashboardController, 'metricas_vencidas', return_value=vencidas), \
+             patch.object(DashboardController, 'productos_stock_bajo') as stock, \
+             patch.object(DashboardController, 'ventas_hoy', return_value={"cantidad": 1, "total": 9.0}):
+            datos = DashboardController.actualizar_instantanea()
+
+        stock.assert_not_called()
+        assert datos["ventas_hoy"] == {"cantidad": 1, "total": 9.0}
+        assert datos["stock_bajo"] == []
+
+    def test_forzar_recalcula_todo(self, clean_db):
+        with patch('models.database.DB_PATH', clean_db):
+            DashboardController.actualizar_instantanea()
+            with patch.object(DashboardController, 'productos_por_vencer', return_value=[]) as venc:
+                DashboardController.actualizar_instantanea(forzar=True)
+        venc.assert_called_once()
+
+    def test_evento_invalida_solo_lo_afectado(self, clean_db):
+        with patch('models.database.DB_PATH', clean_db):
+            DashboardController.actualizar_instantanea()
+            eventos.bus.publicar(eventos.INVENTARIO, ids=[1])
+
+        assert set(DashboardController.metricas_vencidas()) == {"stock_bajo", "por_vencer", "inventario"}
+
+    def test_invalidada_mientras_se_calcula(self, clean_db):
+        """Un evento durante el cálculo deja la métrica vencida para la próxima vuelta"""
+        original = DashboardController.ventas_hoy.__func__
+
+        def ventas_hoy(cls):
+            eventos.bus.publicar(eventos.VENTAS, id_venta=1)
+            return original(cls)
+
+        with patch('models.database.DB_PATH', clean_db), \
+             patch.object(DashboardController, 'ventas_hoy', classmethod(ventas_hoy)):
+            DashboardController.actualizar_instantanea()
+
+        assert "ventas_hoy" in DashboardController.metricas_vencidas()
+
+    def test_cambios_externos_por_data_version(self, db_con_productos):
+        with patch('models.database.DB_PATH', db_con_productos):
+            assert DashboardController.hubo_cambios_externos() is False   # solo registra
+
+            # Otro proceso (otra conexión) escribe sin pasar por el bus
+            otra = sqlite3.connect(str(db_con_productos))
+            otra.execute("UPDATE productos SET cantidad = 0")
+            otra.commit()
+            otra.close()
+            assert DashboardController.hubo_cambios_externos() is True
+            assert DashboardController.hubo_cambios_externos() is False
+
+            # Un cambio anunciado por el bus no cuenta como externo
+            otra = sqlite3.connect(str(db_con_productos))
+            otra.execute("UPDATE productos SET cantidad = 5")
+            otra.commit()
+            otra.close()
+            eventos.bus.publicar(eventos.INVENTARIO)
+            assert DashboardController.hubo_cambios_externos() is False
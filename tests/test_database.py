@@ -4,7 +4,7 @@ Tests unitarios para models/database.py
 import pytest
 import sqlite3
 from pathlib import Path
-from models.database import DatabaseManager, get_db_connection
+from models.database import DatabaseManager, get_db_connection, estadisticas_conexiones
 from unittest.mock import patch, MagicMock
 
 
@@ -77,6 +77,93 @@ class TestGetDBConnection:
                 assert row['descripcion'] == 'Test Description'
 
 
+class TestConnectionPool:
+    """Tests para el pool de conexiones por hilo"""
+    
+    def test_reutiliza_conexion_en_mismo_hilo(self, clean_db):
+        """El mismo hilo recibe siempre la misma conexión"""
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn1:
+                pass
+            with get_db_connection() as conn2:
+                pass
+            
+            assert conn1 is conn2
+    
+    def test_conexion_distinta_por_hilo(self, clean_db):
+        """Cada hilo tiene su propia conexión"""
+        import threading
+        
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn_principal:
+                pass
+            
+            resultado = {}
+            
+            def trabajador():
+                with get_db_connection() as conn:
+                    resultado['conn'] = conn
+                    resultado['n'] = conn.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+            
+            hilo = threading.Thread(target=trabajador)
+            hilo.start()
+            hilo.join()
+            
+            assert resultado['conn'] is not conn_principal
+            assert resultado['n'] == 0
+    
+    def test_contadores_abiertas_reutilizadas(self, clean_db):
+        """Los contadores registran conexiones reutilizadas"""
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection():
+                pass
+            antes = estadisticas_conexiones()
+            
+            with get_db_connection():
+                pass
+            despues = estadisticas_conexiones()
+            
+            assert despues['reutilizadas'] == antes['reutilizadas'] + 1
+            assert despues['abiertas'] == antes['abiertas']
+    
+    def test_pragmas_configurados(self, clean_db):
+        """La conexión se configura con WAL y temp_store en memoria"""
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn:
+                assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+                assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+                assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2   # MEMORY
+    
+    def test_bloque_anidado_no_confirma_antes_de_tiempo(self, clean_db):
+        """Un error en el bloque externo revierte lo hecho en un bloque anidado"""
+        with patch('models.database.DB_PATH', clean_db):
+            try:
+                with get_db_connection() as externo:
+                    with get_db_connection() as interno:
+                        interno.execute("""
+                            INSERT INTO productos (codigo_barras, descripcion)
+                            VALUES ('ANIDADO', 'Producto Test')
+                        """)
+                    raise ValueError("Error de prueba")
+            except ValueError:
+                pass
+            
+            with get_db_connection() as conn:
+                row = conn.execute(
+                    "SELECT * FROM productos WHERE codigo_barras = 'ANIDADO'"
+                ).fetchone()
+                assert row is None
+    
+    def test_close_no_cierra_conexion_del_pool(self, clean_db):
+        """Código legado que llama close() no rompe la conexión compartida"""
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn:
+                conn.close()
+            
+            with get_db_connection() as conn:
+                assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+
 class TestBuscarProductoPorCodigo:
     """Tests para buscar_producto_por_codigo"""
     
@@ -121,6 +208,73 @@ class TestBuscarProductoPorCodigo:
                 assert clave in producto
 
 
+
+class TestProductCatalog:
+    """Tests para el catálogo de productos en memoria"""
+    
+    def test_busquedas_repetidas_no_consultan(self, db_con_productos):
+        """Después de cargar, buscar por código no ejecuta SELECT"""
+        from models.database import catalogo
+        sentencias = []
+        with patch('models.database.DB_PATH', db_con_productos):
+            catalogo.cargar()
+            with get_db_connection() as conn:
+                conn.set_trace_callback(sentencias.append)
+            try:
+                for _ in range(5):
+                    assert DatabaseManager.buscar_producto_por_codigo('7501234567890') is not None
+                assert DatabaseManager.buscar_producto_por_codigo('0000000000000') is None
+            finally:
+                with get_db_connection() as conn:
+                    conn.set_trace_callback(None)
+        
+        assert not [s for s in sentencias if 'FROM productos' in s]
+    
+    def test_por_id(self, db_con_productos):
+        """El catálogo también se indexa por id_producto"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            producto = DatabaseManager.buscar_producto_por_id(2)
+        
+        assert producto['codigo_barras'] == '7501234567891'
+    
+    def test_invalidacion_en_escrituras(self, db_con_productos):
+        """Insertar, editar y eliminar por DatabaseManager se refleja al instante"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            assert DatabaseManager.buscar_producto_por_codigo('7700000000009') is None
+            DatabaseManager.insertar_producto({
+                'codigo_barras': '7700000000009', 'descripcion': 'NUEVO',
+                'cantidad': 3, 'fecha_vencimiento': '2030-01-01'
+            })
+            nuevo = DatabaseManager.buscar_producto_por_codigo('7700000000009')
+            assert nuevo['descripcion'] == 'NUEVO'
+            
+            DatabaseManager.actualizar_campo_producto(nuevo['id_producto'], 'cantidad', 9)
+            assert DatabaseManager.buscar_producto_por_codigo('7700000000009')['cantidad'] == 9
+            
+            DatabaseManager.eliminar_producto(nuevo['id_producto'])
+            assert DatabaseManager.buscar_producto_por_codigo('7700000000009') is None
+            assert DatabaseManager.buscar_producto_por_id(nuevo['id_producto']) is None
+    
+    def test_escritura_de_otra_conexion(self, db_con_productos):
+        """Cambios hechos por otra conexión se detectan con data_version"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            assert DatabaseManager.buscar_producto_por_codigo('7501234567890')['cantidad'] == 100
+            
+            externa = sqlite3.connect(str(db_con_productos))
+            externa.execute("UPDATE productos SET cantidad = 1 WHERE codigo_barras = '7501234567890'")
+            externa.commit()
+            externa.close()
+            
+            assert DatabaseManager.buscar_producto_por_codigo('7501234567890')['cantidad'] == 1
+    
+    def test_retorna_copias(self, db_con_productos):
+        """Modificar el dict retornado no altera el catálogo"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            producto = DatabaseManager.buscar_producto_por_codigo('7501234567890')
+            producto['cantidad'] = -1
+            
+            assert DatabaseManager.buscar_producto_por_codigo('7501234567890')['cantidad'] == 100
+
 class TestBuscarProductosLike:
     """Tests para buscar_productos_like"""
     
@@ -173,6 +327,57 @@ class TestBuscarProductosLike:
             assert len(resultados[0]) == 2
 
 
+
+class TestBusquedaFTS:
+    """Tests para el índice de texto completo productos_fts"""
+    
+    def test_ignora_tildes_y_mayusculas(self, db_con_productos):
+        """'acetaminofén' encuentra 'ACETAMINOFEN'"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            resultados = DatabaseManager.buscar_productos_like('acetaminofén')
+            
+            assert [r[0] for r in resultados] == ['7501234567890']
+    
+    def test_varias_palabras_en_cualquier_campo(self, db_con_productos):
+        """Cada palabra debe aparecer como prefijo en algún campo"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            DatabaseManager.insertar_producto({
+                'codigo_barras': '7700000000001', 'descripcion': 'DOLEX GRIPA',
+                'proveedor': 'GSK', 'cantidad': 5, 'precio_compra': 1,
+                'precio_venta': 2, 'fecha_vencimiento': '2030-01-01'
+            })
+            assert [r[0] for r in DatabaseManager.buscar_productos_like('gri gsk')] == ['7700000000001']
+            assert DatabaseManager.buscar_productos_like('gri bayer') == []
+    
+    def test_triggers_mantienen_indice(self, db_con_productos):
+        """Editar o eliminar un producto actualiza el índice"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            DatabaseManager.actualizar_campo_producto(1, 'descripcion', 'PARACETAMOL')
+            assert DatabaseManager.buscar_productos_like('acetaminofen') == []
+            assert len(DatabaseManager.buscar_productos_like('paraceta')) == 1
+            
+            DatabaseManager.eliminar_producto(1)
+            assert DatabaseManager.buscar_productos_like('paraceta') == []
+    
+    def test_fragmento_de_codigo_usa_like(self, db_con_productos):
+        """Un fragmento numérico intermedio del código sigue encontrándose"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            resultados = DatabaseManager.buscar_productos_like('4567891')
+            
+            assert [r[0] for r in resultados] == ['7501234567891']
+    
+    def test_sin_indice_usa_like(self, db_con_productos):
+        """Si productos_fts no existe la búsqueda sigue funcionando"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            with get_db_connection() as conn:
+                for trg in ('ins', 'del', 'upd'):
+                    conn.execute(f"DROP TRIGGER trg_productos_fts_{trg}")
+                conn.execute("DROP TABLE productos_fts")
+            
+            resultados = DatabaseManager.buscar_productos_like('ACETA')
+            
+            assert [r[0] for r in resultados] == ['7501234567890']
+
 class TestInsertarProducto:
     """Tests para insertar_producto"""
     
@@ -373,6 +578,29 @@ class TestCalcularValorInventario:
             assert valor == pytest.approx(11900.0, rel=0.01)
 
 
+class TestActualizarPreciosDesdeLista:
+    """Tests para actualizar_precios_desde_lista"""
+
+    def test_actualiza_e_inserta(self, db_con_productos):
+        """Existentes se actualizan, nuevos se insertan, repetido: gana el último"""
+        actualizaciones = [
+            ('7501234567890', 5100.0, 0.0),
+            ('7709999999999', 2000.0, 100.0),
+            ('7501234567890', 5200.0, 50.0),
+        ]
+        with patch('models.database.DB_PATH', db_con_productos), \
+             patch('utils.backup.backup_antes_operacion_critica', return_value=None):
+            resultado = DatabaseManager.actualizar_precios_desde_lista(actualizaciones)
+
+            existente = DatabaseManager.buscar_producto_por_codigo('7501234567890')
+            nuevo = DatabaseManager.buscar_producto_por_codigo('7709999999999')
+
+        assert resultado == (1, 1)
+        assert (existente['precio_compra'], existente['bonificacion']) == (5200.0, 50.0)
+        assert existente['precio_venta'] == 7000.0
+        assert (nuevo['precio_compra'], nuevo['cantidad']) == (2000.0, 0)
+
+
 class TestObtenerTodosProductos:
     """Tests para obtener_todos_productos"""
     
@@ -394,6 +622,147 @@ class TestObtenerTodosProductos:
             assert isinstance(productos, list)
 
 
+class TestPaginacionProductos:
+    """Tests para iter_productos / productos_por_paginas (keyset)"""
+
+    def _poblar(self, db):
+        """25 productos; proveedor y vencimiento con NULL y repetidos"""
+        conn = sqlite3.connect(str(db))
+        conn.executemany(
+            "INSERT INTO productos (codigo_barras, descripcion, proveedor, cantidad, fecha_vencimiento) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(f"77{i:011d}", f"Producto {i % 4}", None if i % 5 == 0 else f"PROV{i % 3}",
+              i % 6, None if i % 3 == 0 else f"2027-0{i % 9 + 1}-01")
+             for i in range(25)]
+        )
+        conn.commit()
+        conn.close()
+
+    def _todo(self, db, **kwargs):
+        with patch('models.database.DB_PATH', db):
+            return [f for pagina in DatabaseManager.productos_por_paginas(page_size=4, **kwargs)
+                    for f in pagina]
+
+    @pytest.mark.parametrize("order_by", ["id_producto", "descripcion", "proveedor", "fecha_vencimiento"])
+    @pytest.mark.parametrize("descendente", [False, True])
+    def test_igual_a_order_by_completo(self, clean_db, order_by, descendente):
+        """Recorrer por páginas da las mismas filas y el mismo orden que un solo ORDER BY"""
+        self._poblar(clean_db)
+        filas = self._todo(clean_db, order_by=order_by, descendente=descendente,
+                           columnas=("id_producto",))
+
+        expr = {"descripcion": "descripcion COLLATE NOCASE"}.get(order_by, order_by)
+        direccion = "DESC" if descendente else "ASC"
+        conn = sqlite3.connect(str(clean_db))
+        esperado = conn.execute(
+            f"SELECT id_producto FROM productos ORDER BY {expr} {direccion}, id_producto {direccion}"
+        ).fetchall()
+        conn.close()
+
+        assert filas == esperado
+
+    def test_filtro_y_clave_siguiente(self, clean_db):
+        """Filtro por proveedor; la última página no devuelve clave"""
+        self._poblar(clean_db)
+        with patch('models.database.DB_PATH', clean_db):
+            filas, clave = DatabaseManager.iter_productos({'proveedor': ' PROV1 '}, page_size=100)
+            assert clave is None
+            assert len(filas) == 7
+            assert {f[4] for f in filas} == {'PROV1'}
+            assert len(filas[0]) == 13
+
+            pagina, clave = DatabaseManager.iter_productos(order_by='descripcion', page_size=2)
+            assert len(pagina) == 2 and clave == ('Producto 0', pagina[-1][0])
+
+    def test_orden_no_permitido(self, clean_db):
+        """Solo columnas con índice (y sin inyección SQL)"""
+        with patch('models.database.DB_PATH', clean_db):
+            with pytest.raises(ValueError):
+                DatabaseManager.iter_productos(order_by='precio_venta; DROP TABLE productos')
+
+
+class TestMigracionVentaItems:
+    """Tests para la migración del JSON de ventas.productos a venta_items"""
+    
+    def test_migracion_desde_json(self, clean_db):
+        """Las ventas históricas se copian a venta_items"""
+        import json
+        productos = [
+            {'codigo': '7501234567890', 'descripcion': 'ACETAMINOFEN',
+             'cantidad': 2, 'precio_unitario': 7000.0, 'subtotal': 14000.0,
+             'impuesto': '', 'es_kit': False},
+            {'codigo': 'KIT', 'descripcion': 'KIT', 'cantidad': 1,
+             'precio_unitario': 5000.0, 'subtotal': 5000.0, 'costo_base': 3000.0,
+             'impuesto': 'KIT', 'es_kit': True,
+             'componentes': [{'codigo': '7501234567891', 'descuento_cajas': 0.25,
+                              'costo_prop': 3000.0, 'precio_interno': 5000.0}]},
+        ]
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn:
+                conn.execute(
+                    "INSERT INTO ventas (fecha, total, productos) VALUES (?, ?, ?)",
+                    ('2026-01-15 10:00:00', 19000.0, json.dumps(productos))
+                )
+                conn.execute(
+                    "INSERT INTO ventas (fecha, total, productos) VALUES (?, ?, ?)",
+                    ('2026-01-15 11:00:00', 0.0, 'no es json')
+                )
+                cursor = conn.cursor()
+                migradas = DatabaseManager._migrar_venta_items(cursor)
+            
+            assert migradas == 1
+            with get_db_connection() as conn:
+                rows = conn.execute(
+                    "SELECT codigo_barras, cantidad, es_kit, id_padre FROM venta_items ORDER BY id"
+                ).fetchall()
+            
+            assert [r['codigo_barras'] for r in rows] == ['7501234567890', 'KIT', '7501234567891']
+            assert rows[1]['es_kit'] == 1
+            assert rows[2]['id_padre'] is not None
+    
+    def test_borrar_venta_borra_items(self, clean_db):
+        """El trigger elimina las líneas al borrar la venta"""
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("INSERT INTO ventas (fecha, total) VALUES ('2026-01-15 10:00:00', 100)")
+                DatabaseManager.insertar_items_venta(cursor, cursor.lastrowid, [
+                    {'codigo': 'A', 'cantidad': 1, 'precio_unitario': 100, 'subtotal': 100}
+                ])
+                cursor.execute("DELETE FROM ventas")
+                n = cursor.execute("SELECT COUNT(*) FROM venta_items").fetchone()[0]
+            
+            assert n == 0
+
+
+class TestIndicesSecundarios:
+    """Tests para los índices creados por inicializar_tablas"""
+    
+    def test_indices_creados(self, clean_db):
+        """Existen los índices de fecha y de productos"""
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn:
+                nombres = {r[0] for r in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )}
+        
+        for nombre in ('idx_ventas_fecha', 'idx_productos_proveedor',
+                       'idx_productos_vencimiento', 'idx_productos_descripcion',
+                       'idx_productos_cantidad'):
+            assert nombre in nombres
+    
+    def test_rango_de_fecha_usa_indice(self, clean_db):
+        """El filtro por rango de fecha no recorre toda la tabla de ventas"""
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn:
+                plan = " ".join(str(r[-1]) for r in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT COUNT(*), SUM(total) FROM ventas "
+                    "WHERE fecha >= ? AND fecha < ?", ('2026-01-01', '2026-01-02')
+                ))
+        
+        assert 'idx_ventas_fecha' in plan
+
+
 # ============================================================
 # TESTS DE INTEGRACIÓN
 # ============================================================
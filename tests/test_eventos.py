@@ -0,0 +1,102 @@
+"""
+Tests unitarios para utils/eventos.py y publicar_al_confirmar
+"""
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from models.database import get_db_connection, publicar_al_confirmar
+from utils import eventos
+from utils.eventos import BusEventos
+
+
+@pytest.fixture
+def recibidos():
+    """Suscriptor de prueba al tema 'prueba' del bus global"""
+    lista = []
+
+    def anotar(tema, datos):
+        lista.append((tema, datos))
+
+    eventos.bus.suscribir("prueba", anotar)
+    yield lista
+    eventos.bus.desuscribir("prueba", anotar)
+
+
+class TestBusEventos:
+    """Tests para BusEventos"""
+
+    def test_publicar_y_desuscribir(self):
+        bus = BusEventos()
+        recibidos = []
+        bus.suscribir("ventas", lambda t, d: recibidos.append((t, d)))
+        bus.publicar("ventas", id_venta=7)
+        bus.publicar("inventario")
+
+        assert recibidos == [("ventas", {"id_venta": 7})]
+        assert bus.publicados == 2
+
+    def test_suscriptor_que_falla_no_corta(self):
+        """Un suscriptor con error no impide que los demás reciban el evento"""
+        bus = BusEventos()
+        recibidos = []
+
+        def falla(tema, datos):
+            raise RuntimeError("widget destruido")
+
+        bus.suscribir("ventas", falla)
+        bus.suscribir("ventas", lambda t, d: recibidos.append(t))
+        bus.publicar("ventas")
+        assert recibidos == ["ventas"]
+
+
+class TestPublicarAlConfirmar:
+    """El evento sale solo si la transacción se confirma"""
+
+    def test_despues_del_commit_externo(self, clean_db, recibidos):
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn:
+                with get_db_connection() as interna:
+                    interna.execute("UPDATE productos SET cantidad = 1")
+                    publicar_al_confirmar("prueba", n=1)
+                # El bloque interno no confirma: todavía no se publica
+                assert recibidos == []
+            assert recibidos == [("prueba", {"n": 1})]
+
+    def test_rollback_descarta(self, clean_db, recibidos):
+        with patch('models.database.DB_PATH', clean_db):
+            with pytest.raises(RuntimeError):
+                with get_db_connection() as conn:
+                    publicar_al_confirmar("prueba")
+                    raise RuntimeError("falla")
+            # La siguiente transacción no arrastra el evento descartado
+            with get_db_connection() as conn:
+                pass
+        assert recibidos == []
+
+    def test_sin_transaccion_publica_ya(self, clean_db, recibidos):
+        with patch('models.database.DB_PATH', clean_db):
+            publicar_al_confirmar("prueba")
+        assert recibidos == [("prueba", {})]
+
+    def test_registrar_venta_publica(self, mock_tree, db_con_productos):
+        """registrar_venta anuncia la venta con los códigos descontados"""
+        from controllers.ventas import VentasController
+        ventas = []
+
+        def anotar(tema, datos):
+            ventas.append(datos)
+
+        eventos.bus.suscribir(eventos.VENTAS, anotar)
+        try:
+            with patch('models.database.DB_PATH', db_con_productos):
+                mock_tree.insert("", "end", values=(
+                    '7501234567890', 'ACETAMINOFEN', 1, 7000.0, 7000.0, ''
+                ))
+                assert VentasController.registrar_venta(mock_tree)
+        finally:
+            eventos.bus.desuscribir(eventos.VENTAS, anotar)
+
+        assert len(ventas) == 1
+        assert ventas[0]["codigos"] == ['7501234567890']
@@ -6,7 +6,8 @@ from utils.formatters import (
     format_precio_display,
     format_precio_miles,
     parse_precio_text,
-    clean_codigo_barras
+    clean_codigo_barras,
+    rango_fechas_sql
 )
 
 
@@ -251,6 +252,37 @@ def test_clean_codigo_parametrizado(codigo, esperado):
     assert clean_codigo_barras(codigo) == esperado
 
 
+class TestRangoFechasSql:
+    """Tests para límites de rango de fechas en consultas SQL"""
+    
+    def test_un_solo_dia(self):
+        """Un día produce [día, día siguiente)"""
+        assert rango_fechas_sql('2026-02-18') == ('2026-02-18', '2026-02-19')
+    
+    def test_rango_cruza_mes(self):
+        """El límite superior avanza al mes siguiente"""
+        assert rango_fechas_sql('2026-01-01', '2026-01-31') == ('2026-01-01', '2026-02-01')
+    
+    def test_acepta_date(self):
+        """Acepta objetos date"""
+        from datetime import date
+        assert rango_fechas_sql(date(2025, 12, 31)) == ('2025-12-31', '2026-01-01')
+    
+    def test_ignora_hora(self):
+        """Una fecha con hora se trunca al día"""
+        assert rango_fechas_sql('2026-02-18 15:30:00') == ('2026-02-18', '2026-02-19')
+    
+    def test_fecha_con_hora_queda_dentro_del_rango(self):
+        """Un timestamp del último día queda dentro de [inicio, fin)"""
+        inicio, fin = rango_fechas_sql('2026-02-18')
+        assert inicio <= '2026-02-18 23:59:59' < fin
+    
+    def test_fecha_invalida(self):
+        """Fecha inválida lanza ValueError"""
+        with pytest.raises(ValueError):
+            rango_fechas_sql('18/02/2026')
+
+
 # ============================================================
 # TESTS DE INTEGRACIÓN
 # ============================================================
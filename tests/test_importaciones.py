@@ -0,0 +1,126 @@
+"""
+Tests unitarios para utils/importaciones.py
+"""
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+from unittest.mock import patch
+
+from controllers.inventario import InventarioController
+from utils.importaciones import TrabajoImportacion, ImportacionCancelada, Progreso
+
+
+class WidgetFalso:
+    """Imita after() de Tk: los callbacks se ejecutan con correr()."""
+
+    def __init__(self):
+        self.pendientes = []
+
+    def after(self, ms, funcion):
+        self.pendientes.append(funcion)
+        return f"after#{len(self.pendientes)}"
+
+    def correr(self, limite=5.0):
+        fin = time.monotonic() + limite
+        while self.pendientes and time.monotonic() < fin:
+            self.pendientes.pop(0)()
+            time.sleep(0.005)
+
+
+class TestTrabajoImportacion:
+    """Tests para TrabajoImportacion"""
+
+    def _ejecutar(self, tarea, cancelar=False):
+        widget = WidgetFalso()
+        eventos = []
+        trabajo = TrabajoImportacion(
+            widget, tarea,
+            al_terminar=lambda r: eventos.append(("fin", r)),
+            al_progresar=lambda e: eventos.append(("progreso", e)),
+            al_fallar=lambda e: eventos.append(("error", e)),
+            al_cancelar=lambda: eventos.append(("cancelado", None)),
+        )
+        if cancelar:
+            trabajo.cancelar()
+        trabajo.iniciar()
+        widget.correr()
+        return trabajo, eventos
+
+    def test_resultado_y_progreso(self):
+        """El resultado llega en el hilo del widget, precedido del último avance"""
+        hilos = []
+
+        def tarea(progreso):
+            hilos.append(threading.current_thread())
+            progreso.reportar("Leyendo...", total=10, leidas=10, errores=1)
+            return 42
+
+        trabajo, eventos = self._ejecutar(tarea)
+
+        assert hilos[0] is not threading.current_thread()
+        assert eventos[-1] == ("fin", 42)
+        tipo, estado = eventos[-2]
+        assert tipo == "progreso"
+        assert estado["leidas"] == 10 and estado["errores"] == 1
+        assert not trabajo.activo
+
+    def test_cancelacion(self):
+        """verificar() lanza ImportacionCancelada y se llama al_cancelar"""
+        def tarea(progreso):
+            progreso.verificar()
+            return "no debería terminar"
+
+        _, eventos = self._ejecutar(tarea, cancelar=True)
+        assert eventos == [("cancelado", None)]
+
+    def test_error(self):
+        """Una excepción de la tarea se entrega a al_fallar"""
+        def tarea(progreso):
+            raise ValueError("archivo dañado")
+
+        _, eventos = self._ejecutar(tarea)
+        tipo, error = eventos[-1]
+        assert tipo == "error" and str(error) == "archivo dañado"
+
+
+class TestCancelarImportacionCatalogo:
+    """La cancelación revierte la transacción del catálogo"""
+
+    def test_cancelar_no_modifica_inventario(self, db_con_productos, tmp_path):
+        df = pd.DataFrame({
+            'EAN': [f"77{i:011d}" for i in range(30)] + ['7501234567890'],
+            'Denominación': ['NUEVO'] * 31,
+            'Venta Real': ['100'] * 31,
+        })
+        ruta = tmp_path / 'catalogo.xlsx'
+        df.to_excel(ruta, index=False)
+        progreso = Progreso()
+
+        # Cancelar justo después del primer lote escrito en la tabla temporal
+        # (el resto del archivo todavía no se leyó)
+        original = progreso.reportar
+        def reportar(mensaje=None, **contadores):
+            original(mensaje, **contadores)
+            if contadores.get('escritas'):
+                progreso._evento.set()
+        progreso.reportar = reportar
+
+        with patch('models.database.DB_PATH', db_con_productos), \
+             patch.object(InventarioController, 'LOTE_IMPORTACION', 10):
+            try:
+                InventarioController.importar_catalogo_excel(str(ruta), progreso)
+                assert False, "debió cancelarse"
+            except ImportacionCancelada:
+                pass
+
+        conn = sqlite3.connect(str(db_con_productos))
+        total = conn.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+        desc = conn.execute(
+            "SELECT descripcion FROM productos WHERE codigo_barras = '7501234567890'"
+        ).fetchone()[0]
+        conn.close()
+
+        assert total == 3
+        assert desc == 'ACETAMINOFEN 500MG X 20 TABS'
@@ -0,0 +1,190 @@
+"""
+Tests unitarios para controllers/inventario.py
+"""
+import sqlite3
+import pandas as pd
+from unittest.mock import patch
+from controllers.inventario import InventarioController
+
+
+def _catalogo_excel():
+    """DataFrame tal como lo entrega pd.read_excel(dtype=str)"""
+    return pd.DataFrame({
+        'EAN': ["'7501234567890", '7701111111111', '7701111111111', '123', None, '7702222222222'],
+        'Denominación': ['ACETAMINOFEN NUEVO', 'PRODUCTO NUEVO', 'DUPLICADO', 'CORTO', 'SIN EAN', 'SIN PRECIO'],
+        'Venta Real': ['5.500', '1200', '999', '100', '100', None],
+        'Cantidad': ['3', '7', '1', '1', '1', '1'],
+        'Impuesto': [' 19% IVA ', '19% IVA', '', '', '', ''],
+        '% Boni ': ['0', '2,5', None, None, None, None],
+        'Proveedor': ['GENFAR', 'MK', None, None, None, None],
+    })
+
+
+class TestActualizarDesdeExcel:
+    """Tests para actualizar_producto_desde_excel"""
+
+    def _importar(self, db, df, carpeta):
+        ruta = carpeta / 'catalogo.xlsx'
+        df.to_excel(ruta, index=False)
+        with patch('models.database.DB_PATH', db), \
+             patch('controllers.inventario.messagebox'):
+            return InventarioController.actualizar_producto_desde_excel(str(ruta))
+
+    def test_conteos(self, db_con_productos, tmp_path):
+        """Existente → actualizado, nuevo → insertado, EAN corto → error"""
+        resultado = self._importar(db_con_productos, _catalogo_excel(), tmp_path)
+        # Celda vacía y '123' cuentan como EAN inválido
+        assert resultado == (1, 1, 2)
+
+    def test_existente_solo_descripcion_y_precio(self, db_con_productos, tmp_path):
+        """Un EAN existente solo cambia descripcion y precio_compra"""
+        self._importar(db_con_productos, _catalogo_excel(), tmp_path)
+
+        conn = sqlite3.connect(str(db_con_productos))
+        fila = conn.execute("""
+            SELECT descripcion, precio_compra, precio_venta, cantidad, proveedor
+            FROM productos WHERE codigo_barras = '7501234567890'
+        """).fetchone()
+        conn.close()
+
+        assert fila == ('ACETAMINOFEN NUEVO', 5500.0, 7000.0, 100, 'GENFAR')
+
+    def test_nuevo_con_todos_los_campos(self, db_con_productos, tmp_path):
+        """Un EAN nuevo se inserta completo; el primer duplicado gana"""
+        self._importar(db_con_productos, _catalogo_excel(), tmp_path)
+
+        conn = sqlite3.connect(str(db_con_productos))
+        fila = conn.execute("""
+            SELECT descripcion, precio_compra, precio_venta, cantidad,
+                   impuesto, bonificacion, proveedor
+            FROM productos WHERE codigo_barras = '7701111111111'
+        """).fetchone()
+        total = conn.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+        conn.close()
+
+        assert fila == ('PRODUCTO NUEVO', 1200.0, 1200.0, 7, '19% IVA', 2.5, 'MK')
+        assert total == 4
+
+    def test_columnas_faltantes(self, db_con_productos, tmp_path):
+        """Sin columnas obligatorias no se toca la base"""
+        df = pd.DataFrame({'EAN': ['7701111111111'], 'Denominación': ['X']})
+        assert self._importar(db_con_productos, df, tmp_path) == (0, 0, 0)
+
+    def test_lotes_pequenos(self, db_con_productos, tmp_path):
+        """Leer en lotes de 2 filas da el mismo resultado (duplicado entre lotes incluido)"""
+        with patch.object(InventarioController, 'LOTE_IMPORTACION', 2):
+            resultado = self._importar(db_con_productos, _catalogo_excel(), tmp_path)
+        assert resultado == (1, 1, 2)
+
+        conn = sqlite3.connect(str(db_con_productos))
+        desc = conn.execute(
+            "SELECT descripcion FROM productos WHERE codigo_barras = '7701111111111'"
+        ).fetchone()[0]
+        conn.close()
+        assert desc == 'PRODUCTO NUEVO'
+
+
+class TestSincronizacionDiferencial:
+    """Solo se escriben las filas que cambiaron y queda registro"""
+
+    def _importar(self, db, df, carpeta):
+        ruta = carpeta / 'catalogo.xlsx'
+        df.to_excel(ruta, index=False)
+        with patch('models.database.DB_PATH', db):
+            return InventarioController.importar_catalogo_excel(str(ruta))
+
+    def test_reimportar_sin_cambios(self, db_con_productos, tmp_path):
+        """El mismo archivo dos veces: la segunda no escribe nada"""
+        assert self._importar(db_con_productos, _catalogo_excel(), tmp_path) == (1, 1, 2, 0)
+
+        conn = sqlite3.connect(str(db_con_productos))
+        antes = conn.execute("PRAGMA data_version").fetchone()[0]
+        assert self._importar(db_con_productos, _catalogo_excel(), tmp_path) == (0, 0, 2, 2)
+        despues = conn.execute("PRAGMA data_version").fetchone()[0]
+        conn.close()
+
+        assert antes == despues
+
+    def test_registro_de_cambios(self, db_con_productos, tmp_path):
+        """Se registra el valor anterior y el nuevo de lo que cambió"""
+        df = pd.DataFrame({
+            'EAN': ['7501234567890', '7501234567891'],
+            'Denominación': ['ACETAMINOFEN 500MG X 20 TABS', 'IBUPROFENO 400MG X 10 TABS'],
+            'Venta Real': ['5200', '8000'],
+        })
+        assert self._importar(db_con_productos, df, tmp_path) == (1, 0, 0, 1)
+
+        with patch('models.database.DB_PATH', db_con_productos):
+            cambios = InventarioController.obtener_cambios_catalogo()
+
+        assert len(cambios) == 1
+        cambio = cambios[0]
+        assert cambio['codigo_barras'] == '7501234567890'
+        assert cambio['tipo'] == 'actualizado'
+        assert (cambio['precio_anterior'], cambio['precio_nuevo']) == (5000.0, 5200.0)
+        assert cambio['origen'] == 'catalogo.xlsx'
+
+
+class TestBuscarYReemplazarPrecios:
+    """Tests para buscar_y_reemplazar_precios"""
+
+    def _reemplazar(self, db, *args):
+        with patch('models.database.DB_PATH', db), \
+             patch('controllers.inventario.messagebox') as mb:
+            mb.askyesno.return_value = True
+            n = InventarioController.buscar_y_reemplazar_precios(*args)
+        conn = sqlite3.connect(str(db))
+        precios = dict(
+            (r[0], (r[1], r[2])) for r in
+            conn.execute("SELECT codigo_barras, precio_compra, precio_venta FROM productos")
+        )
+        conn.close()
+        return n, precios, mb
+
+    def test_precio_fijo(self, db_con_productos):
+        """Valor fijo solo en los productos que coinciden"""
+        n, precios, _ = self._reemplazar(db_con_productos, 'tabs', '', '9000')
+        assert n == 3
+        assert precios['7501234567891'] == (8000.0, 9000.0)
+
+    def test_porcentaje_y_margen(self, db_con_productos):
+        """Compra +10 % y venta = compra nueva × (1 + 50 %), en un solo UPDATE"""
+        n, precios, _ = self._reemplazar(db_con_productos, 'ibuprofeno', '+10%', '', '50')
+        assert n == 1
+        assert precios['7501234567891'] == (8800.0, 13200.0)
+        # El resto no cambia
+        assert precios['7501234567890'] == (5000.0, 7000.0)
+
+    def test_entrada_invalida(self, db_con_productos):
+        """Un precio inválido no toca la base y muestra error"""
+        n, precios, mb = self._reemplazar(db_con_productos, 'tabs', 'abc', '')
+        assert n == 0
+        assert precios['7501234567890'] == (5000.0, 7000.0)
+        mb.showerror.assert_called_once()
+
+
+class TestLectorExcel:
+    """Tests para utils/lector_excel.LectorExcel"""
+
+    def test_lotes_como_texto(self, tmp_path):
+        """Entrega lotes de texto como pd.read_excel(dtype=str) y omite filas vacías"""
+        from utils.lector_excel import LectorExcel
+        from openpyxl import Workbook
+
+        ruta = tmp_path / 'datos.xlsx'
+        libro = Workbook()
+        hoja = libro.active
+        hoja.append([' EAN ', 'Precio'])
+        hoja.append([7501234567890, 1200.0])
+        hoja.append([None, None])
+        hoja.append(['0077', 5.5])
+        hoja.append([7701111111111, None])
+        libro.save(ruta)
+
+        with LectorExcel(str(ruta), tamano_lote=2) as lector:
+            assert lector.columnas == ['EAN', 'Precio']
+            lotes = list(lector.lotes())
+
+        assert [len(l) for l in lotes] == [2, 1]
+        filas = pd.concat(lotes).values.tolist()
+        assert filas == [['7501234567890', '1200'], ['0077', '5.5'], ['7701111111111', None]]
@@ -0,0 +1,92 @@
+"""
+Tests unitarios para utils/sugerencias.py
+"""
+import time
+
+from utils.sugerencias import BuscadorSugerencias
+
+
+class WidgetFalso:
+    """Imita after/after_cancel de Tk con una cola manual."""
+
+    def __init__(self):
+        self.pendientes = {}
+        self._siguiente = 0
+
+    def after(self, ms, funcion):
+        self._siguiente += 1
+        ident = f"after#{self._siguiente}"
+        self.pendientes[ident] = funcion
+        return ident
+
+    def after_cancel(self, ident):
+        self.pendientes.pop(ident, None)
+
+    def correr(self, limite=2.0):
+        """Ejecuta callbacks programados hasta vaciar la cola (o agotar el límite)."""
+        fin = time.monotonic() + limite
+        while self.pendientes and time.monotonic() < fin:
+            ident = next(iter(self.pendientes))
+            self.pendientes.pop(ident)()
+            time.sleep(0.001)
+
+
+class TestBuscadorSugerencias:
+    """Tests para BuscadorSugerencias"""
+
+    def _crear(self, buscar):
+        widget = WidgetFalso()
+        recibidos = []
+        buscador = BuscadorSugerencias(
+            widget, buscar, lambda t, r: recibidos.append((t, r)), demora_ms=0
+        )
+        return widget, buscador, recibidos
+
+    def test_debounce_una_sola_busqueda(self):
+        """Varias teclas seguidas generan una sola consulta con el último texto"""
+        consultas = []
+
+        def buscar(texto):
+            consultas.append(texto)
+            return [texto.upper()]
+
+        widget, buscador, recibidos = self._crear(buscar)
+        for texto in ("a", "as", "asp", "aspi"):
+            buscador.solicitar(texto)
+        widget.correr()
+
+        assert consultas == ["aspi"]
+        assert recibidos == [("aspi", ["ASPI"])]
+
+    def test_cancelar_descarta_resultado(self):
+        """Una respuesta que llega después de cancelar no se entrega"""
+        widget, buscador, recibidos = self._crear(lambda t: [t])
+        buscador.solicitar("ibu")
+        # Lanzar la búsqueda y cancelar antes de revisar la respuesta
+        widget.pendientes.pop(next(iter(widget.pendientes)))()
+        time.sleep(0.05)
+        buscador.cancelar()
+        widget.correr()
+
+        assert recibidos == []
+        assert widget.pendientes == {}
+
+    def test_texto_vacio_no_busca(self):
+        """solicitar('') solo cancela lo pendiente"""
+        widget, buscador, recibidos = self._crear(lambda t: [t])
+        buscador.solicitar("x")
+        buscador.solicitar("")
+        widget.correr()
+
+        assert recibidos == []
+
+    def test_error_entrega_lista_vacia(self):
+        """Si la búsqueda falla, el callback recibe []"""
+        def buscar(texto):
+            raise RuntimeError("bd bloqueada")
+
+        widget, buscador, recibidos = self._crear(buscar)
+        buscador.solicitar("amox")
+        widget.correr()
+
+        assert recibidos == [("amox", [])]
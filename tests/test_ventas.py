@@ -258,6 +258,175 @@ class TestRegistrarVenta:
                 assert resultado == False
                 mock_error.assert_called_once()
 
+    
+    def test_lineas_repetidas_se_suman_para_validar(self, mock_tree, db_con_productos):
+        """Dos líneas del mismo producto se validan contra el stock total"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            with patch('tkinter.messagebox.showerror') as mock_error:
+                for _ in range(2):
+                    mock_tree.insert("", "end", values=(
+                        '7501234567892', 'LORATADINA', 3, 3000.0, 9000.0, ''
+                    ))
+                
+                assert VentasController.registrar_venta(mock_tree) == False
+                mock_error.assert_called_once()
+            
+            from models.database import DatabaseManager
+            assert DatabaseManager.buscar_producto_por_codigo('7501234567892')['cantidad'] == 5
+    
+    def test_kit_y_linea_del_mismo_producto(self, mock_tree, db_con_productos):
+        """Componente de kit y línea normal descuentan del mismo stock"""
+        componentes = [{"codigo": "7501234567892", "descripcion": "LORATADINA",
+                        "descuento_cajas": 0.5, "costo_prop": 1500.0,
+                        "precio_interno": 2000.0}]
+        with patch('models.database.DB_PATH', db_con_productos):
+            mock_tree.insert("", "end", values=(
+                '7501234567892', 'LORATADINA', 4, 3000.0, 12000.0, ''
+            ))
+            mock_tree.insert("", "end", values=(
+                'KIT', 'KIT', 1, 2000.0, 2000.0, 'KIT', json.dumps(componentes)
+            ))
+            
+            assert VentasController.registrar_venta(mock_tree) == True
+            
+            from models.database import DatabaseManager
+            assert DatabaseManager.buscar_producto_por_codigo('7501234567892')['cantidad'] == pytest.approx(0.5)
+    
+    def test_stock_se_lee_en_una_consulta(self, mock_tree, db_con_productos):
+        """La validación no hace un SELECT por línea"""
+        from models.database import get_db_connection
+        sentencias = []
+        with patch('models.database.DB_PATH', db_con_productos):
+            for _ in range(20):
+                mock_tree.insert("", "end", values=(
+                    '7501234567890', 'ACETAMINOFEN', 1, 5000.0, 5000.0, ''
+                ))
+            with get_db_connection() as conn:
+                conn.set_trace_callback(sentencias.append)
+            try:
+                assert VentasController.registrar_venta(mock_tree) == True
+            finally:
+                with get_db_connection() as conn:
+                    conn.set_trace_callback(None)
+        
+        lecturas = [s for s in sentencias if s.lstrip().startswith("SELECT") and "FROM productos" in s]
+        assert len(lecturas) == 1
+        assert any(s.startswith("BEGIN IMMEDIATE") for s in sentencias)
+    
+    def test_venta_solo_servicios(self, mock_tree, db_con_productos):
+        """Un ticket sin productos de inventario se registra sin descontar stock"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            mock_tree.insert("", "end", values=(
+                'SVC-INY', 'INYECTOLOGIA', 1, 3000.0, 3000.0, ''
+            ))
+            
+            assert VentasController.registrar_venta(mock_tree) == True
+
+class TestVentaItems:
+    """Tests para las líneas normalizadas en venta_items"""
+    
+    def test_registrar_venta_escribe_items(self, mock_tree, db_con_productos):
+        """Cada línea del ticket queda en venta_items"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            mock_tree.insert("", "end", values=(
+                '7501234567890', 'ACETAMINOFEN', 5, 5000.0, 25000.0, ''
+            ))
+            mock_tree.insert("", "end", values=(
+                '7501234567891', 'IBUPROFENO', 2, 8000.0, 16000.0, '19% IVA'
+            ))
+            
+            assert VentasController.registrar_venta(mock_tree) == True
+            
+            items = VentasController.obtener_items_venta(1)
+            assert len(items) == 2
+            assert items[0]['codigo_barras'] == '7501234567890'
+            assert items[0]['cantidad'] == 5
+            assert items[0]['precio_unitario'] == 5000.0
+            assert items[1]['impuesto'] == '19% IVA'
+            assert all(i['es_kit'] == 0 for i in items)
+    
+    def test_registrar_kit_escribe_componentes(self, mock_tree, db_con_productos):
+        """Un kit genera la línea KIT y una línea hija por componente"""
+        componentes = [
+            {"codigo": "7501234567890", "descripcion": "ACETAMINOFEN",
+             "descuento_cajas": 0.5, "costo_prop": 2500.0, "precio_interno": 3000.0},
+            {"codigo": "7501234567892", "descripcion": "LORATADINA",
+             "descuento_cajas": 0.2, "costo_prop": 600.0, "precio_interno": 900.0},
+        ]
+        with patch('models.database.DB_PATH', db_con_productos):
+            mock_tree.insert("", "end", values=(
+                'KIT', 'KIT PRUEBA', 1, 3900.0, 3900.0, 'KIT', json.dumps(componentes)
+            ))
+            
+            assert VentasController.registrar_venta(mock_tree) == True
+            
+            items = VentasController.obtener_items_venta(1)
+            assert len(items) == 3
+            kit = items[0]
+            assert kit['codigo_barras'] == 'KIT'
+            assert kit['es_kit'] == 1
+            assert kit['costo_unitario'] == pytest.approx(3100.0)
+            hijos = [i for i in items if i['id_padre'] == kit['id']]
+            assert [h['codigo_barras'] for h in hijos] == ['7501234567890', '7501234567892']
+            assert hijos[0]['cantidad'] == pytest.approx(0.5)
+            assert hijos[0]['costo_unitario'] == pytest.approx(5000.0)
+    
+    def test_venta_fallida_no_deja_items(self, mock_tree, db_con_productos):
+        """Si la venta se revierte, no quedan líneas huérfanas"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            with patch('tkinter.messagebox.showerror'):
+                mock_tree.insert("", "end", values=(
+                    '7501234567892', 'LORATADINA', 10, 3000.0, 30000.0, ''
+                ))
+                
+                assert VentasController.registrar_venta(mock_tree) == False
+            
+            from models.database import get_db_connection
+            with get_db_connection() as conn:
+                n = conn.execute("SELECT COUNT(*) FROM venta_items").fetchone()[0]
+                assert n == 0
+
+    
+    def test_costo_congelado_al_vender(self, mock_tree, db_con_productos):
+        """El costo guardado no cambia si luego se actualiza el precio de compra"""
+        from models.database import get_db_connection
+        with patch('models.database.DB_PATH', db_con_productos):
+            mock_tree.insert("", "end", values=(
+                '7501234567891', 'IBUPROFENO', 1, 12000.0, 12000.0, '19% IVA'
+            ))
+            assert VentasController.registrar_venta(mock_tree) == True
+            
+            with get_db_connection() as conn:
+                conn.execute(
+                    "UPDATE productos SET precio_compra = 20000 "
+                    "WHERE codigo_barras = '7501234567891'"
+                )
+            
+            items = VentasController.obtener_items_venta(1)
+            assert items[0]['costo_unitario'] == pytest.approx(9520.0)
+            hoy = datetime.now().strftime('%Y-%m-%d')
+            resumen = VentasController.resumen_costos_periodo(hoy, hoy)
+            assert resumen['costo'] == pytest.approx(9520.0)
+    
+    def test_rellenar_costos_historicos(self, db_con_productos):
+        """Las líneas antiguas sin costo se completan con el costo actual"""
+        from models.database import DatabaseManager, get_db_connection
+        with patch('models.database.DB_PATH', db_con_productos):
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("INSERT INTO ventas (fecha, total) VALUES ('2025-01-01 10:00:00', 1)")
+                DatabaseManager.insertar_items_venta(cursor, cursor.lastrowid, [
+                    {'codigo': '7501234567891', 'cantidad': 2},
+                    {'codigo': 'SVC-01', 'cantidad': 1},
+                    {'codigo': 'NO-EXISTE', 'cantidad': 1},
+                ])
+            
+            assert DatabaseManager.rellenar_costos_venta_items() == 2
+            items = VentasController.obtener_items_venta(1)
+            assert items[0]['costo_unitario'] == pytest.approx(9520.0)
+            assert items[1]['costo_unitario'] == 0
+            assert items[2]['costo_unitario'] is None
+            assert DatabaseManager.rellenar_costos_venta_items() == 0
 
 class TestObtenerHistorialVentas:
     """Tests para obtener_historial_ventas"""
@@ -368,6 +537,305 @@ class TestCalcularTotalVentasPeriodo:
             assert totales['promedio_venta'] == 0.0
 
 
+class TestObtenerVentasRango:
+    """Tests para obtener_ventas_rango"""
+
+    @staticmethod
+    def _insertar(db, filas):
+        import sqlite3
+        conn = sqlite3.connect(db)
+        conn.executemany(
+            "INSERT INTO ventas (fecha, total, productos, cajero, metodo_pago) "
+            "VALUES (?, ?, '[]', ?, ?)", filas
+        )
+        conn.commit()
+        conn.close()
+
+    def test_rango_inclusivo_y_orden(self, clean_db):
+        """Incluye el último día completo y ordena de más reciente a más antigua"""
+        self._insertar(clean_db, [
+            ('2026-02-28 23:59:59', 100.0, 'Principal', 'Efectivo'),
+            ('2026-03-01 08:00:00', 200.0, 'Principal', 'Efectivo'),
+            ('2026-03-31 23:59:59', 300.0, 'Principal', 'Nequi'),
+            ('2026-04-01 00:00:00', 400.0, 'Principal', 'Efectivo'),
+        ])
+        with patch('models.database.DB_PATH', clean_db):
+            ventas = list(VentasController.obtener_ventas_rango('2026-03-01', '2026-03-31'))
+
+        assert [v['total'] for v in ventas] == [300.0, 200.0]
+        assert 'productos' not in ventas[0]
+
+    def test_filtro_metodo_y_cajero(self, clean_db):
+        """Los filtros opcionales se aplican en SQL"""
+        self._insertar(clean_db, [
+            ('2026-03-01 08:00:00', 200.0, 'Ana', 'Efectivo'),
+            ('2026-03-01 09:00:00', 300.0, 'Ana', 'Nequi'),
+            ('2026-03-01 10:00:00', 400.0, 'Luis', 'Nequi'),
+        ])
+        with patch('models.database.DB_PATH', clean_db):
+            nequi = list(VentasController.obtener_ventas_rango(
+                '2026-03-01', '2026-03-01', metodo='Nequi'))
+            ana_nequi = list(VentasController.obtener_ventas_rango(
+                '2026-03-01', '2026-03-01', metodo='Nequi', cajero='Ana'))
+
+        assert len(nequi) == 2
+        assert [v['total'] for v in ana_nequi] == [300.0]
+
+    def test_lotes_con_fechas_repetidas(self, clean_db):
+        """La clave (fecha, id_venta) no repite ni pierde ventas entre lotes"""
+        self._insertar(clean_db, [
+            ('2026-03-01 08:00:00', float(i), 'Principal', 'Efectivo') for i in range(7)
+        ])
+        with patch('models.database.DB_PATH', clean_db):
+            ventas = list(VentasController.obtener_ventas_rango('2026-03-01', '2026-03-01', lote=3))
+
+        assert sorted(v['total'] for v in ventas) == [float(i) for i in range(7)]
+        assert [v['id'] for v in ventas] == sorted((v['id'] for v in ventas), reverse=True)
+
+    def test_iteracion_parcial_no_deja_bloque_abierto(self, clean_db):
+        """Detener el generador a mitad no retiene la transacción del hilo"""
+        import models.database as database
+        self._insertar(clean_db, [
+            ('2026-03-01 08:00:00', float(i), 'Principal', 'Efectivo') for i in range(5)
+        ])
+        with patch('models.database.DB_PATH', clean_db):
+            ventas = VentasController.obtener_ventas_rango('2026-03-01', '2026-03-01', lote=2)
+            next(ventas)
+            with database.get_db_connection() as conn:
+                conn.execute("DELETE FROM ventas WHERE total = 4.0")
+
+            import sqlite3
+            otra = sqlite3.connect(clean_db)
+            assert otra.execute("SELECT COUNT(*) FROM ventas").fetchone()[0] == 4
+            otra.close()
+            ventas.close()
+
+    def test_productos_bajo_demanda(self, mock_tree, db_con_productos):
+        """n_productos viene de venta_items y el JSON se decodifica al pedirlo"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            mock_tree.insert("", "end", values=(
+                '7501234567890', 'ACETAMINOFEN', 2, 5000.0, 10000.0, ''
+            ))
+            VentasController.registrar_venta(mock_tree)
+            hoy = datetime.now().strftime('%Y-%m-%d')
+            venta = next(VentasController.obtener_ventas_rango(hoy, hoy))
+
+            assert venta['n_productos'] == 1
+            productos = VentasController.productos_de_venta(venta)
+
+        assert productos[0]['codigo'] == '7501234567890'
+        assert venta['productos'] is productos
+
+
+class TestResumenCostosPeriodo:
+    """Tests para resumen_costos_periodo"""
+
+    def test_costo_producto_iva_kit_y_servicio(self, clean_db):
+        """Aplica IVA al costo, usa el costo guardado del kit e ignora servicios"""
+        from models.database import DatabaseManager, get_db_connection
+        with patch('models.database.DB_PATH', clean_db):
+            with get_db_connection() as conn:
+                conn.executemany(
+                    "INSERT INTO productos (codigo_barras, descripcion, proveedor, unidad, "
+                    "cantidad, precio_compra, precio_venta, impuesto, fecha_vencimiento) "
+                    "VALUES (?, ?, 'P', 'UND', 10, ?, ?, ?, '2030-01-01')",
+                    [('A', 'CON IVA', 10000.0, 15000.0, '19%  IVA'),
+                     ('B', 'EXENTO', 1000.0, 2000.0, 'Exento')]
+                )
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO ventas (fecha, total, productos) "
+                    "VALUES ('2026-03-10 10:00:00', 40000.0, '[]')"
+                )
+                DatabaseManager.insertar_items_venta(cursor, cursor.lastrowid, [
+                    {'codigo': 'A', 'cantidad': 1, 'subtotal': 15000.0},
+                    {'codigo': 'B', 'cantidad': 3, 'subtotal': 6000.0},
+                    {'codigo': 'SVC-1', 'cantidad': 1, 'subtotal': 4000.0},
+                    {'codigo': 'KIT', 'cantidad': 1, 'subtotal': 15000.0,
+                     'costo_base': 5000.0, 'es_kit': True,
+                     'componentes': [{'codigo': 'B', 'descuento_cajas': 1,
+                                      'costo_prop': 5000.0, 'precio_interno': 15000.0}]},
+                ])
+                # Venta fuera del rango
+                conn.execute(
+                    "INSERT INTO ventas (fecha, total, productos) "
+                    "VALUES ('2026-04-01 00:00:00', 999.0, '[]')"
+                )
+
+            resumen = VentasController.resumen_costos_periodo('2026-03-01', '2026-03-31')
+
+        assert resumen['num_ventas'] == 1
+        assert resumen['total'] == 40000.0
+        assert resumen['costo'] == pytest.approx(11900.0 + 3000.0 + 5000.0)
+        assert resumen['ganancia'] == pytest.approx(40000.0 - 19900.0)
+        assert resumen['utilidad_pct'] == pytest.approx(50.25)
+
+    def test_periodo_vacio(self, clean_db):
+        """Sin ventas todo es cero"""
+        with patch('models.database.DB_PATH', clean_db):
+            resumen = VentasController.resumen_costos_periodo('2026-01-01', '2026-01-31')
+
+        assert resumen == {'num_ventas': 0, 'total': 0.0, 'costo': 0.0,
+                           'ganancia': 0.0, 'utilidad_pct': 0.0}
+
+
+class TestBalancePorMetodo:
+    """Tests para balance_por_metodo"""
+
+    def test_balance_agrupa_por_metodo_y_periodo(self, clean_db):
+        """Hoy / Mes / Año se separan por rango de fecha"""
+        import sqlite3
+        from datetime import date
+        conn = sqlite3.connect(clean_db)
+        conn.executemany(
+            "INSERT INTO ventas (fecha, total, productos, cajero, metodo_pago) "
+            "VALUES (?, ?, '[]', 'test', ?)",
+            [
+                ('2026-03-15 10:00:00', 1000.0, 'Efectivo'),
+                ('2026-03-02 09:00:00', 2000.0, 'Efectivo'),
+                ('2026-01-10 18:30:00', 4000.0, 'Nequi'),
+                ('2025-12-31 23:59:59', 8000.0, 'Efectivo'),
+            ]
+        )
+        conn.commit()
+        conn.close()
+
+        with patch('models.database.DB_PATH', clean_db):
+            balance = VentasController.balance_por_metodo(date(2026, 3, 15))
+
+        assert balance['Efectivo'] == [1000.0, 3000.0, 3000.0]
+        assert balance['Nequi'] == [0.0, 0.0, 4000.0]
+
+    def test_balance_sin_ventas(self, clean_db):
+        """Sin ventas retorna diccionario vacío"""
+        with patch('models.database.DB_PATH', clean_db):
+            assert VentasController.balance_por_metodo() == {}
+
+
+class TestResumenVentasDiario:
+    """Tests para resumen_ventas_diario (mantenido por registrar_venta)"""
+
+    @staticmethod
+    def _resumen(db):
+        import sqlite3
+        conn = sqlite3.connect(db)
+        filas = conn.execute(
+            "SELECT metodo_pago, num_ventas, total, costo FROM resumen_ventas_diario "
+            "ORDER BY metodo_pago"
+        ).fetchall()
+        conn.close()
+        return filas
+
+    def test_registrar_venta_acumula(self, mock_tree, db_con_productos):
+        """Cada venta suma conteo, total y costo a su día × método"""
+        with patch('models.database.DB_PATH', db_con_productos):
+            for metodo in ('Efectivo', 'Efectivo', 'Nequi'):
+                mock_tree.delete(*mock_tree.get_children())
+                mock_tree.insert("", "end", values=(
+                    '7501234567891', 'IBUPROFENO', 2, 11900.0, 23800.0, '19% IVA'
+                ))
+                assert VentasController.registrar_venta(mock_tree, metodo)
+
+        # Costo: 2 × 8000 × 1.19 (IVA) por venta
+        assert self._resumen(db_con_productos) == [
+            ('Efectivo', 2, 47600.0, pytest.approx(38080.0)),
+            ('Nequi', 1, 23800.0, pytest.approx(19040.0)),
+        ]
+
+    def test_recalcular_tras_borrar(self, mock_tree, db_con_productos):
+        """Reiniciar (borrar ventas + recalcular) deja el resumen igual a ventas"""
+        from models.database import DatabaseManager, get_db_connection
+        with patch('models.database.DB_PATH', db_con_productos):
+            mock_tree.insert("", "end", values=(
+                '7501234567890', 'ACETAMINOFEN', 1, 7000.0, 7000.0, ''
+            ))
+            VentasController.registrar_venta(mock_tree)
+            with get_db_connection() as conn:
+                conn.execute(
+                    "INSERT INTO ventas (fecha, total, productos) "
+                    "VALUES ('2026-01-10 10:00:00', 500.0, '[]')"
+                )
+                DatabaseManager.recalcular_resumen_diario(conn.cursor(), '2026-01-10', '2026-01-10')
+                hoy = datetime.now().strftime('%Y-%m-%d')
+                conn.execute("DELETE FROM ventas WHERE fecha >= ?", (hoy,))
+                DatabaseManager.recalcular_resumen_diario(conn.cursor(), hoy, hoy)
+
+        assert self._resumen(db_con_productos) == [('Efectivo', 1, 500.0, 0.0)]
+
+
+class TestVentasPorPeriodo:
+    """Tests para ventas_por_periodo (sobre resumen_ventas_diario)"""
+
+    @staticmethod
+    def _resumen(db):
+        import sqlite3
+        conn = sqlite3.connect(db)
+        conn.executemany(
+            "INSERT INTO resumen_ventas_diario VALUES (?, ?, ?, ?, ?)",
+            [('2026-03-02', 'Efectivo', 2, 1000.0, 600.0),     # lunes
+             ('2026-03-02', 'Nequi', 1, 500.0, 200.0),
+             ('2026-03-08', 'Efectivo', 1, 100.0, 50.0),       # domingo
+             ('2026-03-17', 'Efectivo', 1, 300.0, 100.0),
+             ('2026-05-01', 'Efectivo', 1, 700.0, 300.0),
+             ('2026-06-01', 'Efectivo', 9, 9999.0, 0.0)]       # fuera del rango
+        )
+        conn.commit()
+        conn.close()
+
+    def test_por_dia_rellena_ceros(self, clean_db):
+        self._resumen(clean_db)
+        with patch('models.database.DB_PATH', clean_db):
+            serie = VentasController.ventas_por_periodo('dia', '2026-03-01', '2026-03-03')
+
+        assert [(str(p['inicio']), p['num_ventas'], p['total']) for p in serie] == [
+            ('2026-03-01', 0, 0.0), ('2026-03-02', 3, 1500.0), ('2026-03-03', 0, 0.0)
+        ]
+
+    def test_por_semana_y_mes(self, clean_db):
+        self._resumen(clean_db)
+        with patch('models.database.DB_PATH', clean_db):
+            semanas = VentasController.ventas_por_periodo('semana', '2026-03-02', '2026-03-22')
+            meses = VentasController.ventas_por_periodo('mes', '2026-03-01', '2026-05-31')
+
+        assert [(str(p['inicio']), p['total']) for p in semanas] == [
+            ('2026-03-02', 1600.0), ('2026-03-09', 0.0), ('2026-03-16', 300.0)
+        ]
+        assert [(str(p['inicio']), p['total'], p['costo']) for p in meses] == [
+            ('2026-03-01', 1900.0, 950.0), ('2026-04-01', 0.0, 0.0), ('2026-05-01', 700.0, 300.0)
+        ]
+
+    def test_granularidad_invalida(self):
+        with pytest.raises(ValueError):
+            VentasController.ventas_por_periodo('hora', '2026-03-01', '2026-03-02')
+
+
+class TestVentasPorProducto:
+    """Tests para el contador ventas_por_producto"""
+
+    def test_registrar_venta_cuenta_una_vez_por_venta(self, mock_tree, db_con_productos):
+        """Dos líneas del mismo código en una venta = 1 vez, unidades sumadas"""
+        import sqlite3
+        with patch('models.database.DB_PATH', db_con_productos):
+            for _ in range(2):
+                mock_tree.delete(*mock_tree.get_children())
+                for cant in (1, 2):
+                    mock_tree.insert("", "end", values=(
+                        '7501234567890', 'ACETAMINOFEN', cant, 7000.0, 7000.0 * cant, ''
+                    ))
+                assert VentasController.registrar_venta(mock_tree)
+
+        conn = sqlite3.connect(db_con_productos)
+        fila = conn.execute(
+            "SELECT veces_vendido, unidades_vendidas, ultima_venta FROM ventas_por_producto"
+        ).fetchall()
+        conn.close()
+
+        assert len(fila) == 1
+        veces, unidades, ultima = fila[0]
+        assert (veces, unidades) == (2, 6.0)
+        assert ultima.startswith(datetime.now().strftime('%Y-%m-%d'))
+
+
 # ============================================================
 # TESTS DE INTEGRACIÓN
 # ============================================================
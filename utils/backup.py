@@ -1,14 +1,37 @@
 """
 Sistema de respaldo automático de base de datos
 Gestiona backups manuales, automáticos y restauración
+✅ NUEVO: Backups incrementales por páginas (.inc) para los automáticos y
+   previos a operaciones críticas:
+   - El archivo se parte en bloques de PAGINAS_POR_BLOQUE páginas y cada
+     bloque se guarda una sola vez en backups/paginas/, con su SHA-256 como
+     nombre. Un backup es un manifiesto con la lista de bloques: solo se
+     escriben los bloques que cambiaron desde cualquier backup anterior.
+   - Al crear se usa PRAGMA quick_check (rápido); la verificación completa
+     (hashes de todos los bloques + integrity_check del último backup) se
+     programa cada DIAS_VERIFICACION_COMPLETA días.
+   - Restaurar reconstruye el archivo en un temporal, lo verifica y lo
+     reemplaza de forma atómica.
+✅ NUEVO: Copias completas comprimidas (.dbz, zlib o lzma según
+   BACKUP_COMPRESION): se comprimen por tramos mientras se leen y llevan un
+   encabezado con tipo, descripción, conteo de filas y SHA-256, así
+   listar_backups no necesita descomprimir nada.
 """
 import sqlite3
 import shutil
+import hashlib
+import json
 import logging
+import lzma
+import os
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List
-from config.settings import DB_PATH, BASE_DIR
+from config.settings import DB_PATH, BASE_DIR, BACKUP_COMPRESION
 
 
 class BackupManager:
@@ -25,6 +48,22 @@ class BackupManager:
     AUTO = "auto"
     PRE_OPERATION = "pre_op"
 
+    # Backups incrementales
+    EXT_INCREMENTAL = ".inc"
+    PAGINAS_POR_BLOQUE = 16             # 64 KB con páginas de 4 KB
+    DIAS_VERIFICACION_COMPLETA = 7
+
+    # Copias completas comprimidas
+    EXT_COMPRIMIDO = ".dbz"
+    COMPRESION = BACKUP_COMPRESION
+    FIRMA_COMPRIMIDO = b"FARMATRACK-BACKUP\n"
+    TAM_ENCABEZADO = 8192               # reservado al inicio; se reescribe con el SHA-256 al final
+    TAM_TRAMO = 1024 * 1024             # bytes leídos y comprimidos por vez
+    _COMPRESORES = {
+        "zlib": (lambda: zlib.compressobj(6), zlib.decompressobj),
+        "lzma": (lzma.LZMACompressor, lzma.LZMADecompressor),
+    }
+
     def __init__(self):
         """Inicializa el gestor de backups"""
         self._crear_directorio_backups()
@@ -34,13 +73,20 @@ class BackupManager:
         self.BACKUP_DIR.mkdir(exist_ok=True)
         logging.info(f"Directorio de backups: {self.BACKUP_DIR}")
 
-    def crear_backup(self, tipo: str = MANUAL, descripcion: str = "") -> Optional[Path]:
+    def crear_backup(self, tipo: str = MANUAL, descripcion: str = "",
+                     incremental: Optional[bool] = None,
+                     comprimir: Optional[bool] = None) -> Optional[Path]:
         """
         Crea un respaldo de la base de datos
         
         Args:
             tipo: Tipo de backup (manual, auto, pre_op)
             descripcion: Descripción del backup
+            incremental: True → manifiesto .inc con bloques deduplicados;
+                False → copia .db completa. Por defecto solo los manuales
+                son copias completas (se pueden llevar a otro equipo).
+            comprimir: copia completa como .dbz (por defecto, si
+                BACKUP_COMPRESION está configurado)
             
         Returns:
             Path del archivo de backup creado o None si falla
@@ -62,6 +108,26 @@ class BackupManager:
 
             ruta_backup = self.BACKUP_DIR / nombre_backup
 
+            if incremental is None:
+                incremental = tipo != self.MANUAL
+            if incremental:
+                ruta_backup = ruta_backup.with_suffix(self.EXT_INCREMENTAL)
+                if not self._backup_incremental(DB_PATH, ruta_backup, tipo, descripcion):
+                    return None
+                logging.info(f"Backup incremental creado exitosamente: {ruta_backup}")
+                self._limpiar_backups_antiguos()
+                return ruta_backup
+
+            if comprimir is None:
+                comprimir = bool(self.COMPRESION)
+            if comprimir:
+                ruta_backup = ruta_backup.with_suffix(self.EXT_COMPRIMIDO)
+                if not self._backup_comprimido(DB_PATH, ruta_backup, tipo, descripcion):
+                    return None
+                logging.info(f"Backup comprimido creado exitosamente: {ruta_backup}")
+                self._limpiar_backups_antiguos()
+                return ruta_backup
+
             # Realizar backup usando SQLite backup API (más seguro que shutil.copy)
             self._backup_sqlite(DB_PATH, ruta_backup)
 
@@ -104,6 +170,322 @@ class BackupManager:
             conn_origen.close()
             conn_destino.close()
 
+    # ══════════════════════════════════════════════════════════════════════════
+    # BACKUPS INCREMENTALES (BLOQUES DE PÁGINAS DEDUPLICADOS)
+    # ══════════════════════════════════════════════════════════════════════════
+
+    @property
+    def dir_paginas(self) -> Path:
+        return self.BACKUP_DIR / "paginas"
+
+    def _ruta_bloque(self, hash_bloque: str) -> Path:
+        return self.dir_paginas / hash_bloque[:2] / hash_bloque
+
+    def _backup_incremental(self, origen: Path, destino: Path, tipo: str, descripcion: str) -> bool:
+        """
+        Guarda los bloques de la BD que no estén ya en el almacén y escribe
+        el manifiesto `destino`. Retorna False si quick_check falla.
+        """
+        with self._imagen_consistente(origen) as (imagen, conn):
+            if conn.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                logging.error("La base de datos no pasó quick_check; backup cancelado")
+                return False
+            tam_pagina = conn.execute("PRAGMA page_size").fetchone()[0]
+            paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+
+            with open(imagen, "rb") as archivo:
+                bloques, nuevos = self._guardar_bloques(archivo, tam_pagina, paginas)
+
+        manifiesto = {
+            "formato": "incremental",
+            "version": 1,
+            "tipo": tipo,
+            "descripcion": descripcion,
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "tam_pagina": tam_pagina,
+            "paginas": paginas,
+            "tamano": tam_pagina * paginas,
+            "tam_bloque": tam_pagina * self.PAGINAS_POR_BLOQUE,
+            "bloques": bloques,
+        }
+        temporal_manifiesto = destino.with_suffix(".tmp")
+        temporal_manifiesto.write_text(json.dumps(manifiesto), encoding="utf-8")
+        os.replace(temporal_manifiesto, destino)
+
+        logging.info(f"Backup incremental: {len(bloques)} bloques, {nuevos} nuevos escritos")
+        return True
+
+    @contextmanager
+    def _imagen_consistente(self, origen: Path):
+        """
+        Entrega (ruta, conexión) de una imagen de la BD que no cambia mientras
+        dure el bloque: el propio archivo con los escritores bloqueados o, si
+        un lector impide vaciar el WAL, una copia hecha con la API de backup.
+        """
+        conn = sqlite3.connect(str(origen), isolation_level=None)
+        temporal = None
+        try:
+            imagen = origen
+            if not self._bloquear_archivo(conn):
+                logging.warning("No se pudo vaciar el WAL; backup desde copia completa")
+                temporal = tempfile.TemporaryDirectory(dir=self.BACKUP_DIR)
+                imagen = Path(temporal.name) / "imagen.db"
+                self._backup_sqlite(origen, imagen)
+                conn.close()
+                conn = sqlite3.connect(str(imagen), isolation_level=None)
+            yield imagen, conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.close()
+            if temporal is not None:
+                temporal.cleanup()
+
+    @staticmethod
+    def _bloquear_archivo(conn: sqlite3.Connection, intentos: int = 3) -> bool:
+        """
+        Pasa el WAL al archivo principal y toma el bloqueo de escritura
+        (BEGIN IMMEDIATE). Si todo el WAL quedó copiado y nadie confirmó nada
+        entretanto, el archivo no cambia hasta el ROLLBACK. El checkpoint es
+        PASSIVE: nunca espera; retorna False si un lector impidió completarlo.
+        """
+        for _ in range(intentos):
+            antes = conn.execute("PRAGMA data_version").fetchone()[0]
+            ocupado, en_wal, copiadas = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            conn.execute("BEGIN IMMEDIATE")
+            despues = conn.execute("PRAGMA data_version").fetchone()[0]
+            if not ocupado and en_wal == copiadas and antes == despues:
+                return True
+            conn.execute("ROLLBACK")
+        return False
+
+    def _guardar_bloques(self, archivo, tam_pagina: int, paginas: int):
+        """Lee el archivo por bloques; escribe solo los que no existen. Retorna (hashes, nuevos)"""
+        tam_bloque = tam_pagina * self.PAGINAS_POR_BLOQUE
+        restante = tam_pagina * paginas
+        bloques, nuevos = [], 0
+        while restante > 0:
+            datos = archivo.read(min(tam_bloque, restante))
+            if not datos:
+                break
+            restante -= len(datos)
+            hash_bloque = hashlib.sha256(datos).hexdigest()
+            ruta = self._ruta_bloque(hash_bloque)
+            if not ruta.exists():
+                ruta.parent.mkdir(parents=True, exist_ok=True)
+                temporal = ruta.with_suffix(".tmp")
+                temporal.write_bytes(datos)
+                os.replace(temporal, ruta)
+                nuevos += 1
+            bloques.append(hash_bloque)
+        return bloques, nuevos
+
+    @staticmethod
+    def _leer_manifiesto(ruta: Path) -> dict:
+        return json.loads(ruta.read_text(encoding="utf-8"))
+
+    def _materializar(self, ruta_backup: Path, destino: Path):
+        """Escribe en `destino` el archivo .db completo del backup (copia, reconstrucción o descompresión)"""
+        if ruta_backup.suffix == self.EXT_COMPRIMIDO:
+            self._descomprimir(ruta_backup, destino)
+            return
+        if ruta_backup.suffix != self.EXT_INCREMENTAL:
+            shutil.copy2(ruta_backup, destino)
+            return
+        with open(destino, "wb") as archivo:
+            for hash_bloque in self._leer_manifiesto(ruta_backup)["bloques"]:
+                datos = self._ruta_bloque(hash_bloque).read_bytes()
+                if hashlib.sha256(datos).hexdigest() != hash_bloque:
+                    raise ValueError(f"Bloque dañado en {ruta_backup.name}: {hash_bloque}")
+                archivo.write(datos)
+
+    def _recolectar_bloques(self):
+        """Borra los bloques que ya no usa ningún manifiesto"""
+        try:
+            usados = set()
+            for manifiesto in self.BACKUP_DIR.glob(f"backup_*{self.EXT_INCREMENTAL}"):
+                usados.update(self._leer_manifiesto(manifiesto)["bloques"])
+            borrados = 0
+            for bloque in self.dir_paginas.glob("*/*"):
+                if bloque.name not in usados:
+                    bloque.unlink()
+                    borrados += 1
+            if borrados:
+                logging.info(f"Bloques de backup sin uso eliminados: {borrados}")
+        except Exception as e:
+            logging.error(f"Error al limpiar bloques de backup: {e}")
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # COPIAS COMPLETAS COMPRIMIDAS (.dbz)
+    # ══════════════════════════════════════════════════════════════════════════
+
+    def _backup_comprimido(self, origen: Path, destino: Path, tipo: str, descripcion: str) -> bool:
+        """
+        Comprime la BD en `destino` leyéndola por tramos (sin copia intermedia
+        sin comprimir). Retorna False si quick_check falla.
+        """
+        compresion = self.COMPRESION or "zlib"
+        nuevo_compresor = self._COMPRESORES[compresion][0]
+        temporal = destino.with_suffix(".tmp")
+        with self._imagen_consistente(origen) as (imagen, conn):
+            if conn.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                logging.error("La base de datos no pasó quick_check; backup cancelado")
+                return False
+            tam_pagina = conn.execute("PRAGMA page_size").fetchone()[0]
+            restante = tam_pagina * conn.execute("PRAGMA page_count").fetchone()[0]
+            encabezado = {
+                "formato": "comprimido",
+                "version": 1,
+                "compresion": compresion,
+                "tipo": tipo,
+                "descripcion": descripcion,
+                "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "tamano": restante,
+                "filas": self._contar_filas(conn),
+                "sha256": "",
+            }
+
+            suma = hashlib.sha256()
+            compresor = nuevo_compresor()
+            try:
+                with open(imagen, "rb") as entrada, open(temporal, "wb") as salida:
+                    salida.write(self._empaquetar_encabezado(encabezado))
+                    while restante > 0:
+                        datos = entrada.read(min(self.TAM_TRAMO, restante))
+                        if not datos:
+                            break
+                        restante -= len(datos)
+                        suma.update(datos)
+                        salida.write(compresor.compress(datos))
+                    salida.write(compresor.flush())
+
+                    # El checksum se conoce al final: se reescribe el encabezado
+                    encabezado["sha256"] = suma.hexdigest()
+                    salida.seek(0)
+                    salida.write(self._empaquetar_encabezado(encabezado))
+                os.replace(temporal, destino)
+            except Exception:
+                if temporal.exists():
+                    temporal.unlink()
+                raise
+        return True
+
+    @staticmethod
+    def _contar_filas(conn: sqlite3.Connection) -> dict:
+        """Filas por tabla (sin tablas virtuales ni sus tablas internas)"""
+        tablas = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        virtuales = [n for n, sql in tablas if (sql or "").upper().startswith("CREATE VIRTUAL")]
+        return {
+            nombre: conn.execute(f'SELECT COUNT(*) FROM "{nombre}"').fetchone()[0]
+            for nombre, _ in tablas
+            if not any(nombre == v or nombre.startswith(f"{v}_") for v in virtuales)
+        }
+
+    def _empaquetar_encabezado(self, encabezado: dict) -> bytes:
+        """Firma + JSON, rellenado con espacios hasta TAM_ENCABEZADO"""
+        datos = self.FIRMA_COMPRIMIDO + json.dumps(encabezado, ensure_ascii=False).encode("utf-8")
+        if len(datos) > self.TAM_ENCABEZADO:
+            raise ValueError("Encabezado del backup demasiado grande")
+        return datos.ljust(self.TAM_ENCABEZADO, b" ")
+
+    def leer_encabezado(self, ruta: Path) -> dict:
+        """Metadatos de un .dbz (lee solo los primeros TAM_ENCABEZADO bytes)"""
+        with open(ruta, "rb") as archivo:
+            datos = archivo.read(self.TAM_ENCABEZADO)
+        if not datos.startswith(self.FIRMA_COMPRIMIDO):
+            raise ValueError(f"{ruta.name} no es un backup comprimido de FarmaTrack")
+        return json.loads(datos[len(self.FIRMA_COMPRIMIDO):].decode("utf-8").rstrip())
+
+    def _descomprimir(self, ruta_backup: Path, destino: Path):
+        """Descomprime por tramos en `destino` y comprueba el SHA-256 del encabezado"""
+        encabezado = self.leer_encabezado(ruta_backup)
+        descompresor = self._COMPRESORES[encabezado["compresion"]][1]()
+        suma = hashlib.sha256()
+        with open(ruta_backup, "rb") as entrada, open(destino, "wb") as salida:
+            entrada.seek(self.TAM_ENCABEZADO)
+            while True:
+                datos = entrada.read(self.TAM_TRAMO)
+                if not datos:
+                    break
+                datos = descompresor.decompress(datos)
+                suma.update(datos)
+                salida.write(datos)
+            if hasattr(descompresor, "flush"):
+                datos = descompresor.flush()
+                suma.update(datos)
+                salida.write(datos)
+        if suma.hexdigest() != encabezado["sha256"]:
+            raise ValueError(f"Checksum incorrecto en {ruta_backup.name}")
+
+    # ── Verificación completa programada ─────────────────────────────────────
+
+    @property
+    def ruta_verificacion(self) -> Path:
+        return self.BACKUP_DIR / "verificacion.json"
+
+    def verificacion_pendiente(self) -> bool:
+        """True si la última verificación completa tiene más de DIAS_VERIFICACION_COMPLETA días"""
+        try:
+            ultima = json.loads(self.ruta_verificacion.read_text(encoding="utf-8"))
+            fecha = datetime.strptime(ultima["fecha"], "%Y-%m-%d %H:%M:%S")
+        except Exception:
+            return True
+        return datetime.now() - fecha >= timedelta(days=self.DIAS_VERIFICACION_COMPLETA)
+
+    def verificar_backups(self) -> dict:
+        """
+        Verificación completa: cada bloque de cada backup incremental existe
+        y conserva su hash, cada copia comprimida coincide con su checksum, y
+        el incremental más reciente se reconstruye y pasa PRAGMA
+        integrity_check. Guarda el resultado en verificacion.json.
+        """
+        errores = []
+        manifiestos = sorted(
+            self.BACKUP_DIR.glob(f"backup_*{self.EXT_INCREMENTAL}"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True
+        )
+        revisados = set()
+        for ruta in manifiestos:
+            for hash_bloque in self._leer_manifiesto(ruta)["bloques"]:
+                if hash_bloque in revisados:
+                    continue
+                revisados.add(hash_bloque)
+                bloque = self._ruta_bloque(hash_bloque)
+                if not bloque.exists() or hashlib.sha256(bloque.read_bytes()).hexdigest() != hash_bloque:
+                    errores.append(f"{ruta.name}: bloque {hash_bloque[:12]} dañado o ausente")
+
+        # Las copias comprimidas se descomprimen sin escribirlas, solo para el checksum
+        comprimidos = list(self.BACKUP_DIR.glob(f"backup_*{self.EXT_COMPRIMIDO}"))
+        for ruta in comprimidos:
+            try:
+                self._descomprimir(ruta, Path(os.devnull))
+            except Exception as e:
+                errores.append(f"{ruta.name}: {e}")
+
+        if manifiestos and not errores:
+            with tempfile.TemporaryDirectory(dir=self.BACKUP_DIR) as temporal:
+                copia = Path(temporal) / "verificacion.db"
+                self._materializar(manifiestos[0], copia)
+                if not self._verificar_integridad(copia):
+                    errores.append(f"{manifiestos[0].name}: no pasó integrity_check")
+
+        resultado = {
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ok": not errores,
+            "backups": len(manifiestos) + len(comprimidos),
+            "bloques": len(revisados),
+            "errores": errores,
+        }
+        self.ruta_verificacion.write_text(json.dumps(resultado, ensure_ascii=False), encoding="utf-8")
+        if errores:
+            logging.error(f"Verificación de backups con errores: {errores}")
+        else:
+            logging.info(f"Verificación completa de backups OK ({len(manifiestos)} backups)")
+        return resultado
+
     def _verificar_integridad(self, ruta_backup: Path) -> bool:
         """
         Verifica la integridad del archivo de backup
@@ -133,20 +515,29 @@ class BackupManager:
     def _limpiar_backups_antiguos(self):
         """Mantiene solo los últimos MAX_BACKUPS archivos"""
         try:
-            backups = sorted(
-                self.BACKUP_DIR.glob("backup_*.db"),
-                key=lambda p: p.stat().st_mtime,
-                reverse=True
-            )
+            backups = self._archivos_backup()
 
             # Eliminar backups excedentes
             for backup in backups[self.MAX_BACKUPS:]:
                 backup.unlink()
                 logging.info(f"Backup antiguo eliminado: {backup.name}")
 
+            if any(b.suffix == self.EXT_INCREMENTAL for b in backups[self.MAX_BACKUPS:]):
+                self._recolectar_bloques()
+
         except Exception as e:
             logging.error(f"Error al limpiar backups: {e}")
 
+    def _archivos_backup(self) -> List[Path]:
+        """Copias .db / .dbz y manifiestos .inc, del más reciente al más antiguo"""
+        return sorted(
+            [*self.BACKUP_DIR.glob("backup_*.db"),
+             *self.BACKUP_DIR.glob(f"backup_*{self.EXT_COMPRIMIDO}"),
+             *self.BACKUP_DIR.glob(f"backup_*{self.EXT_INCREMENTAL}")],
+            key=lambda p: p.stat().st_mtime,
+            reverse=True
+        )
+
     def listar_backups(self) -> List[dict]:
         """
         Lista todos los backups disponibles
@@ -157,12 +548,10 @@ class BackupManager:
         backups = []
 
         try:
-            for archivo in sorted(
-                    self.BACKUP_DIR.glob("backup_*.db"),
-                    key=lambda p: p.stat().st_mtime,
-                    reverse=True
-            ):
+            for archivo in self._archivos_backup():
                 stat = archivo.stat()
+                incremental = archivo.suffix == self.EXT_INCREMENTAL
+                comprimido = archivo.suffix == self.EXT_COMPRIMIDO
 
                 # Parsear nombre del archivo
                 partes = archivo.stem.split("_")
@@ -177,14 +566,36 @@ class BackupManager:
                 except:
                     fecha_str = "Fecha desconocida"
 
-                backups.append({
+                info = {
                     'archivo': archivo.name,
                     'ruta': archivo,
                     'tipo': tipo,
                     'fecha': fecha_str,
                     'descripcion': descripcion.replace("_", " "),
-                    'tamaño': self._formatear_tamaño(stat.st_size)
-                })
+                    'tamaño': self._formatear_tamaño(stat.st_size),
+                    'formato': "completo",
+                }
+                if incremental:
+                    info['tamaño'] = f"{self._formatear_tamaño(self._leer_manifiesto(archivo)['tamano'])} (incr.)"
+                    info['formato'] = "incremental"
+                elif comprimido:
+                    # Todo sale del encabezado: no se descomprime nada
+                    try:
+                        encabezado = self.leer_encabezado(archivo)
+                    except Exception as e:
+                        logging.warning(f"Encabezado ilegible en {archivo.name}: {e}")
+                        info['formato'] = "dañado"
+                        backups.append(info)
+                        continue
+                    info.update({
+                        'tipo': encabezado['tipo'],
+                        'fecha': encabezado['fecha'],
+                        'descripcion': encabezado['descripcion'],
+                        'tamaño': f"{info['tamaño']} ({self._formatear_tamaño(encabezado['tamano'])} sin comprimir)",
+                        'formato': encabezado['compresion'],
+                        'filas': encabezado['filas'],
+                    })
+                backups.append(info)
 
         except Exception as e:
             logging.error(f"Error al listar backups: {e}")
@@ -210,15 +621,19 @@ class BackupManager:
         Returns:
             True si la restauración fue exitosa
         """
+        temporal = DB_PATH.with_name(f"{DB_PATH.name}.restaurando")
         try:
             # Verificar que el backup existe
             if not ruta_backup.exists():
                 logging.error(f"Backup no encontrado: {ruta_backup}")
                 return False
 
-            # Verificar integridad del backup
-            if not self._verificar_integridad(ruta_backup):
+            # Reconstruir en un temporal junto a la BD (mismo disco, para
+            # poder reemplazar de forma atómica) y verificarlo ahí
+            self._materializar(ruta_backup, temporal)
+            if not self._verificar_integridad(temporal):
                 logging.error("El backup a restaurar está corrupto")
+                temporal.unlink()
                 return False
 
             # CRÍTICO: Crear backup de la BD actual antes de restaurar
@@ -229,13 +644,18 @@ class BackupManager:
 
             if not backup_seguridad:
                 logging.error("No se pudo crear backup de seguridad, restauración cancelada")
+                temporal.unlink()
                 return False
 
             # Cerrar todas las conexiones a la BD
             # (El usuario debe asegurarse de que no hay operaciones en curso)
+            # Cerrar el pool también hace checkpoint del WAL: así no queda un
+            # -wal viejo que SQLite aplicaría sobre la base restaurada.
+            from models.database import cerrar_conexiones
+            cerrar_conexiones()
 
             # Restaurar backup
-            shutil.copy2(ruta_backup, DB_PATH)
+            os.replace(temporal, DB_PATH)
 
             # Verificar que la restauración fue exitosa
             if self._verificar_integridad(DB_PATH):
@@ -244,11 +664,14 @@ class BackupManager:
             else:
                 logging.error("Error en la restauración, revirtiendo cambios")
                 # Revertir a backup de seguridad
-                shutil.copy2(backup_seguridad, DB_PATH)
+                self._materializar(backup_seguridad, temporal)
+                os.replace(temporal, DB_PATH)
                 return False
 
         except Exception as e:
             logging.error(f"Error al restaurar backup: {e}", exc_info=True)
+            if temporal.exists():
+                temporal.unlink()
             return False
 
     def eliminar_backup(self, ruta_backup: Path) -> bool:
@@ -265,6 +688,8 @@ class BackupManager:
             if ruta_backup.exists():
                 ruta_backup.unlink()
                 logging.info(f"Backup eliminado: {ruta_backup}")
+                if ruta_backup.suffix == self.EXT_INCREMENTAL:
+                    self._recolectar_bloques()
                 return True
             return False
         except Exception as e:
@@ -317,3 +742,23 @@ def listar_backups_disponibles() -> List[dict]:
     """
     manager = BackupManager()
     return manager.listar_backups()
+
+
+def verificar_backups_si_corresponde() -> Optional[threading.Thread]:
+    """
+    Lanza en segundo plano la verificación completa de backups si ya pasaron
+    DIAS_VERIFICACION_COMPLETA días desde la última. Se llama al iniciar.
+    """
+    manager = BackupManager()
+    if not manager.verificacion_pendiente():
+        return None
+
+    def verificar():
+        try:
+            manager.verificar_backups()
+        except Exception as e:
+            logging.error(f"Error en verificación programada de backups: {e}", exc_info=True)
+
+    hilo = threading.Thread(target=verificar, name="verificacion-backups", daemon=True)
+    hilo.start()
+    return hilo
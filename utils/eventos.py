@@ -0,0 +1,54 @@
+"""
+Bus de eventos en proceso
+Las escrituras de la aplicación (ventas, ediciones de inventario,
+importaciones, facturas) anuncian qué cambió y las vistas interesadas
+(el dashboard) se actualizan sin consultar la BD a intervalos fijos.
+  - Los suscriptores se llaman en el hilo que publica, que puede ser un
+    hilo trabajador (importaciones): no deben tocar widgets, solo anotar
+    el cambio y dejar que el hilo de Tk lo recoja.
+  - Las escrituras publican con publicar_al_confirmar() de models.database,
+    así el evento sale solo si la transacción se confirmó.
+  - Los cambios hechos por otro proceso no pasan por aquí; para eso queda
+    PRAGMA data_version (ver DashboardController.hubo_cambios_externos).
+"""
+import logging
+import threading
+from typing import Callable, Dict, List
+
+# Temas
+VENTAS = "ventas"
+INVENTARIO = "inventario"
+FACTURAS = "facturas"
+
+
+class BusEventos:
+    """Publicación / suscripción por tema. `funcion(tema, datos: dict)`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscriptores: Dict[str, List[Callable]] = {}
+        self.publicados = 0     # contador global de eventos publicados
+
+    def suscribir(self, tema: str, funcion: Callable[[str, dict], None]):
+        with self._lock:
+            self._suscriptores.setdefault(tema, []).append(funcion)
+
+    def desuscribir(self, tema: str, funcion: Callable[[str, dict], None]):
+        with self._lock:
+            funciones = self._suscriptores.get(tema, [])
+            if funcion in funciones:
+                funciones.remove(funcion)
+
+    def publicar(self, tema: str, **datos):
+        """Llama a los suscriptores de `tema`; un suscriptor que falla no afecta al resto"""
+        with self._lock:
+            self.publicados += 1
+            funciones = list(self._suscriptores.get(tema, ()))
+        for funcion in funciones:
+            try:
+                funcion(tema, datos)
+            except Exception as e:
+                logging.error(f"Error en suscriptor del evento '{tema}': {e}")
+
+
+bus = BusEventos()
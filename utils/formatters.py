@@ -2,7 +2,8 @@
 Funciones de formateo de datos
 """
 import re
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple, Union
 
 
 def format_precio_display(precio: float) -> str:
@@ -86,3 +87,18 @@ def clean_codigo_barras(codigo: str) -> str:
         .replace(" ", "")
         .replace("\u200b", "")  # Zero-width space
     )
+
+
+def rango_fechas_sql(desde: Union[str, date], hasta: Union[str, date, None] = None) -> Tuple[str, str]:
+    """
+    Convierte un rango de días inclusivo (YYYY-MM-DD) en los límites
+    [inicio, fin) para comparar contra columnas 'YYYY-MM-DD HH:MM:SS'.
+
+    Permite escribir `fecha >= ? AND fecha < ?`, que usa el índice de la
+    columna, en lugar de `fecha LIKE 'YYYY-MM-DD%'`, que la recorre completa.
+    """
+    if hasta is None:
+        hasta = desde
+    inicio = desde if isinstance(desde, date) else datetime.strptime(str(desde)[:10], "%Y-%m-%d").date()
+    fin = hasta if isinstance(hasta, date) else datetime.strptime(str(hasta)[:10], "%Y-%m-%d").date()
+    return inicio.strftime("%Y-%m-%d"), (fin + timedelta(days=1)).strftime("%Y-%m-%d")
@@ -0,0 +1,174 @@
+"""
+Ejecución de importaciones en segundo plano
+(catálogo Excel, factura PDF SIP, pedidos Excel/TXT)
+  - La tarea corre en un hilo trabajador con su propia conexión del pool;
+    el hilo de Tk nunca se bloquea leyendo el archivo ni escribiendo la BD.
+  - La tarea informa su avance (filas leídas, escritas, errores) por una
+    cola que el hilo de Tk revisa con widget.after().
+  - Cancelar marca un evento; la tarea lo revisa entre lotes y lanza
+    ImportacionCancelada, que hace rollback de la transacción abierta.
+Se usa un hilo y no un proceso: pandas y sqlite3 liberan el GIL en el
+trabajo pesado, y así la tarea comparte el catálogo en memoria y el pool.
+"""
+import logging
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+
+class ImportacionCancelada(Exception):
+    """El usuario canceló la importación."""
+
+
+class ErrorImportacion(Exception):
+    """Archivo no importable (formato, columnas...); se muestra tal cual al usuario."""
+
+    def __init__(self, titulo: str, mensaje: str):
+        super().__init__(mensaje)
+        self.titulo = titulo
+        self.mensaje = mensaje
+
+
+class Progreso:
+    """
+    Canal entre la tarea (hilo trabajador) y la ventana (hilo de Tk).
+    Las funciones de importación lo reciben como parámetro opcional.
+    """
+
+    def __init__(self, cola: "queue.Queue" = None, evento: threading.Event = None):
+        self._cola = cola
+        self._evento = evento or threading.Event()
+        self.total = 0
+        self.leidas = 0
+        self.escritas = 0
+        self.errores = 0
+
+    @property
+    def cancelado(self) -> bool:
+        return self._evento.is_set()
+
+    def verificar(self):
+        """Lanza ImportacionCancelada si se pidió cancelar (llamar entre lotes)."""
+        if self._evento.is_set():
+            raise ImportacionCancelada()
+
+    def reportar(self, mensaje: str = None, **contadores):
+        """
+        Actualiza contadores (total, leidas, escritas, errores) y publica
+        el estado. Ej.: progreso.reportar("Leyendo archivo...", leidas=500)
+        """
+        for nombre, valor in contadores.items():
+            setattr(self, nombre, valor)
+        if self._cola is not None:
+            self._cola.put(("progreso", {
+                "mensaje": mensaje,
+                "total": self.total,
+                "leidas": self.leidas,
+                "escritas": self.escritas,
+                "errores": self.errores,
+            }))
+
+
+class TrabajoImportacion:
+    """
+    Ejecuta `tarea(progreso)` en un hilo y entrega el resultado en el hilo de Tk.
+
+    Uso:
+        trabajo = TrabajoImportacion(
+            self.window,
+            lambda p: InventarioController.importar_catalogo_excel(archivo, p),
+            al_terminar=self._fin_importacion,        # callback(resultado)
+            al_progresar=ventana.actualizar,          # callback(estado: dict)
+            al_fallar=self._error_importacion,        # callback(excepción)
+            al_cancelar=ventana.cerrar,               # callback()
+        )
+        trabajo.iniciar()
+    """
+
+    REVISION_MS = 50    # cada cuánto el hilo de Tk vacía la cola de avance
+
+    def __init__(self, widget, tarea: Callable[[Progreso], Any],
+                 al_terminar: Callable[[Any], None],
+                 al_progresar: Optional[Callable[[dict], None]] = None,
+                 al_fallar: Optional[Callable[[Exception], None]] = None,
+                 al_cancelar: Optional[Callable[[], None]] = None,
+                 nombre: str = "importacion"):
+        self.widget = widget
+        self.tarea = tarea
+        self.al_terminar = al_terminar
+        self.al_progresar = al_progresar
+        self.al_fallar = al_fallar
+        self.al_cancelar = al_cancelar
+        self.nombre = nombre
+        self._cola: "queue.Queue" = queue.Queue()
+        self._evento = threading.Event()
+        self.progreso = Progreso(self._cola, self._evento)
+        self._hilo: Optional[threading.Thread] = None
+        self._after = None
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._ejecutar, name=self.nombre, daemon=True)
+        self._hilo.start()
+        self._programar_revision()
+
+    def cancelar(self):
+        """Pide a la tarea que se detenga en el próximo punto de control."""
+        self._evento.set()
+
+    # ── Internos ──────────────────────────────────────────────────────────────
+
+    def _ejecutar(self):
+        """Hilo trabajador: nunca toca widgets, solo publica en la cola."""
+        try:
+            resultado = self.tarea(self.progreso)
+            if self._evento.is_set():
+                # Cancelado después del último punto de control: ya se confirmó
+                logging.info(f"Importación '{self.nombre}' terminó antes de cancelarse")
+            self._cola.put(("fin", resultado))
+        except ImportacionCancelada:
+            logging.info(f"Importación '{self.nombre}' cancelada por el usuario")
+            self._cola.put(("cancelado", None))
+        except Exception as e:
+            logging.error(f"Error en importación '{self.nombre}': {e}", exc_info=True)
+            self._cola.put(("error", e))
+
+    def _programar_revision(self):
+        try:
+            self._after = self.widget.after(self.REVISION_MS, self._revisar)
+        except Exception:
+            # La ventana se cerró: la tarea sigue y su resultado se descarta
+            self._after = None
+
+    def _revisar(self):
+        """Hilo de Tk: aplica el avance acumulado y entrega el resultado final."""
+        self._after = None
+        ultimo_estado = None
+        while True:
+            try:
+                tipo, dato = self._cola.get_nowait()
+            except queue.Empty:
+                break
+
+            if tipo == "progreso":
+                ultimo_estado = dato
+                continue
+
+            if ultimo_estado is not None and self.al_progresar:
+                self.al_progresar(ultimo_estado)
+            if tipo == "fin":
+                self.al_terminar(dato)
+            elif tipo == "cancelado":
+                if self.al_cancelar:
+                    self.al_cancelar()
+            elif self.al_fallar:
+                self.al_fallar(dato)
+            return
+
+        # Solo se pinta el estado más reciente de cada revisión
+        if ultimo_estado is not None and self.al_progresar:
+            self.al_progresar(ultimo_estado)
+        self._programar_revision()
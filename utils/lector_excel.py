@@ -0,0 +1,102 @@
+"""
+Lectura de Excel por lotes (streaming)
+Para catálogos de proveedores muy grandes: en vez de cargar el libro
+completo con pd.read_excel, se abre con openpyxl en modo read_only y se
+entregan DataFrames de `tamano_lote` filas. La memoria queda acotada por
+el tamaño del lote y quien consume puede ir escribiendo en la base de
+datos mientras el resto del archivo se sigue leyendo.
+
+Los valores se entregan como texto, igual que pd.read_excel(dtype=str):
+celdas vacías → None, enteros guardados como float → '123' (no '123.0').
+"""
+import logging
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+
+def _a_texto(valor) -> Optional[str]:
+    """Convierte una celda al texto que produciría pd.read_excel(dtype=str)"""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+class LectorExcel:
+    """
+    Lector por lotes de la primera hoja de un .xlsx.
+
+    Uso:
+        with LectorExcel(ruta, tamano_lote=5000) as lector:
+            print(lector.columnas, lector.total)
+            for lote in lector.lotes():
+                ...  # DataFrame con las columnas del encabezado
+    """
+
+    TAMANO_LOTE = 5000
+
+    def __init__(self, archivo_path: str, tamano_lote: int = None):
+        self.archivo_path = archivo_path
+        self.tamano_lote = tamano_lote or self.TAMANO_LOTE
+        self.columnas: List[str] = []
+        self.total = 0      # filas de datos según la dimensión de la hoja (estimado)
+        self._libro = None
+        self._filas = None
+
+    def __enter__(self):
+        self.abrir()
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def abrir(self):
+        from openpyxl import load_workbook
+
+        # read_only: las filas se leen del XML a medida que se piden
+        self._libro = load_workbook(self.archivo_path, read_only=True, data_only=True)
+        hoja = self._libro.worksheets[0]
+        self._filas = hoja.iter_rows(values_only=True)
+
+        encabezado = next(self._filas, None) or ()
+        self.columnas = [
+            str(c).strip() if c is not None else f"Unnamed: {i}"
+            for i, c in enumerate(encabezado)
+        ]
+        try:
+            self.total = max((hoja.max_row or 1) - 1, 0)
+        except Exception:
+            self.total = 0
+        logging.info(f"Excel abierto en modo lectura por lotes: {self.archivo_path} "
+                     f"(~{self.total} filas, columnas: {self.columnas})")
+
+    def cerrar(self):
+        if self._libro is not None:
+            self._libro.close()
+            self._libro = None
+            self._filas = None
+
+    def lotes(self) -> Iterator[pd.DataFrame]:
+        """DataFrames de hasta `tamano_lote` filas (se omiten filas totalmente vacías)"""
+        ancho = len(self.columnas)
+        lote = []
+        for fila in self._filas:
+            valores = [_a_texto(v) for v in fila[:ancho]]
+            if not any(v is not None for v in valores):
+                continue
+            valores += [None] * (ancho - len(valores))
+            lote.append(valores)
+            if len(lote) >= self.tamano_lote:
+                yield pd.DataFrame(lote, columns=self.columnas, dtype=object)
+                lote = []
+        if lote:
+            yield pd.DataFrame(lote, columns=self.columnas, dtype=object)
+
+
+def leer_excel_por_lotes(archivo_path: str, tamano_lote: int = None) -> Iterator[pd.DataFrame]:
+    """Atajo: itera los lotes de la primera hoja y cierra el archivo al terminar"""
+    with LectorExcel(archivo_path, tamano_lote) as lector:
+        yield from lector.lotes()
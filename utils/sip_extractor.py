@@ -7,18 +7,20 @@ import pandas as pd
 import re
 import logging
 from typing import List, Dict, Optional
+from utils.importaciones import Progreso, ImportacionCancelada
 
 
 class SIPExtractor:
     """Extrae datos de facturas PDF de SIP Asociados"""
 
     @staticmethod
-    def extraer_desde_pdf(pdf_path: str) -> List[Dict[str, str]]:
+    def extraer_desde_pdf(pdf_path: str, progreso: Optional[Progreso] = None) -> List[Dict[str, str]]:
         """
         Extrae productos desde una factura PDF de SIP Asociados
 
         Args:
             pdf_path: Ruta al archivo PDF
+            progreso: Avance por página y punto de cancelación (opcional)
 
         Returns:
             Lista de diccionarios con 'Cantidad' y 'Código de Barras'
@@ -28,6 +30,12 @@ class SIPExtractor:
         try:
             with pdfplumber.open(pdf_path) as pdf:
                 for page_num, page in enumerate(pdf.pages, 1):
+                    if progreso:
+                        progreso.verificar()
+                        progreso.reportar(
+                            f"Página {page_num} de {len(pdf.pages)}...",
+                            leidas=len(extracted_data)
+                        )
                     text = page.extract_text()
 
                     if not text:
@@ -73,6 +81,8 @@ class SIPExtractor:
 
             logging.info(f"Extracción completada: {len(extracted_data)} productos encontrados")
 
+        except ImportacionCancelada:
+            raise
         except FileNotFoundError:
             logging.error(f"Archivo no encontrado: {pdf_path}")
             raise
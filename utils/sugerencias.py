@@ -0,0 +1,139 @@
+"""
+Búsqueda de sugerencias en segundo plano para los campos de producto
+Evita consultar la base de datos en cada tecla dentro del hilo de Tk:
+  - Debounce: solo se busca cuando el usuario deja de escribir unos ms
+    (un lector de código de barras que teclea 13 dígitos genera 1 consulta).
+  - La consulta corre en un hilo trabajador compartido.
+  - Los resultados viejos se descartan si llegó una tecla más reciente.
+  - La respuesta vuelve al hilo de Tk con widget.after().
+"""
+import logging
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+
+class _Trabajador:
+    """Hilo único (daemon) que ejecuta las búsquedas de todos los campos."""
+
+    def __init__(self):
+        self._cola: "queue.Queue" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def enviar(self, buscador: "BuscadorSugerencias", secuencia: int, texto: str):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(
+                    target=self._ejecutar, name="busqueda-sugerencias", daemon=True
+                )
+                self._hilo.start()
+        self._cola.put((buscador, secuencia, texto))
+
+    def _ejecutar(self):
+        while True:
+            buscador, secuencia, texto = self._cola.get()
+            # Si ya hay una tecla más reciente, ni siquiera se consulta
+            if secuencia != buscador.secuencia:
+                continue
+            try:
+                resultado, error = buscador.buscar(texto), None
+            except Exception as e:
+                resultado, error = None, e
+            buscador._recibir(secuencia, texto, resultado, error)
+
+
+_trabajador = _Trabajador()
+
+
+class BuscadorSugerencias:
+    """
+    Conecta un campo de texto con una función de búsqueda.
+
+    Uso:
+        self._buscador = BuscadorSugerencias(
+            self.window,
+            lambda t: DatabaseManager.buscar_productos_like(t),
+            self._mostrar_sugerencias,       # callback(texto, resultados)
+        )
+        entry.bind("<KeyRelease>", lambda e: self._buscador.solicitar(entry.get().strip()))
+
+    `buscar` corre en el hilo trabajador (no debe tocar widgets);
+    `al_recibir` corre en el hilo de Tk.
+    """
+
+    DEMORA_MS = 150     # espera tras la última tecla antes de buscar
+    REVISION_MS = 15    # cada cuánto el hilo de Tk revisa si llegó la respuesta
+
+    def __init__(self, widget, buscar: Callable[[str], Any],
+                 al_recibir: Callable[[str, Any], None], demora_ms: Optional[int] = None):
+        self.widget = widget
+        self.buscar = buscar
+        self.al_recibir = al_recibir
+        self.demora_ms = self.DEMORA_MS if demora_ms is None else demora_ms
+        self.secuencia = 0
+        self._after_busqueda = None
+        self._after_revision = None
+        self._respuesta = None
+        self._lock = threading.Lock()
+
+    def solicitar(self, texto: str):
+        """Programa una búsqueda de `texto`; cancela la anterior si aún no corrió."""
+        self.cancelar()
+        if not texto:
+            return
+        secuencia = self.secuencia
+        self._after_busqueda = self.widget.after(
+            self.demora_ms, lambda: self._lanzar(secuencia, texto)
+        )
+
+    def cancelar(self):
+        """Descarta la búsqueda pendiente y cualquier respuesta en camino."""
+        with self._lock:
+            self.secuencia += 1
+            self._respuesta = None
+        for atributo in ("_after_busqueda", "_after_revision"):
+            ident = getattr(self, atributo)
+            if ident is not None:
+                try:
+                    self.widget.after_cancel(ident)
+                except Exception:
+                    pass
+                setattr(self, atributo, None)
+
+    # ── Internos ──────────────────────────────────────────────────────────────
+
+    def _lanzar(self, secuencia: int, texto: str):
+        self._after_busqueda = None
+        if secuencia != self.secuencia:
+            return
+        _trabajador.enviar(self, secuencia, texto)
+        self._programar_revision()
+
+    def _recibir(self, secuencia, texto, resultado, error):
+        """Llamado desde el hilo trabajador: solo guarda la respuesta."""
+        with self._lock:
+            if secuencia == self.secuencia:
+                self._respuesta = (texto, resultado, error)
+
+    def _programar_revision(self):
+        try:
+            self._after_revision = self.widget.after(self.REVISION_MS, self._revisar)
+        except Exception:
+            # El widget fue destruido: no hay a quién entregar resultados
+            self._after_revision = None
+
+    def _revisar(self):
+        """Hilo de Tk: entrega la respuesta si ya llegó, o vuelve a revisar."""
+        self._after_revision = None
+        with self._lock:
+            respuesta, self._respuesta = self._respuesta, None
+        if respuesta is None:
+            self._programar_revision()
+            return
+
+        texto, resultado, error = respuesta
+        if error is not None:
+            logging.error(f"Error buscando sugerencias para '{texto}': {error}")
+            resultado = []
+        self.al_recibir(texto, resultado)
@@ -8,7 +8,8 @@ from tkinter import Toplevel, Frame, Label, Entry, Button, W, END, Spinbox
 from tkinter import ttk, messagebox
 import tkinter as tk
 from config.settings import FONT_STYLE, BTN_COLOR, BTN_FG
-from models.database import DatabaseManager, get_db_connection
+from models.database import DatabaseManager, get_db_connection, catalogo, publicar_al_confirmar
+from utils import eventos
 from utils.validators import validate_codigo_barras
 import logging
 from datetime import datetime, date
@@ -267,6 +268,8 @@ class ActualizadorWindow:
                         (cantidad, int(id_prod))
                     )
                 exito = cursor.rowcount > 0
+            catalogo.invalidar(ids=[int(id_prod)])
+            publicar_al_confirmar(eventos.INVENTARIO, ids=[int(id_prod)])
         except Exception as e:
             logging.error(f"Error al actualizar producto: {e}")
             exito = False
@@ -326,6 +329,8 @@ class ActualizadorWindow:
                     (cantidad, int(id_prod))
                 )
                 exito = cursor.rowcount > 0
+            catalogo.invalidar(ids=[int(id_prod)])
+            publicar_al_confirmar(eventos.INVENTARIO, ids=[int(id_prod)])
         except Exception as e:
             logging.error(f"Error al actualizar cantidad: {e}")
             exito = False
@@ -410,6 +415,8 @@ class ActualizadorWindow:
                         (nuevo_valor_bd, int(id_prod))
                     )
                     exito = cursor.rowcount > 0
+                catalogo.invalidar(ids=[int(id_prod)])
+                publicar_al_confirmar(eventos.INVENTARIO, ids=[int(id_prod)])
             except Exception as e:
                 logging.error(f"Error al editar celda: {e}")
                 exito = False
@@ -155,7 +155,10 @@ class BackupWindow:
             "ℹ️ IMPORTANTE:\n"
             "• Los backups automáticos se crean antes de: Reseteo de stock, Actualizaciones masivas\n"
             "• Se mantienen los últimos 10 backups automáticamente\n"
-            "• RESTAURAR un backup reemplazará la base de datos actual (se crea backup de seguridad)"
+            "• Los automáticos son incrementales (incr.): solo guardan las páginas que cambiaron\n"
+            + (f"• Los manuales se guardan comprimidos ({BackupManager.COMPRESION}, .dbz)\n"
+               if BackupManager.COMPRESION else "")
+            + "• RESTAURAR un backup reemplazará la base de datos actual (se crea backup de seguridad)"
         )
 
         Label(
@@ -1,13 +1,26 @@
 """
 Dashboard Operativo - FarmaTrack
 Ventas del día · Stock bajo · Vencimientos · Valor inventario
+✅ NUEVO: Las consultas corren en un único hilo trabajador que vive toda la
+   sesión (y conserva su conexión del pool con la caché caliente); el panel
+   pinta la última instantánea al abrirse y la reemplaza cuando llegan datos
+   nuevos
+✅ NUEVO: Sin refresco a intervalo fijo: se recalcula solo cuando un evento
+   del bus, un cambio de otro proceso o el TTL invalidan alguna métrica, y
+   se repintan solo los widgets cuyos datos cambiaron
 """
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk
 import logging
+import queue
+import threading
+import time
+from typing import Optional
 from datetime import datetime
 
+from controllers.dashboard import DashboardController
+
 try:
     from ctk_design_system import Colors, Fonts, Dimensions
 except ImportError:
@@ -26,6 +39,43 @@ def _fmt(v):
     except: return str(v)
 
 
+# ==============================================================================
+# HILO TRABAJADOR
+# ==============================================================================
+
+class _TrabajadorDashboard:
+    """
+    Hilo único (daemon) que recalcula la instantánea del dashboard.
+    Se reutiliza en cada actualización, así la conexión que el pool le
+    asigna conserva su caché de páginas entre una y otra.
+    """
+
+    def __init__(self):
+        self._cola: "queue.Queue" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def enviar(self, forzar: bool, respuestas: "queue.Queue"):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(
+                    target=self._ejecutar, name="dashboard", daemon=True
+                )
+                self._hilo.start()
+        self._cola.put((forzar, respuestas))
+
+    def _ejecutar(self):
+        while True:
+            forzar, respuestas = self._cola.get()
+            try:
+                respuestas.put((DashboardController.actualizar_instantanea(forzar), None))
+            except Exception as e:
+                respuestas.put((None, e))
+
+
+_trabajador = _TrabajadorDashboard()
+
+
 # ==============================================================================
 # MINI GRÁFICO DE BARRAS (Canvas puro — sin matplotlib)
 # ==============================================================================
@@ -93,14 +143,34 @@ class KpiCard(ctk.CTkFrame):
 # ==============================================================================
 
 class DashboardPanel(ctk.CTkFrame):
-    REFRESH_MS = 60_000
+    # Cada cuánto se mira (en memoria) si alguna métrica quedó invalidada
+    REVISION_MS = 500
+    # Cada cuánto se consulta PRAGMA data_version por cambios de otro proceso
+    CAMBIOS_EXTERNOS_MS = 5_000
+    # Cada cuánto el hilo de Tk mira si el trabajador ya respondió
+    RESPUESTA_MS = 50
+
+    # Métrica → método que repinta sus widgets
+    _PINTORES = {
+        "ventas_hoy": "_pintar_ventas_hoy",
+        "ventas_semana": "_pintar_ventas_semana",
+        "inventario": "_pintar_inventario",
+        "stock_bajo": "_pintar_stock_bajo",
+        "por_vencer": "_pintar_por_vencer",
+    }
 
     def __init__(self, parent, **kw):
         super().__init__(parent, fg_color=Colors.BACKGROUND, corner_radius=0, **kw)
         self._after_id = None
-        self._datos    = {}
+        self._after_respuesta = None
+        self._respuestas: "queue.Queue" = queue.Queue()
+        self._pendiente = False
+        self._ultima_revision_externa = 0.0
+        self._datos    = DashboardController.instantanea()
         self._setup_ui()
-        self._cargar_datos()
+        if self._datos:
+            self._poblar_ui(list(self._datos))
+        self._revisar()
 
     # ── Construcción ──────────────────────────────────────────────────────────
 
@@ -166,8 +236,8 @@ class DashboardPanel(ctk.CTkFrame):
         ).pack(anchor="w", padx=16, pady=(12,4))
         self.tree_stock = self._make_tree(
             frame_stock,
-            cols=("Descripción", "Cant.", "Proveedor"),
-            widths=(220, 55, 140),
+            cols=("Descripción", "Cant.", "Ventas", "Proveedor"),
+            widths=(200, 50, 60, 120),
         )
 
         # ── Fila 2: Tabla vencimientos ────────────────────────────────────────
@@ -208,7 +278,7 @@ class DashboardPanel(ctk.CTkFrame):
             footer, text="🔄 Actualizar",
             fg_color=Colors.PRIMARY, hover_color=Colors.PRIMARY_HOVER,
             height=30, corner_radius=6, font=(Fonts.FAMILY,12),
-            command=self._cargar_datos,
+            command=lambda: self._cargar_datos(forzar=True),
         ).pack(side="right", padx=14, pady=6)
 
     def _make_tree(self, parent, cols, widths, height=6):
@@ -237,26 +307,65 @@ class DashboardPanel(ctk.CTkFrame):
 
     # ── Datos ─────────────────────────────────────────────────────────────────
 
-    def _cargar_datos(self):
+    def _revisar(self):
+        """
+        Hilo de Tk: lanza una actualización solo si algo quedó invalidado.
+        Las ventas e importaciones invalidan por el bus; otro proceso, por
+        data_version; lo demás vence por TTL.
+        """
+        ahora = time.monotonic()
+        if ahora - self._ultima_revision_externa >= self.CAMBIOS_EXTERNOS_MS / 1000:
+            self._ultima_revision_externa = ahora
+            if DashboardController.hubo_cambios_externos():
+                DashboardController.invalidar()
+        if DashboardController.metricas_vencidas():
+            self._cargar_datos()
+        self._after_id = self.after(self.REVISION_MS, self._revisar)
+
+    def _cargar_datos(self, forzar=False):
+        """Pide en segundo plano las métricas vencidas (todas si forzar)"""
+        # Una actualización a la vez: lo que se invalide mientras tanto
+        # queda vencido y lo toma la próxima revisión
+        if self._pendiente:
+            return
+        self._pendiente = True
+        _trabajador.enviar(forzar, self._respuestas)
+        self._esperar_respuesta()
+
+    def _esperar_respuesta(self):
+        """Hilo de Tk: recoge la respuesta del trabajador cuando llegue"""
         try:
-            from controllers.dashboard import DashboardController
-            self._datos = DashboardController.resumen_completo()
-            self._poblar_ui()
+            datos, error = self._respuestas.get_nowait()
+        except queue.Empty:
+            self._after_respuesta = self.after(self.RESPUESTA_MS, self._esperar_respuesta)
+            return
+        self._after_respuesta = None
+        self._pendiente = False
+        if error is not None:
+            logging.error(f"Error cargando dashboard: {error}")
+        else:
+            self._recibir_datos(datos)
+
+    def _recibir_datos(self, datos):
+        """Hilo de Tk: reemplaza la instantánea mostrada por la recién calculada"""
+        if not self.winfo_exists():
+            return
+        try:
+            cambiadas = [m for m in self._PINTORES if datos.get(m) != self._datos.get(m)]
+            self._datos = datos
+            self._poblar_ui(cambiadas)
             self.lbl_act.configure(
                 text=f"Última actualización: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
             )
         except Exception as e:
             logging.error(f"Error cargando dashboard: {e}")
 
-        if self._after_id:
-            try: self.after_cancel(self._after_id)
-            except Exception: pass
-        self._after_id = self.after(self.REFRESH_MS, self._cargar_datos)
+    def _poblar_ui(self, metricas=None):
+        """Repinta los widgets de `metricas` (todos si None)"""
+        for metrica in (metricas if metricas is not None else self._PINTORES):
+            getattr(self, self._PINTORES[metrica])(self._datos)
 
-    def _poblar_ui(self):
-        d = self._datos
-
-        # KPIs
+    def _pintar_ventas_hoy(self, d):
         vd = d.get("ventas_hoy", {})
         self.card_ventas.update_valor(
             _fmt(vd.get("total", 0)),
@@ -264,6 +373,14 @@ class DashboardPanel(ctk.CTkFrame):
             subtitulo=f"{vd.get('cantidad', 0)} transacciones hoy",
         )
 
+    def _pintar_ventas_semana(self, d):
+        self.chart.update_data(d.get("ventas_semana", []))
+
+    def _pintar_inventario(self, d):
+        inv = d.get("inventario", {})
+        self.card_inv.update_valor(_fmt(inv.get("valor_costo", 0)))
+
+    def _pintar_stock_bajo(self, d):
         sb = d.get("stock_bajo", [])
         self.card_stock.update_valor(
             str(len(sb)),
@@ -272,21 +389,6 @@ class DashboardPanel(ctk.CTkFrame):
                   else Colors.SUCCESS,
         )
 
-        pv = d.get("por_vencer", [])
-        vencidos = [x for x in pv if x.get("estado") == "vencido"]
-        self.card_venc.update_valor(
-            str(len(pv)),
-            color=Colors.ERROR if vencidos
-                  else Colors.WARNING if pv
-                  else Colors.SUCCESS,
-        )
-
-        inv = d.get("inventario", {})
-        self.card_inv.update_valor(_fmt(inv.get("valor_costo", 0)))
-
-        # Gráfico semanal
-        self.chart.update_data(d.get("ventas_semana", []))
-
         # Tabla stock bajo
         for i in self.tree_stock.get_children():
             self.tree_stock.delete(i)
@@ -294,9 +396,20 @@ class DashboardPanel(ctk.CTkFrame):
             self.tree_stock.insert("", "end", values=(
                 p.get("descripcion","")[:35],
                 p.get("cantidad", 0),
-                p.get("proveedor","—")[:20],
+                p.get("veces_vendido", 0),
+                (p.get("proveedor") or "—")[:20],
             ))
 
+    def _pintar_por_vencer(self, d):
+        pv = d.get("por_vencer", [])
+        vencidos = [x for x in pv if x.get("estado") == "vencido"]
+        self.card_venc.update_valor(
+            str(len(pv)),
+            color=Colors.ERROR if vencidos
+                  else Colors.WARNING if pv
+                  else Colors.SUCCESS,
+        )
+
         # Tabla vencimientos
         for i in self.tree_venc.get_children():
             self.tree_venc.delete(i)
@@ -340,7 +453,9 @@ class DashboardPanel(ctk.CTkFrame):
 
     def destruir(self):
         """Llamar antes de destruir para cancelar timers."""
-        if self._after_id:
-            try: self.after_cancel(self._after_id)
-            except Exception: pass
-            self._after_id = None
\ No newline at end of file
+        for atributo in ("_after_id", "_after_respuesta"):
+            ident = getattr(self, atributo)
+            if ident:
+                try: self.after_cancel(ident)
+                except Exception: pass
+                setattr(self, atributo, None)
\ No newline at end of file
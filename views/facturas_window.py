@@ -850,28 +850,29 @@ class FacturasWindow:
     # ORDENAMIENTO
     # ══════════════════════════════════════════════════════════════════════════
 
+    # Clave de orden de cada columna sobre las facturas ya tipadas (self._facturas)
+    _CLAVES_ORDEN = {
+        "id_factura":    lambda f: (f.get("id_factura") or "").lower(),
+        "proveedor":     lambda f: (f.get("proveedor") or "").lower(),
+        "valor":         lambda f: f.get("valor") or 0,
+        "fecha_venc":    lambda f: f.get("fecha_vencimiento") or "",
+        "estado":        lambda f: f.get("estado") or "",
+        "metodo":        lambda f: (f.get("metodo_pago") or "").lower(),
+        "observaciones": lambda f: (f.get("observaciones") or "").lower(),
+    }
     _orden_cols = {}
 
     def _ordenar(self, col):
-        """Ordena la tabla por columna."""
-        datos = [(self.tree.set(k, col), k) for k in self.tree.get_children("")]
+        """Ordena la tabla por columna usando los datos de la consulta, no el texto de las celdas."""
+        clave = self._CLAVES_ORDEN.get(col)
+        if clave is None:
+            return
 
         desc = self._orden_cols.get(col, False)
         self._orden_cols[col] = not desc
 
-        # Intentar ordenar numéricamente
-        try:
-            datos.sort(
-                key=lambda t: float(
-                    t[0].replace("$", "").replace(".", "").replace(",", "")
-                ) if t[0] else 0,
-                reverse=desc
-            )
-        except ValueError:
-            datos.sort(key=lambda t: str(t[0]).lower(), reverse=desc)
-
-        for i, (_, k) in enumerate(datos):
-            self.tree.move(k, "", i)
+        self._facturas.sort(key=clave, reverse=desc)
+        self.tree.set_children("", *(str(f["id"]) for f in self._facturas))
 
     # ══════════════════════════════════════════════════════════════════════════
     # UTILIDADES
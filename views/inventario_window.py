@@ -2,15 +2,18 @@
 Ventana de gestión de inventario
 ✅ CORREGIDO: Alineación correcta de columnas en Treeview
 ✅ CORREGIDO: Orden consistente entre SELECT, columnas y valores
+✅ NUEVO: Tabla virtual (solo filas visibles) y orden por columna en SQL
 """
 from tkinter import (Toplevel, Frame, Label, Entry, Button, Menu, END, W,
-                     messagebox, filedialog, Scrollbar, BOTH, LEFT, RIGHT, Y, VERTICAL)
+                     messagebox, filedialog, BOTH, LEFT, RIGHT, Y)
 from tkinter import ttk
 from config.settings import FONT_STYLE, BTN_COLOR, BTN_FG
-from models.database import DatabaseManager, get_db_connection
+from models.database import (DatabaseManager, get_db_connection, consulta_fts,
+                             COLUMNAS_LISTADO)
 from controllers.inventario import InventarioController
 from utils.validators import sanitize_sql_column, validate_precio
 from utils.formatters import format_precio_display
+from views.tabla_virtual import TablaVirtual
 import bcrypt
 from config.settings import PASSWORD_HASH
 
@@ -22,6 +25,7 @@ except ImportError:
 
 import pandas as pd
 import logging
+import sqlite3
 
 
 class InventarioWindow:
@@ -151,8 +155,17 @@ class InventarioWindow:
             "fecha_vencimiento"
         )
 
-        # Crear Treeview
-        self.tree = ttk.Treeview(frame_tabla, columns=columnas, show="headings")
+        # ✅ Tabla virtual: el Treeview solo contiene las filas visibles
+        self.tabla = TablaVirtual(
+            frame_tabla,
+            columnas,
+            self._leer_filas,
+            width=30,
+            troughcolor="#E0E0E0",
+            bg="#9E9E9E",
+            activebackground="#616161"
+        )
+        self.tree = self.tabla.tree
 
         # ✅ Configurar encabezados con nombres legibles
         nombres_columnas = {
@@ -200,26 +213,8 @@ class InventarioWindow:
                 anchor='w'
             )
 
-        # Scrollbar vertical
-        scrollbar_y = Scrollbar(
-            frame_tabla,
-            orient=VERTICAL,
-            command=self.tree.yview,
-            width=30,
-            troughcolor="#E0E0E0",
-            bg="#9E9E9E",
-            activebackground="#616161"
-        )
-        self.tree.configure(yscrollcommand=scrollbar_y.set)
-
-        # Posicionar elementos
-        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
-        scrollbar_y.pack(side=RIGHT, fill=Y)
-
-        # Scroll con rueda del mouse
-        self.tree.bind("<MouseWheel>", self._scroll_mouse)
-        self.tree.bind("<Button-4>", lambda e: self.tree.yview_scroll(-1, "units"))
-        self.tree.bind("<Button-5>", lambda e: self.tree.yview_scroll(1, "units"))
+        # Posicionar elementos (scroll con rueda y teclado lo maneja la tabla)
+        self.tabla.pack(fill=BOTH, expand=True)
 
         # ============================================================
         # FRAME TOTAL CON BOTÓN ACTUALIZAR
@@ -271,6 +266,9 @@ class InventarioWindow:
 
         # Variable para control de orden
         self.orden_columnas = {}
+        # Consulta activa de la tabla: (condición WHERE, parámetros) y orden
+        self._consulta = None       # None = solo filtro de proveedor
+        self._orden = ("id_producto", False)
 
     def _setup_context_menu(self):
         """Configura menú de clic derecho"""
@@ -287,51 +285,74 @@ class InventarioWindow:
 
         self.tree.bind("<Button-3>", self._mostrar_menu_contextual)
 
+    # Columnas del SELECT en el mismo orden que las columnas de la tabla
+    _COLUMNAS_SQL = ", ".join(COLUMNAS_LISTADO)
+
+    def _leer_filas(self, ids: list) -> dict:
+        """Valores de las filas pedidas por la tabla virtual: {id_producto: fila}"""
+        filas = {}
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(ids), 500):
+                lote = ids[i:i + 500]
+                cursor.execute(
+                    f"SELECT {self._COLUMNAS_SQL} FROM productos "
+                    f"WHERE id_producto IN ({', '.join('?' * len(lote))})",
+                    lote
+                )
+                for producto in cursor.fetchall():
+                    filas[producto[0]] = tuple(producto)
+        return filas
+
+    def _consultar_ids(self, condicion: str, params: list) -> list:
+        """ids de productos que cumplen `condicion`, en el orden activo"""
+        columna, descendente = self._orden
+        collate = "" if columna in self._COLUMNAS_NUMERICAS else " COLLATE NOCASE"
+        direccion = "DESC" if descendente else "ASC"
+        where = f"WHERE {condicion}" if condicion else ""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT id_producto FROM productos {where} "
+                f"ORDER BY {columna}{collate} {direccion}, id_producto {direccion}",
+                params
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def _mostrar_consulta(self, condicion: str, params: list) -> int:
+        """Carga en la tabla virtual los productos que cumplen `condicion`"""
+        ids = self._consultar_ids(condicion, params)
+        self._consulta = (condicion, params)
+        self.tabla.establecer_claves(ids)
+        return len(ids)
+
+    def _ids_por_proveedor(self, proveedor) -> list:
+        """ids del inventario (todo o de un proveedor) en el orden activo"""
+        if proveedor:
+            return self._consultar_ids("TRIM(proveedor) = TRIM(?)", [proveedor])
+        return self._consultar_ids("", [])
+
+    def _proveedor_seleccionado(self):
+        """Proveedor seleccionado desde el Combobox (None = todos)"""
+        val = self.combo_proveedor.get()
+        if val and val != "(Todos los proveedores)":
+            return val
+        return None
+
     def _cargar_productos(self):
         """
         ✅ CORREGIDO: Carga productos con SELECT en el orden correcto,
         respetando el filtro de proveedor activo.
+        ✅ NUEVO: Solo se leen los ids; las filas visibles se piden al desplazarse.
         """
-        # Limpiar treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Proveedor seleccionado desde el Combobox
-        proveedor_sel = None
-        val = self.combo_proveedor.get()
-        if val and val != "(Todos los proveedores)":
-            proveedor_sel = val
+        proveedor_sel = self._proveedor_seleccionado()
 
         try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
+            ids = self._ids_por_proveedor(proveedor_sel)
+            self._consulta = None
+            self.tabla.establecer_claves(ids)
 
-                if proveedor_sel:
-                    cursor.execute("""
-                        SELECT
-                            id_producto, codigo_barras, descripcion, cantidad,
-                            proveedor, precio_compra, precio_venta, unidad,
-                            impuesto, bonificacion, grupo, subgrupo, fecha_vencimiento
-                        FROM productos
-                        WHERE TRIM(proveedor) = TRIM(?)
-                        ORDER BY id_producto
-                    """, (proveedor_sel,))
-                else:
-                    cursor.execute("""
-                        SELECT
-                            id_producto, codigo_barras, descripcion, cantidad,
-                            proveedor, precio_compra, precio_venta, unidad,
-                            impuesto, bonificacion, grupo, subgrupo, fecha_vencimiento
-                        FROM productos
-                        ORDER BY id_producto
-                    """)
-
-                productos = cursor.fetchall()
-
-                for producto in productos:
-                    self.tree.insert("", "end", values=tuple(producto))
-
-                logging.info(f"Cargados {len(productos)} productos en inventario")
+            logging.info(f"Cargados {len(ids)} productos en inventario")
 
         except Exception as e:
             logging.error(f"Error al cargar productos: {e}", exc_info=True)
@@ -339,6 +360,7 @@ class InventarioWindow:
 
         # Actualizar total
         self._actualizar_total()
+
     def _buscar(self):
         """Busca productos por texto, combinando con el filtro de proveedor activo."""
         consulta = self.search_entry.get().strip().lower()
@@ -348,66 +370,50 @@ class InventarioWindow:
             self._cargar_productos()
             return
 
-        # Proveedor seleccionado desde el Combobox
-        proveedor_sel = None
-        val = self.combo_proveedor.get()
-        if val and val != "(Todos los proveedores)":
-            proveedor_sel = val
+        proveedor_sel = self._proveedor_seleccionado()
 
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
+        filtro_prov = ""
+        if proveedor_sel:
+            filtro_prov = " AND TRIM(LOWER(proveedor)) = TRIM(LOWER(?))"
+        params_prov = [proveedor_sel] if proveedor_sel else []
 
-                params = [f"%{consulta}%"] * 5
-
-                if proveedor_sel:
-                    _SELECT = """
-                        SELECT
-                            id_producto, codigo_barras, descripcion, cantidad,
-                            proveedor, precio_compra, precio_venta, unidad,
-                            impuesto, bonificacion, grupo, subgrupo, fecha_vencimiento
-                        FROM productos
-                        WHERE (
-                            LOWER(codigo_barras) LIKE ?
-                            OR LOWER(descripcion) LIKE ?
-                            OR LOWER(proveedor)   LIKE ?
-                            OR LOWER(grupo)       LIKE ?
-                            OR LOWER(subgrupo)    LIKE ?
-                        )
-                        AND TRIM(LOWER(proveedor)) = TRIM(LOWER(?))
-                    """
-                    params.append(proveedor_sel)
-                else:
-                    _SELECT = """
-                        SELECT
-                            id_producto, codigo_barras, descripcion, cantidad,
-                            proveedor, precio_compra, precio_venta, unidad,
-                            impuesto, bonificacion, grupo, subgrupo, fecha_vencimiento
-                        FROM productos
-                        WHERE (
-                            LOWER(codigo_barras) LIKE ?
-                            OR LOWER(descripcion) LIKE ?
-                            OR LOWER(proveedor)   LIKE ?
-                            OR LOWER(grupo)       LIKE ?
-                            OR LOWER(subgrupo)    LIKE ?
-                        )
-                    """
-
-                cursor.execute(_SELECT, params)
-                resultados = cursor.fetchall()
-
-                for item in self.tree.get_children():
-                    self.tree.delete(item)
-
-                for producto in resultados:
-                    self.tree.insert("", "end", values=tuple(producto))
-
-                if not resultados:
-                    messagebox.showinfo("Sin resultados", "No se encontraron productos")
+        try:
+            # Índice de texto completo: palabras por prefijo, sin tildes
+            ids = None
+            match = consulta_fts(consulta)
+            if match:
+                condicion = (
+                    "id_producto IN "
+                    "(SELECT rowid FROM productos_fts WHERE productos_fts MATCH ?)"
+                    + filtro_prov
+                )
+                params = [match] + params_prov
+                try:
+                    ids = self._consultar_ids(condicion, params)
+                except sqlite3.OperationalError as e:
+                    logging.warning(f"Búsqueda FTS no disponible, usando LIKE: {e}")
+
+            if ids is None or (not ids and consulta.isdigit()):
+                condicion = """(
+                        LOWER(codigo_barras) LIKE ?
+                        OR LOWER(descripcion) LIKE ?
+                        OR LOWER(proveedor)   LIKE ?
+                        OR LOWER(grupo)       LIKE ?
+                        OR LOWER(subgrupo)    LIKE ?
+                    )""" + filtro_prov
+                params = [f"%{consulta}%"] * 5 + params_prov
+                ids = self._consultar_ids(condicion, params)
+
+            self._consulta = (condicion, params)
+            self.tabla.establecer_claves(ids)
+
+            if not ids:
+                messagebox.showinfo("Sin resultados", "No se encontraron productos")
 
         except Exception as e:
             logging.error(f"Error en búsqueda: {e}")
             messagebox.showerror("Error", f"Error en búsqueda: {e}")
+
     def _cargar_proveedores(self):
         """Carga la lista de proveedores únicos desde la BD y puebla el Combobox."""
         try:
@@ -438,39 +444,28 @@ class InventarioWindow:
         self.combo_proveedor.set("(Todos los proveedores)")
         self._cargar_productos()
 
-    def _ordenar_columna(self, col):
-        """Ordena el treeview por columna"""
-        # Obtener todos los datos
-        datos = [(self.tree.set(k, col), k) for k in self.tree.get_children('')]
+    # Columnas que se ordenan como número (el resto, texto sin distinguir mayúsculas)
+    _COLUMNAS_NUMERICAS = {"id_producto", "cantidad", "precio_compra", "precio_venta", "bonificacion"}
 
-        # Determinar si es numérico
-        es_numerico = True
-        for v, _ in datos:
-            try:
-                float(str(v).replace(',', '.'))
-            except ValueError:
-                es_numerico = False
-                break
+    def _ordenar_columna(self, col):
+        """Ordena la tabla por columna (ORDER BY sobre la consulta activa)"""
+        columna = col if col in ("id_producto", "codigo_barras") else sanitize_sql_column(col)
+        if not columna:
+            return
 
         # Cambiar orden
         descendente = self.orden_columnas.get(col, False)
         self.orden_columnas[col] = not descendente
+        self._orden = (columna, descendente)
 
-        # Ordenar
-        if es_numerico:
-            datos.sort(
-                key=lambda t: float(str(t[0]).replace(',', '.')) if t[0] else 0,
-                reverse=descendente
-            )
-        else:
-            datos.sort(
-                key=lambda t: str(t[0]).lower() if t[0] else '',
-                reverse=descendente
-            )
-
-        # Reordenar items
-        for index, (_, k) in enumerate(datos):
-            self.tree.move(k, '', index)
+        try:
+            if self._consulta is None:
+                self._cargar_productos()
+            else:
+                self._mostrar_consulta(*self._consulta)
+        except Exception as e:
+            logging.error(f"Error al ordenar por {col}: {e}")
+            messagebox.showerror("Error", f"No se pudo ordenar:\n{e}")
 
     def _actualizar_total(self):
         """Actualiza el valor total del inventario"""
@@ -479,10 +474,6 @@ class InventarioWindow:
             text=f"💰 Valor total del inventario: ${total:,.0f}".replace(",", ".")
         )
 
-    def _scroll_mouse(self, event):
-        """Scroll con rueda del mouse"""
-        self.tree.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
     def _editar_celda(self, event):
         """Permite editar celda con doble clic o copiar código de barras"""
         region = self.tree.identify("region", event.x, event.y)
@@ -584,7 +575,7 @@ class InventarioWindow:
                 # Actualizar en treeview
                 nuevos_valores = list(valores)
                 nuevos_valores[col_num] = nuevo_valor
-                self.tree.item(item_id, values=nuevos_valores)
+                self.tabla.actualizar_fila(int(id_prod), nuevos_valores)
 
                 # Actualizar total si cambió precio o cantidad
                 if nombre_col in ('precio_compra', 'precio_venta', 'cantidad'):
@@ -650,7 +641,7 @@ class InventarioWindow:
 
         if confirmacion:
             if DatabaseManager.eliminar_producto(int(id_producto)):
-                self.tree.delete(item_id)
+                self.tabla.quitar_clave(int(id_producto))
                 self._actualizar_total()
                 messagebox.showinfo("Éxito", "Producto eliminado correctamente")
             else:
@@ -661,8 +652,6 @@ class InventarioWindow:
         Resetea todo el stock a 0.
         Requiere: rol admin + contrasena del admin verificada contra la BD.
         """
-        import sqlite3 as _sq3
-
         # Verificar rol
         if not AuthManager or not AuthManager.es_admin():
             messagebox.showerror(
@@ -720,15 +709,12 @@ class InventarioWindow:
 
             # Verificar contra BD (mismo hash bcrypt del login)
             try:
-                from config.settings import DB_PATH
-                conn = _sq3.connect(str(DB_PATH))
-                conn.row_factory = _sq3.Row
                 usuario = AuthManager.usuario_actual()
-                row = conn.execute(
-                    "SELECT password_hash FROM usuarios WHERE username=? AND rol='admin'",
-                    (usuario.get("username", "admin"),)
-                ).fetchone()
-                conn.close()
+                with get_db_connection() as conn:
+                    row = conn.execute(
+                        "SELECT password_hash FROM usuarios WHERE username=? AND rol='admin'",
+                        (usuario.get("username", "admin"),)
+                    ).fetchone()
 
                 if not row:
                     messagebox.showerror("Error", "Usuario admin no encontrado.", parent=dlg)
@@ -814,38 +800,14 @@ class InventarioWindow:
           Catalogo, Grupo, SubGrupo, Plazo 2, Plazo 3, EAN
         """
         try:
-            import pandas as pd
             from datetime import datetime
             from tkinter import filedialog, messagebox
-            from models.database import get_db_connection
+            from openpyxl import Workbook
             import logging
 
-            # Obtener productos de la base de datos
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-
-                cursor.execute("""
-                    SELECT 
-                        id_producto,
-                        codigo_barras,
-                        descripcion,
-                        cantidad,
-                        proveedor,
-                        precio_compra,
-                        precio_venta,
-                        unidad,
-                        impuesto,
-                        bonificacion,
-                        grupo,
-                        subgrupo,
-                        fecha_vencimiento
-                    FROM productos
-                    ORDER BY id_producto
-                """)
-
-                productos = cursor.fetchall()
-
-            if not productos:
+            # ¿Hay algo que exportar? (una fila basta)
+            primera, _ = DatabaseManager.iter_productos(page_size=1)
+            if not primera:
                 messagebox.showwarning(
                     "Inventario Vacío",
                     "No hay productos en el inventario para exportar."
@@ -862,52 +824,7 @@ class InventarioWindow:
             if not ruta:
                 return
 
-            # Preparar datos con la estructura del modelo
-            datos_exportar = []
-            fecha_actual = datetime.now().strftime("%Y%m%d")  # Formato YYYYMMDD
-
-            for producto in productos:
-                # Extraer valores del producto
-                id_prod = producto[0]
-                codigo_barras = producto[1] or ""
-                descripcion = producto[2] or ""
-                cantidad = producto[3] or 0
-                proveedor = producto[4] or ""
-                precio_compra = producto[5] or 0
-                precio_venta = producto[6] or 0
-                unidad = producto[7] or "UN"
-                impuesto = producto[8] or "0%  Exento"
-                bonificacion = producto[9] or 0.0
-                grupo = producto[10] or ""
-                subgrupo = producto[11] or ""
-                # fecha_vencimiento = producto[12]  # No se usa en el Excel modelo
-
-                # Construir fila con EXACTAMENTE el orden del modelo
-                fila = {
-                    'Centro': 8100.0,  # Valor fijo del modelo
-                    'Proveedor': proveedor,
-                    'Material': float(id_prod) if id_prod else 0.0,
-                    'Denominación': descripcion,
-                    'Lote': 'NORMAL_0',  # Valor por defecto del modelo
-                    'UND': unidad,
-                    'Cantidad': int(cantidad),
-                    'Venta Real': int(precio_compra),  # El modelo usa enteros
-                    'Venta Cte': int(precio_venta),  # El modelo usa enteros
-                    'Impuesto': impuesto,
-                    '$Marcado': 0.0,  # Valor por defecto
-                    '% Boni': float(bonificacion),
-                    'Fecha Creación': float(fecha_actual),  # Como número YYYYMMDD
-                    'Catalogo': 'ETICOS',  # Valor por defecto del modelo
-                    'Grupo': grupo,
-                    'SubGrupo': subgrupo,
-                    'Plazo 2': '',  # Vacío por defecto
-                    'Plazo 3': '',  # Vacío por defecto
-                    'EAN': codigo_barras
-                }
-
-                datos_exportar.append(fila)
-
-            # Crear DataFrame con el orden exacto de columnas del modelo
+            # Orden exacto de columnas del modelo
             columnas_orden = [
                 'Centro',
                 'Proveedor',
@@ -930,20 +847,67 @@ class InventarioWindow:
                 'EAN'
             ]
 
-            df = pd.DataFrame(datos_exportar, columns=columnas_orden)
+            fecha_actual = datetime.now().strftime("%Y%m%d")  # Formato YYYYMMDD
+
+            # Libro en modo write_only: las filas se escriben página por página
+            # (productos_por_paginas) sin tener el inventario entero en memoria
+            libro = Workbook(write_only=True)
+            hoja = libro.create_sheet("Sheet1")
+            hoja.append(columnas_orden)
+            total_exportados = 0
+
+            for pagina in DatabaseManager.productos_por_paginas(page_size=1000):
+                for producto in pagina:
+                    # Extraer valores del producto (orden de COLUMNAS_LISTADO)
+                    id_prod = producto[0]
+                    codigo_barras = producto[1] or ""
+                    descripcion = producto[2] or ""
+                    cantidad = producto[3] or 0
+                    proveedor = producto[4] or ""
+                    precio_compra = producto[5] or 0
+                    precio_venta = producto[6] or 0
+                    unidad = producto[7] or "UN"
+                    impuesto = producto[8] or "0%  Exento"
+                    bonificacion = producto[9] or 0.0
+                    grupo = producto[10] or ""
+                    subgrupo = producto[11] or ""
+                    # fecha_vencimiento = producto[12]  # No se usa en el Excel modelo
+
+                    # Fila con EXACTAMENTE el orden del modelo
+                    hoja.append([
+                        8100.0,  # Centro: valor fijo del modelo
+                        proveedor,
+                        float(id_prod) if id_prod else 0.0,  # Material
+                        descripcion,
+                        'NORMAL_0',  # Lote por defecto del modelo
+                        unidad,
+                        int(cantidad),
+                        int(precio_compra),  # Venta Real: el modelo usa enteros
+                        int(precio_venta),  # Venta Cte: el modelo usa enteros
+                        impuesto,
+                        0.0,  # $Marcado por defecto
+                        float(bonificacion),
+                        float(fecha_actual),  # Fecha Creación como número YYYYMMDD
+                        'ETICOS',  # Catalogo por defecto del modelo
+                        grupo,
+                        subgrupo,
+                        '',  # Plazo 2 vacío por defecto
+                        '',  # Plazo 3 vacío por defecto
+                        codigo_barras
+                    ])
+                    total_exportados += 1
 
-            # Exportar a Excel
-            df.to_excel(ruta, index=False, sheet_name="Sheet1", engine='openpyxl')
+            libro.save(ruta)
 
             messagebox.showinfo(
                 "✅ Exportación Exitosa",
                 f"Inventario exportado correctamente con formato modelo:\n\n"
                 f"{ruta}\n\n"
-                f"Total productos exportados: {len(productos)}\n"
+                f"Total productos exportados: {total_exportados}\n"
                 f"Columnas: {len(columnas_orden)}"
             )
 
-            logging.info(f"Inventario exportado: {len(productos)} productos a {ruta}")
+            logging.info(f"Inventario exportado: {total_exportados} productos a {ruta}")
 
         except Exception as e:
             logging.error(f"Error al exportar a Excel: {e}", exc_info=True)
@@ -957,11 +921,13 @@ class InventarioWindow:
         - Archivo modelo (19 columnas con EAN, Denominación, Venta Real, etc.)
         - Archivos .xls (antiguos) y .xlsx (modernos)
 
-        El método delega el trabajo pesado al InventarioController
+        El trabajo pesado (lectura + escritura en BD) corre en un hilo
+        trabajador; la ventana sigue respondiendo y se puede cancelar.
         """
-        from tkinter import filedialog, messagebox, Toplevel, Label
-        from tkinter import ttk
+        from tkinter import filedialog
         from controllers.inventario import InventarioController
+        from utils.importaciones import TrabajoImportacion, ErrorImportacion
+        from views.progreso_window import ProgresoWindow
 
         # Seleccionar archivo
         archivo = filedialog.askopenfilename(
@@ -972,61 +938,52 @@ class InventarioWindow:
         if not archivo:
             return
 
-        # Ventana de progreso
-        ventana_progreso = Toplevel(self.window)
-        ventana_progreso.title("Procesando...")
-        ventana_progreso.geometry("400x150")
-        ventana_progreso.transient(self.window)
-        ventana_progreso.grab_set()
-
-        Label(
-            ventana_progreso,
-            text="Procesando archivo Excel...\n\nPor favor espere, esto puede tomar unos momentos.",
-            font=FONT_STYLE,
-            justify="center"
-        ).pack(pady=20)
-
-        # Barra de progreso
-        progress = ttk.Progressbar(
-            ventana_progreso,
-            mode='indeterminate',
-            length=300
-        )
-        progress.pack(pady=10)
-        progress.start(10)
-
-        # Forzar actualización de la ventana
-        ventana_progreso.update()
-
-        # Procesar archivo en segundo plano
-        def procesar():
-            try:
-                # Llamar al controlador para procesar el archivo
-                actualizados, insertados, errores = InventarioController.actualizar_producto_desde_excel(archivo)
-
-                # Cerrar ventana de progreso
-                progress.stop()
-                ventana_progreso.destroy()
+        def terminar(resultado):
+            ventana_progreso.cerrar()
+            actualizados, insertados, errores, sin_cambios = resultado
+            messagebox.showinfo(
+                "Actualización Completada",
+                InventarioController.resumen_importacion(actualizados, insertados, errores, sin_cambios)
+            )
+            # Recargar productos en la tabla
+            if actualizados > 0 or insertados > 0:
+                self._cargar_productos()
 
-                # Recargar productos en la tabla
-                if actualizados > 0 or insertados > 0:
-                    self._cargar_productos()
+        def fallar(error):
+            ventana_progreso.cerrar()
+            if isinstance(error, ErrorImportacion):
+                messagebox.showerror(error.titulo, error.mensaje)
+            elif isinstance(error, FileNotFoundError):
+                messagebox.showerror("Error", f"Archivo no encontrado:\n{archivo}")
+            else:
+                messagebox.showerror("Error", f"No se pudo procesar el archivo:\n\n{error}")
 
-            except Exception as e:
-                progress.stop()
-                ventana_progreso.destroy()
-                messagebox.showerror("Error", f"Error al procesar archivo:\n{e}")
-                import logging
-                logging.error(f"Error en _actualizar_desde_excel: {e}", exc_info=True)
+        def cancelado():
+            ventana_progreso.cerrar()
+            messagebox.showinfo("Cancelado", "Importación cancelada. No se modificó el inventario.")
 
-        # Ejecutar después de un pequeño delay para que la ventana se muestre
-        self.window.after(100, procesar)
+        trabajo = TrabajoImportacion(
+            self.window,
+            lambda progreso: InventarioController.importar_catalogo_excel(archivo, progreso),
+            al_terminar=terminar,
+            al_fallar=fallar,
+            al_cancelar=cancelado,
+            nombre="importacion-catalogo",
+        )
+        ventana_progreso = ProgresoWindow(
+            self.window,
+            "Procesando...",
+            "Procesando archivo Excel...",
+            al_cancelar=trabajo.cancelar,
+        )
+        trabajo.al_progresar = ventana_progreso.actualizar
+        trabajo.iniciar()
 
     def _buscar_y_reemplazar(self):
         """Abre diálogo de búsqueda y reemplazo de precios"""
         ventana = Toplevel(self.window)
         ventana.title("Buscar y reemplazar precios")
-        ventana.geometry("500x300")
+        ventana.geometry("500x420")
         ventana.transient(self.window)
         ventana.grab_set()
 
@@ -1042,7 +999,7 @@ class InventarioWindow:
 
         Label(
             ventana,
-            text="Nuevo precio de COMPRA (opcional):",
+            text="Nuevo precio de COMPRA (opcional, valor o ±%):",
             font=FONT_STYLE
         ).pack(pady=5)
 
@@ -1051,31 +1008,41 @@ class InventarioWindow:
 
         Label(
             ventana,
-            text="Nuevo precio de VENTA (opcional):",
+            text="Nuevo precio de VENTA (opcional, valor o ±%):",
             font=FONT_STYLE
         ).pack(pady=5)
 
         entry_venta = Entry(ventana, font=FONT_STYLE, width=20)
         entry_venta.pack(pady=5)
 
+        Label(
+            ventana,
+            text="o MARGEN de venta sobre compra en % (opcional):",
+            font=FONT_STYLE
+        ).pack(pady=5)
+
+        entry_margen = Entry(ventana, font=FONT_STYLE, width=20)
+        entry_margen.pack(pady=5)
+
         def ejecutar():
             texto = entry_busqueda.get().strip()
             compra = entry_compra.get().strip()
             venta = entry_venta.get().strip()
+            margen = entry_margen.get().strip()
 
             if not texto:
                 messagebox.showerror("Error", "Debe ingresar un texto de búsqueda")
                 return
 
-            if not compra and not venta:
+            if not compra and not venta and not margen:
                 messagebox.showerror(
                     "Error",
-                    "Debe ingresar al menos un precio (compra o venta)"
+                    "Debe ingresar al menos un precio (compra o venta) o un margen"
                 )
                 return
 
             actualizados = InventarioController.buscar_y_reemplazar_precios(
-                texto, compra, venta
+                texto, compra, venta, margen
             )
 
             if actualizados:
@@ -1098,7 +1065,8 @@ class InventarioWindow:
 
         entry_busqueda.bind("<Return>", lambda e: entry_compra.focus())
         entry_compra.bind("<Return>", lambda e: entry_venta.focus())
-        entry_venta.bind("<Return>", lambda e: ejecutar())
+        entry_venta.bind("<Return>", lambda e: entry_margen.focus())
+        entry_margen.bind("<Return>", lambda e: ejecutar())
 
     def _on_close(self):
         """Maneja el cierre de la ventana"""
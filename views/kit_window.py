@@ -17,6 +17,7 @@ import tkinter as tk
 
 from config.settings import FONT_STYLE, BTN_COLOR, BTN_FG
 from models.database import DatabaseManager
+from utils.sugerencias import BuscadorSugerencias
 
 
 # ── helpers ───────────────────────────────────────────────────────────────────
@@ -109,6 +110,16 @@ class KitRow:
                                bg="#e8edf3", width=18, anchor="w")
         self.lbl_costo.pack(side="left", padx=4)
 
+        # Sugerencias en segundo plano (solo productos con stock > 0)
+        self._buscador = BuscadorSugerencias(
+            self.outer,
+            lambda texto: [
+                r for r in DatabaseManager.buscar_productos_like(texto, limit=50)
+                if float(r[2] or 0) > 0
+            ],
+            self._mostrar_sugerencias,
+        )
+
         # ── Bindings ──────────────────────────────────────────────────────────
         self.entry_prod.bind("<KeyRelease>", self._on_prod_keyrelease)
         self.entry_prod.bind("<Return>",     self._on_enter_prod)
@@ -125,21 +136,26 @@ class KitRow:
     # ── Sugerencias ───────────────────────────────────────────────────────────
 
     def _on_prod_keyrelease(self, event):
-        """Busca sugerencias al escribir."""
-        if event.keysym in ("Return", "Up", "Down", "Escape", "Tab"):
+        """Busca sugerencias al escribir (en segundo plano, con debounce)."""
+        if event.keysym in ("Up", "Down"):
+            return
+        if event.keysym in ("Return", "Escape", "Tab"):
+            self._buscador.cancelar()
             return
         if self._cargando:
             return
         texto = self.entry_prod.get().strip()
         if not texto:
+            self._buscador.cancelar()
             self._cerrar_lista()
             return
-        try:
-            res = DatabaseManager.buscar_productos_like(texto, limit=50)
-            # Solo mostrar productos con stock > 0
-            res = [r for r in res if float(r[2]) > 0] if res else []
-        except Exception:
-            res = []
+        self._buscador.solicitar(texto)
+
+    def _mostrar_sugerencias(self, texto, res):
+        """Recibe las sugerencias del buscador en segundo plano."""
+        if self._cargando:
+            return
+        res = res or []
         self._resultados = res
         if res:
             self._abrir_lista(res)
@@ -13,6 +13,7 @@ from tkinter import ttk
 from config.settings import FONT_STYLE
 from models.database import DatabaseManager, get_db_connection
 from utils.formatters import format_precio_display, format_precio_miles
+from utils.sugerencias import BuscadorSugerencias
 import logging
 
 
@@ -75,6 +76,11 @@ class LiquidadorWindow:
         # Ocultar inicialmente
         self.frame_lista.place_forget()
 
+        # Sugerencias en segundo plano (debounce)
+        self._buscador = BuscadorSugerencias(
+            self.window, self._consultar_sugerencias, self._mostrar_sugerencias
+        )
+
         # ── Bindings ──────────────────────────────────────────────────────────
         self.entry_busqueda.bind("<KeyRelease>", self._buscar_sugerencias)
         self.entry_busqueda.bind("<Return>",     self._buscar_exacto_enter)
@@ -461,6 +467,8 @@ class LiquidadorWindow:
         """Muestra sugerencias mientras el usuario escribe."""
         # Ignorar teclas de navegación
         if event.keysym in ("Return", "Up", "Down", "Escape", "Tab"):
+            if event.keysym not in ("Up", "Down"):
+                self._buscador.cancelar()
             if event.keysym == "Escape":
                 self._ocultar_lista()
             return
@@ -468,30 +476,41 @@ class LiquidadorWindow:
         texto = self.entry_busqueda.get().strip()
 
         if len(texto) < 1:
+            self._buscador.cancelar()
             self._ocultar_lista()
             return
 
-        resultados = DatabaseManager.buscar_productos_like(texto, limit=30)
+        self._buscador.solicitar(texto)
 
-        if not resultados:
+    @staticmethod
+    def _consultar_sugerencias(texto: str) -> list:
+        """Hilo trabajador: sugerencias con su precio de compra (del catálogo)."""
+        sugerencias = []
+        for cod, desc, *_ in DatabaseManager.buscar_productos_like(texto, limit=30):
+            producto = DatabaseManager.buscar_producto_por_codigo(cod)
+            sugerencias.append({
+                'codigo': cod,
+                'descripcion': desc,
+                'precio_compra': float(producto['precio_compra'] or 0) if producto else 0.0,
+            })
+        return sugerencias
+
+    def _mostrar_sugerencias(self, texto, sugerencias):
+        """Pinta las sugerencias recibidas del buscador en segundo plano."""
+        if not sugerencias:
             self._ocultar_lista()
             return
 
         self.lista_sugerencias.delete(0, END)
         self._sugerencias_data.clear()
 
-        for cod, desc in resultados:
-            producto = DatabaseManager.buscar_producto_por_codigo(cod)
-            precio = producto['precio_compra'] if producto else 0
+        for datos in sugerencias:
             self.lista_sugerencias.insert(
                 END,
-                f"{cod}  —  {desc}  —  {format_precio_display(precio)}"
+                f"{datos['codigo']}  —  {datos['descripcion']}  —  "
+                f"{format_precio_display(datos['precio_compra'])}"
             )
-            self._sugerencias_data.append({
-                'codigo': cod,
-                'descripcion': desc,
-                'precio_compra': float(precio) if producto else 0.0,
-            })
+            self._sugerencias_data.append(datos)
 
         # ── Posicionar el frame_lista debajo del entry ────────────────────────
         self.window.update_idletasks()
@@ -540,6 +559,7 @@ class LiquidadorWindow:
 
     def _buscar_exacto_enter(self, event):
         """Al presionar Enter en el Entry, busca coincidencia exacta por EAN."""
+        self._buscador.cancelar()
         texto = self.entry_busqueda.get().strip()
         if not texto:
             return
@@ -9,6 +9,8 @@ from tkinter import messagebox
 import bcrypt, sqlite3, logging
 from pathlib import Path
 
+from models.database import get_db_connection
+
 try:
     from ctk_design_system import Colors, Fonts, Dimensions
 except ImportError:
@@ -39,58 +41,49 @@ except ImportError:
 class AuthManager:
     _usuario_actual = None
 
-    @staticmethod
-    def _get_db_path():
-        try:
-            from config.settings import DB_PATH; return DB_PATH
-        except ImportError:
-            return Path("farma_pro_stocker.db")
-
     @classmethod
     def inicializar_tabla_usuarios(cls):
         COLS_REQ = {"id","username","password_hash","nombre","rol","activo","creado"}
         try:
-            conn = sqlite3.connect(str(cls._get_db_path()))
-            cur  = conn.cursor()
-            cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='usuarios'")
-            existe = cur.fetchone() is not None
-            if existe:
-                cur.execute("PRAGMA table_info(usuarios)")
-                cols_act = {r[1] for r in cur.fetchall()}
-                if not COLS_REQ.issubset(cols_act):
-                    faltantes   = COLS_REQ - cols_act
-                    cols_comunes= list(cols_act & COLS_REQ)
-                    logging.warning(f"Migrando tabla usuarios. Faltantes: {faltantes}")
-                    filas = []
-                    if cols_comunes:
-                        try:
-                            cur.execute(f"SELECT {','.join(cols_comunes)} FROM usuarios")
-                            filas = cur.fetchall()
-                        except Exception: pass
-                    cur.execute("DROP TABLE IF EXISTS usuarios")
+            with get_db_connection() as conn:
+                cur  = conn.cursor()
+                cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='usuarios'")
+                existe = cur.fetchone() is not None
+                if existe:
+                    cur.execute("PRAGMA table_info(usuarios)")
+                    cols_act = {r[1] for r in cur.fetchall()}
+                    if not COLS_REQ.issubset(cols_act):
+                        faltantes   = COLS_REQ - cols_act
+                        cols_comunes= list(cols_act & COLS_REQ)
+                        logging.warning(f"Migrando tabla usuarios. Faltantes: {faltantes}")
+                        filas = []
+                        if cols_comunes:
+                            try:
+                                cur.execute(f"SELECT {','.join(cols_comunes)} FROM usuarios")
+                                filas = cur.fetchall()
+                            except Exception: pass
+                        cur.execute("DROP TABLE IF EXISTS usuarios")
+                        cls._crear_tabla(cur); conn.commit()
+                        for f in filas:
+                            try:
+                                ph = ",".join("?"*len(cols_comunes))
+                                cn = ",".join(cols_comunes)
+                                cur.execute(f"INSERT OR IGNORE INTO usuarios ({cn}) VALUES ({ph})", tuple(f))
+                            except Exception: pass
+                        conn.commit()
+                else:
                     cls._crear_tabla(cur); conn.commit()
-                    for f in filas:
-                        try:
-                            ph = ",".join("?"*len(cols_comunes))
-                            cn = ",".join(cols_comunes)
-                            cur.execute(f"INSERT OR IGNORE INTO usuarios ({cn}) VALUES ({ph})", f)
-                        except Exception: pass
-                    conn.commit()
-            else:
-                cls._crear_tabla(cur); conn.commit()
-            cur.execute("SELECT COUNT(*) FROM usuarios")
-            if cur.fetchone()[0] == 0:
-                for user,pw,nom,rol in [
-                    ("admin",   "admin123",  "Administrador",    "admin"),
-                    ("cajero",  "cajero123", "Cajero Principal", "cajero"),
-                ]:
-                    h = bcrypt.hashpw(pw.encode(), bcrypt.gensalt()).decode()
-                    cur.execute(
-                        "INSERT INTO usuarios (username,password_hash,nombre,rol) VALUES (?,?,?,?)",
-                        (user, h, nom, rol)
-                    )
-                conn.commit()
-            conn.close()
+                cur.execute("SELECT COUNT(*) FROM usuarios")
+                if cur.fetchone()[0] == 0:
+                    for user,pw,nom,rol in [
+                        ("admin",   "admin123",  "Administrador",    "admin"),
+                        ("cajero",  "cajero123", "Cajero Principal", "cajero"),
+                    ]:
+                        h = bcrypt.hashpw(pw.encode(), bcrypt.gensalt()).decode()
+                        cur.execute(
+                            "INSERT INTO usuarios (username,password_hash,nombre,rol) VALUES (?,?,?,?)",
+                            (user, h, nom, rol)
+                        )
         except Exception as e:
             logging.error(f"Error inicializando usuarios: {e}")
 
@@ -110,8 +103,7 @@ class AuthManager:
     @classmethod
     def autenticar(cls, username, password):
         try:
-            with sqlite3.connect(str(cls._get_db_path())) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_db_connection() as conn:
                 row = conn.execute(
                     "SELECT * FROM usuarios WHERE username=? AND activo=1",
                     (username.strip().lower(),)
@@ -139,8 +131,7 @@ class AuthManager:
     @classmethod
     def obtener_usuarios(cls):
         try:
-            with sqlite3.connect(str(cls._get_db_path())) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_db_connection() as conn:
                 return [dict(r) for r in conn.execute(
                     "SELECT id,username,nombre,rol,activo,creado FROM usuarios ORDER BY id"
                 ).fetchall()]
@@ -151,12 +142,11 @@ class AuthManager:
     def crear_usuario(cls, username, password, nombre, rol="cajero"):
         try:
             h = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-            with sqlite3.connect(str(cls._get_db_path())) as conn:
+            with get_db_connection() as conn:
                 conn.execute(
                     "INSERT INTO usuarios (username,password_hash,nombre,rol) VALUES (?,?,?,?)",
                     (username.strip().lower(), h, nombre, rol)
                 )
-                conn.commit()
             return True
         except sqlite3.IntegrityError: return False
         except Exception as e: logging.error(e); return False
@@ -165,18 +155,16 @@ class AuthManager:
     def cambiar_password(cls, username, nueva):
         try:
             h = bcrypt.hashpw(nueva.encode(), bcrypt.gensalt()).decode()
-            with sqlite3.connect(str(cls._get_db_path())) as conn:
+            with get_db_connection() as conn:
                 conn.execute("UPDATE usuarios SET password_hash=? WHERE username=?", (h, username))
-                conn.commit()
             return True
         except Exception as e: logging.error(e); return False
 
     @classmethod
     def toggle_usuario(cls, uid, activo):
         try:
-            with sqlite3.connect(str(cls._get_db_path())) as conn:
+            with get_db_connection() as conn:
                 conn.execute("UPDATE usuarios SET activo=? WHERE id=?", (activo, uid))
-                conn.commit()
             return True
         except Exception as e: logging.error(e); return False
 
@@ -76,6 +76,11 @@ class PedidoCentroWindow:
         self.window.state("zoomed")
         self.window.configure(bg=Colors.BACKGROUND)
 
+        # Valores tipados por fila (iid → columna → valor) para ordenar y
+        # totalizar sin releer ni convertir el texto de las celdas
+        self._valores = {}
+        self._orden_cols = {}
+
         self._setup_ui()
         self._cargar_productos()
 
@@ -147,27 +152,14 @@ class PedidoCentroWindow:
         self.tree.pack(side="left", fill="both", expand=True)
 
         # Encabezados
-        _orden = {}
-
-        def sort_col(col):
-            datos = [(self.tree.set(k, col), k) for k in self.tree.get_children("")]
-            try:
-                datos = [(float(v), k) for v, k in datos]
-            except Exception:
-                pass
-            _orden[col] = not _orden.get(col, False)
-            datos.sort(reverse=_orden[col])
-            for i, (_, kid) in enumerate(datos):
-                self.tree.move(kid, "", i)
-
         for col in columnas:
             if col == "ARTICULO":
                 self.tree.heading(col, text=col, anchor="w",
-                                  command=lambda c=col: sort_col(c))
+                                  command=lambda c=col: self._ordenar(c))
                 self.tree.column(col, width=430, anchor="w")
             else:
                 self.tree.heading(col, text=col, anchor="center",
-                                  command=lambda c=col: sort_col(c))
+                                  command=lambda c=col: self._ordenar(c))
                 self.tree.column(col, width=175, anchor="center")
 
         self.tree.bind("<Double-1>", self._editar_celda)
@@ -230,6 +222,7 @@ class PedidoCentroWindow:
 
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._valores.clear()
 
         # Buscar Excel en varias ubicaciones
         _base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -254,8 +247,14 @@ class PedidoCentroWindow:
                     precio_fmt = f"${row['PRECIO']:,.0f}".replace(",", ".")
                 except Exception:
                     precio_fmt = str(row["PRECIO"])
-                self.tree.insert("", tk.END,
-                                 values=(row["ARTICULO"], precio_fmt, "0", "0"))
+                iid = self.tree.insert("", tk.END,
+                                       values=(row["ARTICULO"], precio_fmt, "0", "0"))
+                self._valores[iid] = {
+                    "ARTICULO": str(row["ARTICULO"]).lower(),
+                    "PRECIO":   self._num(precio_fmt),
+                    "CANTIDAD": 0,
+                    "SUBTOTAL": 0.0,
+                }
             self._actualizar_total()
             logging.info(f"Pedido Centro: {len(df)} productos cargados.")
         except Exception as exc:
@@ -266,6 +265,9 @@ class PedidoCentroWindow:
         for item in self.tree.get_children():
             self.tree.set(item, "CANTIDAD", "0")
             self.tree.set(item, "SUBTOTAL", "0")
+        for valores in self._valores.values():
+            valores["CANTIDAD"] = 0
+            valores["SUBTOTAL"] = 0.0
         self._actualizar_total()
 
     # ──────────────────────────────────────────────────────────────────────────
@@ -302,21 +304,34 @@ class PedidoCentroWindow:
         entry.bind("<FocusOut>", lambda e: entry.destroy())
 
     def _recalcular_fila(self, item_id):
+        valores = self._valores.setdefault(item_id, {
+            "ARTICULO": str(self.tree.set(item_id, "ARTICULO")).lower(),
+        })
+        precio = self._num(self.tree.set(item_id, "PRECIO"))
+        valores["PRECIO"] = precio
         try:
-            precio   = self._num(self.tree.set(item_id, "PRECIO"))
             cantidad = int(self.tree.set(item_id, "CANTIDAD"))
             subtotal = precio * cantidad
             self.tree.set(item_id, "SUBTOTAL",
                           f"${subtotal:,.0f}".replace(",", "."))
         except Exception:
+            cantidad, subtotal = 0, 0.0
             self.tree.set(item_id, "SUBTOTAL", "0")
+        valores["CANTIDAD"] = cantidad
+        valores["SUBTOTAL"] = subtotal
         self._actualizar_total()
 
     def _actualizar_total(self):
-        total = sum(self._num(self.tree.set(i, "SUBTOTAL"))
-                    for i in self.tree.get_children())
+        total = sum(v["SUBTOTAL"] for v in self._valores.values())
         self.total_var.set(f"TOTAL: ${total:,.0f}".replace(",", "."))
 
+    def _ordenar(self, col):
+        """Ordena por columna con los valores tipados y reordena en una sola llamada"""
+        desc = not self._orden_cols.get(col, False)
+        self._orden_cols[col] = desc
+        iids = sorted(self._valores, key=lambda i: self._valores[i].get(col, 0), reverse=desc)
+        self.tree.set_children("", *iids)
+
     @staticmethod
     def _num(valor: str) -> float:
         try:
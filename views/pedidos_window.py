@@ -1,14 +1,18 @@
 """
 Ventana de módulo de pedidos
 ✅ MEJORADO: Integración con extractor SIP
+✅ NUEVO: Carga de PDF SIP / Excel / TXT en segundo plano con progreso
 """
 from tkinter import (Toplevel, Frame, Label, Entry, Button, Menu,
                      Listbox, Scrollbar, messagebox, END, W, BOTH, LEFT, RIGHT, Y)
 from tkinter import ttk
 from config.settings import FONT_STYLE, BTN_COLOR, BTN_FG
 from models.database import DatabaseManager, get_db_connection
-from controllers.pedidos import PedidosController
+from controllers.pedidos import PedidosController, PDFNoReconocido, MENSAJE_SIN_PDFPLUMBER
 from utils.formatters import format_precio_display
+from utils.sugerencias import BuscadorSugerencias
+from utils.importaciones import TrabajoImportacion, ErrorImportacion
+from views.progreso_window import ProgresoWindow
 
 
 class PedidosWindow:
@@ -49,6 +53,11 @@ class PedidosWindow:
         self._sug_sb.pack(side=RIGHT, fill=Y)
         self.lista_sugerencias.pack(side=LEFT, fill=BOTH, expand=True)
 
+        # Sugerencias en segundo plano (debounce)
+        self._buscador = BuscadorSugerencias(
+            self.window, DatabaseManager.buscar_productos_like, self._mostrar_sugerencias
+        )
+
         self.entry_busqueda.bind("<KeyRelease>", self._buscar_sugerencias)
         self.entry_busqueda.bind("<Return>",     self._enter_busqueda)
         self.entry_busqueda.bind("<Down>",       self._bajar_sugerencia)
@@ -211,19 +220,22 @@ class PedidosWindow:
 
     def _buscar_sugerencias(self, event):
         """Muestra sugerencias flotantes mientras se escribe"""
-        if event.keysym in ("Return", "Up", "Down", "Escape", "Tab"):
+        if event.keysym in ("Up", "Down"):
+            return
+        if event.keysym in ("Return", "Escape", "Tab"):
+            self._buscador.cancelar()
             return
 
         texto = self.entry_busqueda.get().strip()
         if not texto:
+            self._buscador.cancelar()
             self._ocultar_sugerencias()
             return
 
-        try:
-            resultados = DatabaseManager.buscar_productos_like(texto)
-        except Exception:
-            resultados = []
+        self._buscador.solicitar(texto)
 
+    def _mostrar_sugerencias(self, texto, resultados):
+        """Pinta las sugerencias recibidas del buscador en segundo plano."""
         if resultados:
             self.lista_sugerencias.delete(0, END)
             for item in resultados:
@@ -253,6 +265,8 @@ class PedidosWindow:
 
     def _enter_busqueda(self, event=None):
         """Enter: si hay sugerencias visibles selecciona; si no, busca por código exacto."""
+        # Un lector de código envía Enter antes de que termine el debounce
+        self._buscador.cancelar()
         if self._frame_sug.winfo_ismapped():
             if not self.lista_sugerencias.curselection() and self.lista_sugerencias.size() > 0:
                 self.lista_sugerencias.selection_set(0)
@@ -412,78 +426,95 @@ class PedidosWindow:
 
         return productos
 
-    def _cargar_desde_sip_pdf(self):
+    def _importar_en_segundo_plano(self, titulo: str, texto: str, tarea, al_terminar, al_fallar=None):
+        """
+        Ejecuta una lectura de pedido en un hilo trabajador con ventana de
+        progreso cancelable (ver utils/importaciones).
+        """
+        def terminar(resultado):
+            ventana_progreso.cerrar()
+            al_terminar(resultado)
+
+        def fallar(error):
+            ventana_progreso.cerrar()
+            if al_fallar and al_fallar(error):
+                return
+            if isinstance(error, ErrorImportacion):
+                messagebox.showerror(error.titulo, error.mensaje)
+            elif isinstance(error, ImportError):
+                messagebox.showerror("Módulo No Disponible", MENSAJE_SIN_PDFPLUMBER)
+            else:
+                messagebox.showerror("Error", f"No se pudo procesar el archivo:\n{error}")
+
+        trabajo = TrabajoImportacion(
+            self.window, tarea,
+            al_terminar=terminar,
+            al_fallar=fallar,
+            al_cancelar=lambda: ventana_progreso.cerrar(),
+            nombre="importacion-pedido",
+        )
+        ventana_progreso = ProgresoWindow(self.window, titulo, texto, al_cancelar=trabajo.cancelar)
+        trabajo.al_progresar = ventana_progreso.actualizar
+        trabajo.iniciar()
+
+    def _agregar_productos_cargados(self, productos: list):
+        """Agrega al pedido los productos leídos de un archivo"""
+        for prod in productos:
+            self.tree_pedido.insert("", "end", values=(
+                prod['codigo'],
+                prod['descripcion'],
+                prod['cantidad'],
+                format_precio_display(prod['precio_compra'])
+            ))
+
+        self._actualizar_costo_total()
+
+    def _cargar_desde_sip_pdf(self, archivo: str = None, validar: bool = True):
         """
         ✅ NUEVO: Carga pedido desde PDF de SIP Asociados
         """
         from tkinter import filedialog
 
-        archivo = filedialog.askopenfilename(
-            title="Seleccionar factura PDF de SIP Asociados",
-            filetypes=[("Archivos PDF", "*.pdf")]
-        )
+        if archivo is None:
+            archivo = filedialog.askopenfilename(
+                title="Seleccionar factura PDF de SIP Asociados",
+                filetypes=[("Archivos PDF", "*.pdf")]
+            )
 
         if not archivo:
             return
 
-        try:
-            # Mostrar ventana de progreso
-            ventana_progreso = Toplevel(self.window)
-            ventana_progreso.title("Procesando PDF SIP...")
-            ventana_progreso.geometry("400x150")
-            ventana_progreso.transient(self.window)
-            ventana_progreso.grab_set()
-
-            Label(
-                ventana_progreso,
-                text="Extrayendo datos del PDF de SIP Asociados...\n\n"
-                     "Por favor espere, esto puede tomar unos momentos.",
-                font=FONT_STYLE,
-                justify="center"
-            ).pack(pady=20)
-
-            # Barra de progreso
-            from tkinter import ttk
-            progress = ttk.Progressbar(
-                ventana_progreso,
-                mode='indeterminate',
-                length=300
+        def terminar(resultado):
+            productos, encontrados, no_encontrados = resultado
+            messagebox.showinfo(
+                "Extracción SIP Completada",
+                PedidosController.resumen_extraccion_sip(productos, encontrados, no_encontrados)
             )
-            progress.pack(pady=10)
-            progress.start(10)
-
-            # Forzar actualización
-            ventana_progreso.update()
-
-            # Procesar en segundo plano
-            def procesar():
-                productos = PedidosController.cargar_pedido_desde_sip_pdf(archivo)
-
-                # Cerrar ventana de progreso
-                progress.stop()
-                ventana_progreso.destroy()
-
-                if productos:
-                    # Limpiar pedido actual
-                    for item in self.tree_pedido.get_children():
-                        self.tree_pedido.delete(item)
-
-                    # Agregar productos
-                    for prod in productos:
-                        self.tree_pedido.insert("", "end", values=(
-                            prod['codigo'],
-                            prod['descripcion'],
-                            prod['cantidad'],
-                            format_precio_display(prod['precio_compra'])
-                        ))
-
-                    self._actualizar_costo_total()
-
-            # Ejecutar después de un pequeño delay
-            self.window.after(100, procesar)
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar PDF SIP:\n{e}")
+            if productos:
+                # Limpiar pedido actual
+                for item in self.tree_pedido.get_children():
+                    self.tree_pedido.delete(item)
+
+                self._agregar_productos_cargados(productos)
+
+        def fallar(error):
+            if not isinstance(error, PDFNoReconocido):
+                return False
+            if messagebox.askyesno(
+                "Validación de PDF",
+                "El archivo no parece ser una factura de SIP Asociados.\n\n"
+                "¿Desea continuar de todas formas?"
+            ):
+                self._cargar_desde_sip_pdf(archivo, validar=False)
+            return True
+
+        self._importar_en_segundo_plano(
+            "Procesando PDF SIP...",
+            "Extrayendo datos del PDF de SIP Asociados...",
+            lambda progreso: PedidosController.leer_pedido_sip_pdf(archivo, progreso, validar),
+            terminar,
+            fallar,
+        )
 
     def _cargar_desde_excel(self):
         """Carga pedido desde Excel"""
@@ -497,19 +528,17 @@ class PedidosWindow:
         if not archivo:
             return
 
-        productos = PedidosController.cargar_pedido_desde_excel(archivo)
-
-        if productos:
-            for prod in productos:
-                self.tree_pedido.insert("", "end", values=(
-                    prod['codigo'],
-                    prod['descripcion'],
-                    prod['cantidad'],
-                    format_precio_display(prod['precio_compra'])
-                ))
+        def terminar(productos):
+            if productos:
+                self._agregar_productos_cargados(productos)
+                messagebox.showinfo("Éxito", f"{len(productos)} productos cargados")
 
-            self._actualizar_costo_total()
-            messagebox.showinfo("Éxito", f"{len(productos)} productos cargados")
+        self._importar_en_segundo_plano(
+            "Procesando...",
+            "Cargando pedido desde Excel...",
+            lambda progreso: PedidosController.leer_pedido_excel(archivo, progreso),
+            terminar,
+        )
 
     def _cargar_desde_txt(self):
         """Carga pedido desde TXT"""
@@ -523,19 +552,17 @@ class PedidosWindow:
         if not archivo:
             return
 
-        productos = PedidosController.cargar_pedido_desde_txt(archivo)
-
-        if productos:
-            for prod in productos:
-                self.tree_pedido.insert("", "end", values=(
-                    prod['codigo'],
-                    prod['descripcion'],
-                    prod['cantidad'],
-                    format_precio_display(prod['precio_compra'])
-                ))
+        def terminar(productos):
+            if productos:
+                self._agregar_productos_cargados(productos)
+                messagebox.showinfo("Éxito", f"{len(productos)} productos cargados")
 
-            self._actualizar_costo_total()
-            messagebox.showinfo("Éxito", f"{len(productos)} productos cargados")
+        self._importar_en_segundo_plano(
+            "Procesando...",
+            "Cargando pedido desde TXT...",
+            lambda progreso: PedidosController.leer_pedido_txt(archivo, progreso),
+            terminar,
+        )
 
     def _exportar_pdf(self):
         """Exporta pedido a PDF"""
@@ -0,0 +1,87 @@
+"""
+Ventana de progreso para importaciones en segundo plano
+Muestra filas leídas / escritas / errores y permite cancelar
+(ver utils/importaciones.TrabajoImportacion).
+"""
+from tkinter import Toplevel, Label, Button
+from tkinter import ttk
+from config.settings import FONT_STYLE, BTN_COLOR, BTN_FG
+
+
+class ProgresoWindow:
+    """Diálogo modal con barra de avance y botón Cancelar"""
+
+    def __init__(self, parent, titulo: str, texto: str, al_cancelar=None):
+        self.window = Toplevel(parent)
+        self.window.title(titulo)
+        self.window.geometry("420x200")
+        self.window.resizable(False, False)
+        self.window.transient(parent)
+        # Recordar la ventana modal de origen para devolverle el foco al cerrar
+        self._grab_anterior = self.window.grab_current()
+        self.window.grab_set()
+        self._al_cancelar = al_cancelar
+
+        Label(
+            self.window,
+            text=texto,
+            font=FONT_STYLE,
+            justify="center"
+        ).pack(pady=(15, 5))
+
+        self.progress = ttk.Progressbar(self.window, mode='indeterminate', length=340)
+        self.progress.pack(pady=5)
+        self.progress.start(10)
+
+        self.lbl_estado = Label(self.window, text="Preparando...", font=FONT_STYLE)
+        self.lbl_estado.pack(pady=5)
+
+        self.btn_cancelar = Button(
+            self.window,
+            text="Cancelar",
+            command=self._cancelar,
+            bg=BTN_COLOR,
+            fg=BTN_FG,
+            font=FONT_STYLE
+        )
+        self.btn_cancelar.pack(pady=5)
+
+        # Cerrar con la X equivale a cancelar
+        self.window.protocol("WM_DELETE_WINDOW", self._cancelar)
+
+    def actualizar(self, estado: dict):
+        """Pinta el estado publicado por Progreso.reportar()"""
+        if not self.window.winfo_exists():
+            return
+
+        total = estado.get("total") or 0
+        if total > 0:
+            if str(self.progress.cget("mode")) != "determinate":
+                self.progress.stop()
+                self.progress.configure(mode='determinate', maximum=total)
+            self.progress["value"] = max(estado.get("leidas", 0), estado.get("escritas", 0))
+
+        partes = [f"Leídas: {estado.get('leidas', 0):,}"]
+        if estado.get("escritas"):
+            partes.append(f"Escritas: {estado['escritas']:,}")
+        if estado.get("errores"):
+            partes.append(f"Errores: {estado['errores']:,}")
+        texto = "  ·  ".join(partes)
+        if estado.get("mensaje"):
+            texto = f"{estado['mensaje']}\n{texto}"
+        self.lbl_estado.config(text=texto)
+
+    def _cancelar(self):
+        self.btn_cancelar.config(state="disabled", text="Cancelando...")
+        if self._al_cancelar:
+            self._al_cancelar()
+
+    def cerrar(self):
+        try:
+            self.progress.stop()
+            self.window.grab_release()
+            self.window.destroy()
+            if self._grab_anterior is not None:
+                self._grab_anterior.grab_set()
+        except Exception:
+            pass
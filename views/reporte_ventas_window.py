@@ -7,7 +7,7 @@ Funcionalidades:
   - Tabla de historial de ventas (ID, Fecha, Total, Cajero, N° Productos)
   - Panel de resumen: Total recaudado, N° ventas, Promedio por venta
   - Detalle de venta al seleccionar una fila (productos vendidos)
-  - Exportar reporte PDF con resumen + detalle completo
+  - Exportar reporte PDF con resumen + ventas por día/semana/mes + detalle completo
 """
 
 import tkinter as tk
@@ -33,6 +33,9 @@ except ImportError:
         BUTTON_HEIGHT = 46; BUTTON_RADIUS = 8
 
 from controllers.ventas import VentasController
+from models.database import get_db_connection, DatabaseManager, publicar_al_confirmar
+from utils import eventos
+from utils.formatters import rango_fechas_sql
 
 # Auth (para verificar rol admin en reinicio de ventas)
 try:
@@ -443,46 +446,16 @@ class ReporteVentasWindow:
 
     def _actualizar_panel_metodos(self):
         """Recalcula balance por método para Hoy / Mes / Año directamente desde BD."""
-        import sqlite3
-        from config.settings import DB_PATH
-        from datetime import date
-
-        hoy   = date.today()
-        hoy_s = str(hoy)                        # "YYYY-MM-DD"
-        mes_s = hoy.strftime("%Y-%m")           # "YYYY-MM"
-        anio_s = str(hoy.year)                  # "YYYY"
-
         metodos = list(self._metodo_labels.keys())
         # Estructura: {metodo: [total_hoy, total_mes, total_anio]}
         totales = {m: [0.0, 0.0, 0.0] for m in metodos}
 
-        try:
-            conn = sqlite3.connect(str(DB_PATH))
-            conn.row_factory = sqlite3.Row
-            cur  = conn.cursor()
-
-            # Consulta única: agrupada por metodo_pago y período
-            cur.execute("""
-                SELECT
-                    COALESCE(metodo_pago, 'Efectivo') AS metodo,
-                    SUM(CASE WHEN fecha LIKE ? || '%' THEN total ELSE 0 END) AS hoy,
-                    SUM(CASE WHEN fecha LIKE ? || '%' THEN total ELSE 0 END) AS mes,
-                    SUM(CASE WHEN fecha LIKE ? || '%' THEN total ELSE 0 END) AS anio
-                FROM ventas
-                GROUP BY COALESCE(metodo_pago, 'Efectivo')
-            """, (hoy_s, mes_s, anio_s))
-
-            for row in cur.fetchall():
-                m = str(row["metodo"])
-                # Si es un método conocido, acumular; si no, sumar a Efectivo
-                dest = m if m in totales else "Efectivo"
-                totales[dest][0] += float(row["hoy"]  or 0)
-                totales[dest][1] += float(row["mes"]  or 0)
-                totales[dest][2] += float(row["anio"] or 0)
-
-            conn.close()
-        except Exception as e:
-            logging.warning(f"Error calculando balance por método: {e}")
+        # Consulta única por rango de fechas del año en curso
+        for m, valores in VentasController.balance_por_metodo().items():
+            # Si es un método conocido, acumular; si no, sumar a Efectivo
+            dest = m if m in totales else "Efectivo"
+            for i, v in enumerate(valores):
+                totales[dest][i] += v
 
         for metodo, (lbl_hoy, lbl_mes, lbl_anio) in self._metodo_labels.items():
             t = totales[metodo]
@@ -544,18 +517,10 @@ class ReporteVentasWindow:
         self._fecha_inicio = fecha_inicio
         self._fecha_fin    = fecha_fin
 
-        # Historial completo (hasta 2000 registros)
-        todas = VentasController.obtener_historial_ventas(limite=2000)
-
-        # Filtrar por rango en Python (el controller no filtra fechas directamente)
-        def en_rango(v):
-            try:
-                fecha_v = v["fecha"][:10]   # 'YYYY-MM-DD'
-                return fecha_inicio <= fecha_v <= fecha_fin
-            except Exception:
-                return False
-
-        self._ventas_actuales = [v for v in todas if en_rango(v)]
+        # Rango filtrado en SQL; los productos se decodifican al abrir el detalle
+        self._ventas_actuales = list(
+            VentasController.obtener_ventas_rango(fecha_inicio, fecha_fin)
+        )
 
         self._poblar_tabla()
         self._actualizar_resumen()
@@ -564,7 +529,7 @@ class ReporteVentasWindow:
     def _poblar_tabla(self):
         self.tree.delete(*self.tree.get_children())
         for i, v in enumerate(self._ventas_actuales):
-            n_prod = len(v.get("productos", []))
+            n_prod = v.get("n_productos", 0)
             tag    = "alt" if i % 2 == 1 else ""
             metodo = v.get("metodo_pago", "Efectivo") or "Efectivo"
             self.tree.insert("", "end", iid=str(v["id"]),
@@ -578,62 +543,15 @@ class ReporteVentasWindow:
                              ),
                              tags=(tag,))
 
-    def _calcular_costo_venta(self, venta: dict) -> float:
-        """
-        Calcula el costo real de una venta consultando precio_compra en la BD.
-        Si el producto tiene impuesto '19%  IVA' (o '19% IVA'), se aplica
-        el 19% al precio de compra para reflejar el costo real:
-            ej: compra $10.000 con IVA → costo real $11.900
-
-        KITS: usa el campo costo_base guardado en el JSON de la venta,
-        calculado al registrar como suma de costo_prop de sus componentes.
-        No consulta la BD para kits porque su codigo "KIT" no existe en productos.
-        """
-        import sqlite3
-        from config.settings import DB_PATH
-        costo = 0.0
-        try:
-            conn = sqlite3.connect(str(DB_PATH))
-            cursor = conn.cursor()
-            for prod in venta.get("productos", []):
-                codigo = prod.get("codigo", "")
-
-                # Kit: el costo ya esta calculado y guardado en el JSON
-                if prod.get("es_kit") or str(codigo) == "KIT":
-                    costo += float(prod.get("costo_base", 0))
-                    continue
-
-                # Servicio SVC-*: costo = 0 (sin mercancia)
-                if str(codigo).startswith("SVC-"):
-                    continue
-
-                # Producto normal: consultar precio_compra en BD
-                cantidad = float(prod.get("cantidad", 0))
-                cursor.execute(
-                    "SELECT precio_compra, impuesto FROM productos WHERE codigo_barras = ?",
-                    (codigo,)
-                )
-                row = cursor.fetchone()
-                if row and row[0]:
-                    precio_compra = float(row[0])
-                    impuesto      = str(row[1] or "").strip()
-                    # Soporta "19%  IVA" (2 espacios) y "19% IVA" (1 espacio)
-                    if impuesto in ("19%  IVA", "19% IVA"):
-                        precio_compra *= 1.19
-                    costo += precio_compra * cantidad
-            conn.close()
-        except Exception as e:
-            logging.warning(f"No se pudo calcular costo de venta {venta.get('id')}: {e}")
-        return costo
-
     def _actualizar_resumen(self):
         n      = len(self._ventas_actuales)
         total  = sum(v["total"] for v in self._ventas_actuales)
         prom   = total / n if n else 0
 
-        costo_total = sum(self._calcular_costo_venta(v) for v in self._ventas_actuales)
-        ganancia    = total - costo_total
-        utilidad    = (ganancia / total * 100) if total > 0 else 0.0
+        # Costo de todo el período en una sola consulta
+        resumen  = VentasController.resumen_costos_periodo(self._fecha_inicio, self._fecha_fin)
+        ganancia = resumen["ganancia"]
+        utilidad = resumen["utilidad_pct"]
 
         self.lbl_n_ventas.config(text=str(n))
         self.lbl_total_per.config(text=_fmt(total))
@@ -680,7 +598,7 @@ class ReporteVentasWindow:
         self.lbl_total_det.config(text=f"Total: {_fmt(venta['total'])}")
 
         self.tree_det.delete(*self.tree_det.get_children())
-        for prod in venta.get("productos", []):
+        for prod in VentasController.productos_de_venta(venta):
             cant_raw = prod.get("cantidad", 0)
             try:
                 cant_val = float(cant_raw)
@@ -747,7 +665,7 @@ class ReporteVentasWindow:
             )
             return
 
-        productos_raw = venta.get("productos", [])
+        productos_raw = VentasController.productos_de_venta(venta)
         if not productos_raw:
             tk.messagebox.showwarning(
                 "Sin productos",
@@ -810,26 +728,33 @@ class ReporteVentasWindow:
                 parent=self.window
             )
 
+    # Clave de orden de cada columna sobre las ventas ya tipadas de la consulta
+    _CLAVES_ORDEN = {
+        "id":     lambda v: v["id"],
+        "fecha":  lambda v: v["fecha"] or "",
+        "metodo": lambda v: (v.get("metodo_pago") or "Efectivo").lower(),
+        "total":  lambda v: v["total"],
+        "n_prod": lambda v: v.get("n_productos") or 0,
+        "cajero": lambda v: (v.get("cajero") or "").lower(),
+    }
     _orden_col = {}
 
     def _ordenar(self, col):
-        datos = [(self.tree.set(k, col), k) for k in self.tree.get_children("")]
-        if col in ("total",):
-            try:
-                datos = [(float(v.replace("$","").replace(".","").replace(",",".")), k)
-                         for v, k in datos]
-            except Exception:
-                pass
-        elif col in ("id", "n_prod"):
-            try:
-                datos = [(int(v), k) for v, k in datos]
-            except Exception:
-                pass
+        """
+        Ordena por columna con los valores de _ventas_actuales (sin leer ni
+        convertir el texto de las celdas) y reordena el Treeview en una sola
+        llamada.
+        """
+        clave = self._CLAVES_ORDEN.get(col)
+        if clave is None:
+            return
 
         self._orden_col[col] = not self._orden_col.get(col, False)
-        datos.sort(reverse=self._orden_col[col])
-        for idx, (_, kid) in enumerate(datos):
-            self.tree.move(kid, "", idx)
+        self._ventas_actuales.sort(key=clave, reverse=self._orden_col[col])
+
+        iids = [str(v["id"]) for v in self._ventas_actuales]
+        self.tree.set_children("", *iids)
+        for idx, kid in enumerate(iids):
             self.tree.item(kid, tags=("alt" if idx % 2 else "",))
 
     def _reiniciar_ventas_hoy(self):
@@ -838,7 +763,6 @@ class ReporteVentasWindow:
         Requiere rol admin + confirmacion con contrasena.
         Guarda backup en el log antes de borrar.
         """
-        import sqlite3 as _sq3
         import bcrypt as _bcrypt
         from datetime import datetime as _dt
 
@@ -903,15 +827,12 @@ class ReporteVentasWindow:
 
             # Verificar contrasena bcrypt
             try:
-                from config.settings import DB_PATH
-                conn = _sq3.connect(str(DB_PATH))
-                conn.row_factory = _sq3.Row
                 usuario = AuthManager.usuario_actual()
-                row = conn.execute(
-                    "SELECT password_hash FROM usuarios WHERE username=? AND rol='admin'",
-                    (usuario.get("username", "admin"),)
-                ).fetchone()
-                conn.close()
+                with get_db_connection() as conn:
+                    row = conn.execute(
+                        "SELECT password_hash FROM usuarios WHERE username=? AND rol='admin'",
+                        (usuario.get("username", "admin"),)
+                    ).fetchone()
                 if not row:
                     messagebox.showerror("Error", "Usuario admin no encontrado.", parent=dlg)
                     return
@@ -928,35 +849,35 @@ class ReporteVentasWindow:
 
             # Borrar ventas del dia con backup en log
             hoy = _dt.now().strftime("%Y-%m-%d")
+            inicio, fin = rango_fechas_sql(hoy)
             try:
                 import json as _json
-                from config.settings import DB_PATH
-                conn = _sq3.connect(str(DB_PATH))
-                conn.row_factory = _sq3.Row
-                ventas = conn.execute(
-                    "SELECT * FROM ventas WHERE fecha LIKE ?", (f"{hoy}%",)
-                ).fetchall()
-                n = len(ventas)
+                with get_db_connection() as conn:
+                    ventas = conn.execute(
+                        "SELECT * FROM ventas WHERE fecha >= ? AND fecha < ?", (inicio, fin)
+                    ).fetchall()
+                    n = len(ventas)
+                    if n > 0:
+                        # Backup en log
+                        backup = [dict(v) for v in ventas]
+                        logging.warning(
+                            f"REINICIO_VENTAS | Fecha: {hoy} | "
+                            f"Usuario: {AuthManager.usuario_actual().get('username')} | "
+                            f"Registros: {n} | "
+                            f"Backup: {_json.dumps(backup, ensure_ascii=False)}"
+                        )
+                        # Eliminar (y sacar el día del resumen del dashboard)
+                        conn.execute("DELETE FROM ventas WHERE fecha >= ? AND fecha < ?", (inicio, fin))
+                        DatabaseManager.recalcular_resumen_diario(conn.cursor(), hoy, hoy)
+                        DatabaseManager.recalcular_ventas_por_producto(conn.cursor())
+                        publicar_al_confirmar(eventos.VENTAS)
                 if n == 0:
-                    conn.close()
                     messagebox.showinfo(
                         "Sin ventas",
                         f"No hay ventas registradas hoy ({hoy}).",
                         parent=self.window
                     )
                     return
-                # Backup en log
-                backup = [dict(v) for v in ventas]
-                logging.warning(
-                    f"REINICIO_VENTAS | Fecha: {hoy} | "
-                    f"Usuario: {AuthManager.usuario_actual().get('username')} | "
-                    f"Registros: {n} | "
-                    f"Backup: {_json.dumps(backup, ensure_ascii=False)}"
-                )
-                # Eliminar
-                conn.execute("DELETE FROM ventas WHERE fecha LIKE ?", (f"{hoy}%",))
-                conn.commit()
-                conn.close()
                 logging.info(f"Ventas del dia {hoy} eliminadas — {n} registros.")
                 messagebox.showinfo(
                     "Completado",
@@ -1003,7 +924,6 @@ class ReporteVentasWindow:
         ⚠️ OPERACIÓN IRREVERSIBLE — Solo admin + contraseña bcrypt.
         Guarda un backup del log antes de borrar.
         """
-        import sqlite3 as _sq3
         import bcrypt as _bcrypt
         from datetime import datetime as _dt
 
@@ -1069,15 +989,12 @@ class ReporteVentasWindow:
 
             # Verificar contraseña bcrypt
             try:
-                from config.settings import DB_PATH
-                conn = _sq3.connect(str(DB_PATH))
-                conn.row_factory = _sq3.Row
                 usuario = AuthManager.usuario_actual()
-                row = conn.execute(
-                    "SELECT password_hash FROM usuarios WHERE username=? AND rol='admin'",
-                    (usuario.get("username", "admin"),)
-                ).fetchone()
-                conn.close()
+                with get_db_connection() as conn:
+                    row = conn.execute(
+                        "SELECT password_hash FROM usuarios WHERE username=? AND rol='admin'",
+                        (usuario.get("username", "admin"),)
+                    ).fetchone()
                 if not row:
                     messagebox.showerror("Error", "Usuario admin no encontrado.", parent=dlg)
                     return
@@ -1103,21 +1020,21 @@ class ReporteVentasWindow:
                 return
 
             try:
-                from config.settings import DB_PATH
                 import logging
-                conn = _sq3.connect(str(DB_PATH))
-                # Registrar en log antes de borrar
-                n = conn.execute("SELECT COUNT(*) FROM ventas").fetchone()[0]
-                total = conn.execute("SELECT COALESCE(SUM(total),0) FROM ventas").fetchone()[0]
-                logging.warning(
-                    f"REINICIO TOTAL DE VENTAS — {n} registros eliminados — "
-                    f"Total acumulado: ${total:,.0f} — "
-                    f"Operador: {AuthManager.usuario_actual().get('username','?')} — "
-                    f"Fecha: {_dt.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                )
-                conn.execute("DELETE FROM ventas")
-                conn.commit()
-                conn.close()
+                with get_db_connection() as conn:
+                    # Registrar en log antes de borrar
+                    n = conn.execute("SELECT COUNT(*) FROM ventas").fetchone()[0]
+                    total = conn.execute("SELECT COALESCE(SUM(total),0) FROM ventas").fetchone()[0]
+                    logging.warning(
+                        f"REINICIO TOTAL DE VENTAS — {n} registros eliminados — "
+                        f"Total acumulado: ${total:,.0f} — "
+                        f"Operador: {AuthManager.usuario_actual().get('username','?')} — "
+                        f"Fecha: {_dt.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                    )
+                    conn.execute("DELETE FROM ventas")
+                    DatabaseManager.recalcular_resumen_diario(conn.cursor())
+                    DatabaseManager.recalcular_ventas_por_producto(conn.cursor())
+                    publicar_al_confirmar(eventos.VENTAS)
                 logging.info(f"Historial de ventas reiniciado — {n} registros eliminados.")
                 messagebox.showinfo(
                     "Completado",
@@ -1248,10 +1165,15 @@ class ReporteVentasWindow:
 
         story.append(Paragraph("Resumen del período", s_sec))
 
+        costos = VentasController.resumen_costos_periodo(self._fecha_inicio, self._fecha_fin)
+
         datos_res = [
             ["Número de ventas", str(n)],
             ["Total recaudado",  _fmt(total)],
             ["Promedio por venta", _fmt(prom)],
+            ["Costo de mercancía", _fmt(costos["costo"])],
+            ["Ganancia", _fmt(costos["ganancia"])],
+            ["Utilidad", f"{costos['utilidad_pct']:.1f}%"],
         ]
         tbl_res = Table(datos_res, colWidths=[10*cm, 6*cm])
         tbl_res.setStyle(TableStyle([
@@ -1270,6 +1192,42 @@ class ReporteVentasWindow:
         story.append(tbl_res)
         story.append(Spacer(1, 16))
 
+        # ── Ventas por período (día / semana / mes según el rango) ────────
+        dias = (datetime.strptime(self._fecha_fin, "%Y-%m-%d")
+                - datetime.strptime(self._fecha_inicio, "%Y-%m-%d")).days + 1
+        if dias > 1:
+            granularidad, titulo, formato = (
+                ("dia",    "Ventas por día",    "%d/%m/%Y") if dias <= 31 else
+                ("semana", "Ventas por semana", "Semana del %d/%m/%Y") if dias <= 180 else
+                ("mes",    "Ventas por mes",    "%m/%Y")
+            )
+            serie = VentasController.ventas_por_periodo(
+                granularidad, self._fecha_inicio, self._fecha_fin
+            )
+            story.append(Paragraph(titulo, s_sec))
+            filas_per = [["Período", "# Ventas", "Total", "Ganancia"]] + [
+                [p["inicio"].strftime(formato),
+                 str(p["num_ventas"]),
+                 _fmt(p["total"]),
+                 _fmt(p["total"] - p["costo"])]
+                for p in serie
+            ]
+            tbl_per = Table(filas_per, colWidths=[6*cm, 3*cm, 3.5*cm, 3.5*cm], repeatRows=1)
+            tbl_per.setStyle(TableStyle([
+                ("BACKGROUND",   (0, 0), (-1, 0), AZUL),
+                ("TEXTCOLOR",    (0, 0), (-1, 0), white),
+                ("FONTNAME",     (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE",     (0, 0), (-1, -1), 9),
+                ("ALIGN",        (1, 0), (-1, -1), "RIGHT"),
+                ("ROWBACKGROUNDS",(0, 1), (-1, -1), [white, GRIS]),
+                ("GRID",         (0, 0), (-1, -1), 0.3, HexColor("#bbbbbb")),
+                ("TOPPADDING",   (0, 0), (-1, -1), 4),
+                ("BOTTOMPADDING",(0, 0), (-1, -1), 4),
+                ("LEFTPADDING",  (0, 0), (-1, -1), 6),
+            ]))
+            story.append(tbl_per)
+            story.append(Spacer(1, 16))
+
         # ── Tabla de ventas ───────────────────────────────────────────────
         story.append(Paragraph("Detalle de ventas", s_sec))
 
@@ -1278,7 +1236,7 @@ class ReporteVentasWindow:
             [str(v["id"]),
              _fmt_fecha(v["fecha"]),
              _fmt(v["total"]),
-             str(len(v.get("productos", []))),
+             str(v.get("n_productos", 0)),
              v.get("cajero", "Principal")]
             for v in self._ventas_actuales
         ]
@@ -1327,30 +1285,11 @@ class ReporteVentasWindow:
             _count_mp[dest]   += 1
 
         # También calcular Hoy / Mes / Año desde BD para el PDF
-        import sqlite3 as _sq3_pdf
-        from datetime import date as _date_pdf
-        from config.settings import DB_PATH as _DB_PATH_PDF
-        _hoy   = str(_date_pdf.today())
-        _mes   = _date_pdf.today().strftime("%Y-%m")
-        _anio  = str(_date_pdf.today().year)
         _by_period = {m: [0.0, 0.0, 0.0] for m in _metodos_orden}
-        try:
-            _c2 = _sq3_pdf.connect(str(_DB_PATH_PDF))
-            _c2.row_factory = _sq3_pdf.Row
-            for row in _c2.execute("""
-                SELECT COALESCE(metodo_pago,'Efectivo') AS mp,
-                    SUM(CASE WHEN fecha LIKE ? ||'%' THEN total ELSE 0 END) h,
-                    SUM(CASE WHEN fecha LIKE ? ||'%' THEN total ELSE 0 END) m,
-                    SUM(CASE WHEN fecha LIKE ? ||'%' THEN total ELSE 0 END) a
-                FROM ventas GROUP BY mp
-            """, (_hoy, _mes, _anio)):
-                dest = str(row["mp"]) if str(row["mp"]) in _by_period else "Efectivo"
-                _by_period[dest][0] += float(row["h"] or 0)
-                _by_period[dest][1] += float(row["m"] or 0)
-                _by_period[dest][2] += float(row["a"] or 0)
-            _c2.close()
-        except Exception:
-            pass
+        for mp, valores in VentasController.balance_por_metodo().items():
+            dest = mp if mp in _by_period else "Efectivo"
+            for i, v in enumerate(valores):
+                _by_period[dest][i] += v
 
         # Tabla: Método | Ventas (período) | Total (período) | Hoy | Este mes | Este año
         cab_mp = [["Método de Pago", "# Ventas\n(período)",
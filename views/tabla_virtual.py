@@ -0,0 +1,223 @@
+"""
+Tabla virtual sobre ttk.Treeview para listas muy grandes (50k+ filas)
+El Treeview solo contiene las filas que caben en pantalla; al desplazarse
+se reemplazan por las de la nueva posición.
+  - La tabla conoce únicamente la lista ordenada de claves (id_producto):
+    unos pocos enteros por fila, sin objetos de Tcl.
+  - Los valores se piden por lotes a `cargar_filas(claves)` (una consulta
+    WHERE id IN (...)) con un margen de filas extra (overscan) arriba y
+    abajo, y se guardan en una caché acotada.
+  - El iid de cada ítem es la clave, así que tree.focus(), identify_row(),
+    item(), bbox() y los menús siguen funcionando como en un Treeview normal.
+"""
+import logging
+from collections import OrderedDict
+from tkinter import Frame, Scrollbar, BOTH, LEFT, RIGHT, Y, VERTICAL
+from tkinter import ttk
+from typing import Callable, Dict, List, Sequence
+
+
+class TablaVirtual:
+    """Treeview que materializa solo la ventana visible de una lista de claves"""
+
+    OVERSCAN = 20           # filas extra que se leen por encima y por debajo
+    MAX_CACHE = 5000        # filas guardadas en memoria
+    ALTO_FILA = 20          # valores por defecto hasta poder medir el Treeview
+    ALTO_ENCABEZADO = 25
+
+    def __init__(self, parent, columnas: Sequence[str],
+                 cargar_filas: Callable[[List], Dict], **opciones_scrollbar):
+        self.frame = Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columnas, show="headings")
+        self.scrollbar = Scrollbar(
+            self.frame, orient=VERTICAL, command=self._yview, **opciones_scrollbar
+        )
+
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+
+        self._cargar_filas = cargar_filas
+        self._claves: List = []
+        self._posiciones: Dict = {}
+        self._cache: "OrderedDict" = OrderedDict()
+        self._inicio = 0
+        self._visibles = 1
+
+        self.tree.bind("<Configure>", lambda e: self._pintar())
+        self.tree.bind("<MouseWheel>", self._rueda)
+        self.tree.bind("<Button-4>", lambda e: self.desplazar(-3))
+        self.tree.bind("<Button-5>", lambda e: self.desplazar(3))
+        self.tree.bind("<Up>", lambda e: self._mover_foco(-1))
+        self.tree.bind("<Down>", lambda e: self._mover_foco(1))
+        self.tree.bind("<Prior>", lambda e: self._mover_foco(-self._visibles))
+        self.tree.bind("<Next>", lambda e: self._mover_foco(self._visibles))
+        self.tree.bind("<Home>", lambda e: self._mover_foco(-len(self._claves)))
+        self.tree.bind("<End>", lambda e: self._mover_foco(len(self._claves)))
+
+    # ── API ───────────────────────────────────────────────────────────────────
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def __len__(self):
+        return len(self._claves)
+
+    @property
+    def claves(self) -> List:
+        return self._claves
+
+    def establecer_claves(self, claves: Sequence):
+        """Reemplaza el contenido por `claves` (en el orden en que se muestran)"""
+        self._claves = list(claves)
+        self._posiciones = {clave: i for i, clave in enumerate(self._claves)}
+        self._cache.clear()
+        self._inicio = 0
+        self._pintar()
+
+    def actualizar_fila(self, clave, valores: Sequence):
+        """Reemplaza los valores de una fila (tras editarla en la BD)"""
+        self._cache[clave] = tuple(valores)
+        iid = str(clave)
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=tuple(valores))
+
+    def quitar_clave(self, clave):
+        """Quita una fila (tras eliminarla en la BD)"""
+        if clave not in self._posiciones:
+            return
+        self._claves.remove(clave)
+        self._posiciones = {c: i for i, c in enumerate(self._claves)}
+        self._cache.pop(clave, None)
+        self._pintar()
+
+    def invalidar(self):
+        """Descarta la caché de valores y vuelve a leer la ventana visible"""
+        self._cache.clear()
+        self._pintar()
+
+    def desplazar(self, filas: int):
+        self._ir_a(self._inicio + filas)
+        return "break"
+
+    def ver(self, clave):
+        """Desplaza la tabla para que `clave` quede visible"""
+        pos = self._posiciones.get(clave)
+        if pos is None:
+            return
+        if pos < self._inicio:
+            self._ir_a(pos)
+        elif pos >= self._inicio + self._visibles:
+            self._ir_a(pos - self._visibles + 1)
+
+    # ── Internos ──────────────────────────────────────────────────────────────
+
+    def _medir(self):
+        """Filas que caben en el alto actual del Treeview"""
+        alto_fila, encabezado = self.ALTO_FILA, self.ALTO_ENCABEZADO
+        hijos = self.tree.get_children()
+        if hijos:
+            bbox = self.tree.bbox(hijos[0])
+            if bbox:
+                encabezado, alto_fila = bbox[1], bbox[3]
+        alto = self.tree.winfo_height()
+        return max(1, (alto - encabezado) // max(alto_fila, 1))
+
+    def _ir_a(self, inicio: int):
+        maximo = max(0, len(self._claves) - self._visibles)
+        inicio = min(max(0, int(inicio)), maximo)
+        if inicio != self._inicio:
+            self._inicio = inicio
+            self._pintar()
+
+    def _filas(self, desde: int, hasta: int) -> List:
+        """Valores de las filas [desde, hasta) leyendo solo las que faltan"""
+        ventana = self._claves[desde:hasta]
+        faltan = [c for c in ventana if c not in self._cache]
+        if faltan:
+            # Leer también el overscan para que el siguiente paso no consulte
+            extra = self._claves[max(0, desde - self.OVERSCAN):desde] + \
+                self._claves[hasta:hasta + self.OVERSCAN]
+            faltan += [c for c in extra if c not in self._cache]
+            try:
+                leidas = self._cargar_filas(faltan)
+            except Exception as e:
+                logging.error(f"Error leyendo filas de la tabla virtual: {e}")
+                leidas = {}
+            for clave in faltan:
+                if clave in leidas:
+                    self._cache[clave] = tuple(leidas[clave])
+            while len(self._cache) > self.MAX_CACHE:
+                self._cache.popitem(last=False)
+        return [(c, self._cache[c]) for c in ventana if c in self._cache]
+
+    def _pintar(self):
+        # La primera vez se mide con valores por defecto; si el alto real de
+        # fila resulta distinto, se vuelve a pintar con la medida correcta.
+        for _ in range(2):
+            visibles = self._medir()
+            self._pintar_ventana(visibles)
+            if self._medir() == visibles:
+                break
+
+    def _pintar_ventana(self, visibles: int):
+        self._visibles = visibles
+        maximo = max(0, len(self._claves) - self._visibles)
+        self._inicio = min(self._inicio, maximo)
+
+        foco = self.tree.focus()
+        seleccion = self.tree.selection()
+
+        filas = self._filas(self._inicio, self._inicio + self._visibles)
+        self.tree.delete(*self.tree.get_children())
+        for clave, valores in filas:
+            self.tree.insert("", "end", iid=str(clave), values=valores)
+
+        # Conservar foco y selección si siguen a la vista
+        if foco and self.tree.exists(foco):
+            self.tree.focus(foco)
+        seleccionados = [iid for iid in seleccion if self.tree.exists(iid)]
+        if seleccionados:
+            self.tree.selection_set(seleccionados)
+
+        total = len(self._claves)
+        if total:
+            self.scrollbar.set(self._inicio / total, min(1.0, (self._inicio + self._visibles) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _yview(self, *args):
+        """Comandos de la barra de desplazamiento: moveto / scroll"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._ir_a(round(float(args[1]) * len(self._claves)))
+        elif args[0] == "scroll":
+            paso = int(args[1])
+            if args[2] == "pages":
+                paso *= max(1, self._visibles - 1)
+            self.desplazar(paso)
+
+    def _rueda(self, event):
+        return self.desplazar(int(-1 * (event.delta / 120)) * 3)
+
+    def _mover_foco(self, paso: int):
+        """Flechas / RePág / AvPág moviendo el foco más allá de lo visible"""
+        if not self._claves:
+            return "break"
+        foco = self.tree.focus()
+        actual = self._posiciones.get(self._clave_de(foco), self._inicio) if foco else self._inicio
+        destino = min(max(0, actual + paso), len(self._claves) - 1)
+        clave = self._claves[destino]
+        self.ver(clave)
+        iid = str(clave)
+        if self.tree.exists(iid):
+            self.tree.focus(iid)
+            self.tree.selection_set(iid)
+        return "break"
+
+    def _clave_de(self, iid: str):
+        """Convierte un iid de vuelta al tipo de las claves"""
+        for clave in (iid, int(iid) if iid.lstrip("-").isdigit() else None):
+            if clave in self._posiciones:
+                return clave
+        return None
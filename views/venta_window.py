@@ -20,6 +20,7 @@ from config.settings import FONT_STYLE, BTN_COLOR, BTN_FG
 from models.database import DatabaseManager
 from controllers.ventas import VentasController
 from views.kit_window import KitWindow
+from utils.sugerencias import BuscadorSugerencias
 
 # ── Fuentes opcionales ────────────────────────────────────────────────────────
 _FONT_REGULAR = Path(__file__).parent.parent / "resources" / "ArialNarrow.ttf"
@@ -102,6 +103,10 @@ class VentaWindow:
 
         self.lista_sugerencias = Listbox(self.window, height=30, font=("Arial", 10))
         self.lista_sugerencias.place_forget()
+        # Sugerencias en segundo plano (debounce): no bloquea al escanear
+        self._buscador = BuscadorSugerencias(
+            self.window, DatabaseManager.buscar_productos_like, self._mostrar_sugerencias
+        )
         self.codigo_entry.bind("<KeyRelease>", self._buscar_sugerencias)
         self.lista_sugerencias.bind("<Double-1>", self._seleccionar_sugerencia)
         self.lista_sugerencias.bind("<Return>",   self._seleccionar_sugerencia)
@@ -283,12 +288,23 @@ class VentaWindow:
     # ──────────────────────────────────────────────────────────────────────────
 
     def _buscar_sugerencias(self, event):
+        if event.keysym in ("Up", "Down"):
+            return
+        if event.keysym in ("Return", "KP_Enter", "Escape", "Tab"):
+            # El código ya se confirmó: descartar búsquedas en camino
+            self._buscador.cancelar()
+            return
+
         texto = self.codigo_entry.get().strip()
         if not texto:
+            self._buscador.cancelar()
             self.lista_sugerencias.place_forget()
             return
 
-        resultados = DatabaseManager.buscar_productos_like(texto)
+        self._buscador.solicitar(texto)
+
+    def _mostrar_sugerencias(self, texto, resultados):
+        """Pinta las sugerencias recibidas del buscador en segundo plano."""
         if resultados:
             self.lista_sugerencias.delete(0, END)
             for item in resultados: